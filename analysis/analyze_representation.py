@@ -9,8 +9,18 @@ if __name__ == "__main__":
     parser.add_argument("command", type=str, choices=["rpr", "rpr-frac", "pop-rankings", "rankings-fracs", "shift-pop", "pes-survey", "all"], help="Command to run. 'all' runs all commands. 'rpr' plots residents per rep. 'rpr-frac' plots residents per rep as a fraction. 'pop-rankings' plots state population rankings. 'rankings-fracs' plots state population rankings as a fraction. 'shift-pop' plots population shifts.")
     parser.add_argument("--show", action="store_true", help="Show plots.")
     parser.add_argument("--verbose", action="store_true", help="Verbose mode.")
+    parser.add_argument("--cache-dir", type=str, required=False, help="Directory to cache the computed residents per rep and population rankings in, to speed up later runs.", default=None)
+    parser.add_argument("--workers", type=int, required=False, help="Number of processes to export the plot images in. 0 exports each plot as it is made. Defaults to the number of CPUs.", default=None)
+    parser.add_argument("--data-only", action="store_true", help="Skip rendering plot images, only save the plot data as JSON.")
     args = parser.parse_args()
 
+    # Each (year, quantity) is computed once and shared by all plots
+    utils.set_computations(utils.Computations(cache_dir=args.cache_dir))
+
+    # Plots are exported together at the end
+    render_queue = utils.RenderQueue(max_workers=args.workers, data_only=args.data_only)
+    utils.set_render_queue(render_queue)
+
     if args.command in ["all","rpr"]:
         for year in hr.Year:
             utils.plot_residents_per_rep(year, args.show)
@@ -33,4 +43,6 @@ if __name__ == "__main__":
             utils.plot_shift_pop(year, args.show, report_all=args.verbose)
 
     if args.command in ["all","pes-survey"]:
-        utils.plot_pes_counts(args.show)
\ No newline at end of file
+        utils.plot_pes_counts(args.show)
+
+    render_queue.flush()
\ No newline at end of file
@@ -32,11 +32,12 @@ def download_data(congress: Optional[str]):
             logger.info(f"Skipping downloading file {bname} - already exists.")
 
 
-def make_loader(congress: Optional[str]) -> hr.LoadVoteViewCsv:
+def make_loader(congress: Optional[str], cache_dir: Optional[str] = None) -> hr.LoadVoteViewCsv:
     """Make a loader for loading data from CSV files.
 
     Args:
         congress (Optional[str]): Congress number, or 'all'.
+        cache_dir (Optional[str], optional): Directory to cache the parsed data in. Defaults to None (no caching).
 
     Returns:
         hr.LoadVoteViewCsv: Loader for loading data from CSV files.
@@ -54,20 +55,46 @@ def make_loader(congress: Optional[str]) -> hr.LoadVoteViewCsv:
     return hr.LoadVoteViewCsv(
         votes_csv=votes_csv, 
         rollcalls_csv=rollcalls_csv, 
-        members_csv=members_csv
+        members_csv=members_csv,
+        cache_dir=cache_dir
         )
 
 
-def analyze(congress: Optional[str]):
+def open_store(store_dir: str, cache_dir: Optional[str] = None) -> hr.VoteStore:
+    """Open the vote store, building it from the CSV files for all congresses if it does not exist yet.
+
+    Args:
+        store_dir (str): Directory of the vote store.
+        cache_dir (Optional[str], optional): Directory to cache the parsed data in while building. Defaults to None (no caching).
+
+    Returns:
+        hr.VoteStore: Vote store, partitioned by congress.
+    """
+    if os.path.exists(os.path.join(store_dir, "manifest.json")):
+        return hr.VoteStore(store_dir)
+    logger.info(f"Building vote store {store_dir} from the CSV files for all congresses...")
+    download_data("all")
+    return hr.VoteStore.write_voteview_csv(store_dir, make_loader("all", cache_dir))
+
+
+def analyze(congress: Optional[str], cache_dir: Optional[str] = None, store_dir: Optional[str] = None):
     """Analyze voting results.
 
     Args:
         congress (Optional[str]): Congress number, or 'all'.
+        cache_dir (Optional[str], optional): Directory to cache the parsed data in. Defaults to None (no caching).
+        store_dir (Optional[str], optional): Directory of a vote store to load only this congress from, instead of the CSV files. Defaults to None (use the CSV files).
     """
 
-    # Load data
-    loader = make_loader(congress)
-    votes, rollcalls, members = loader.load_consistency()
+    # Load data. Members are looked up by congress, since files for all congresses have one row per congress for each member
+    if store_dir is not None:
+        store = open_store(store_dir, cache_dir)
+        congresses = None if congress in [None, "all"] else [int(congress)]
+        votes, rollcalls, members = store.load(congresses=congresses)
+    else:
+        loader = make_loader(congress, cache_dir)
+        votes, rollcalls, _ = loader.load_consistency()
+        members = loader.load_member_table()
 
     # Options for calculating the votes
     cv_options = hr.CalculateVotes.Options(
@@ -80,12 +107,15 @@ def analyze(congress: Optional[str]):
     utils.report_voting(avr, cv_options, votes, rollcalls, members)
 
 
-def analyze_voting_across_congresses(show: bool = False):
+def analyze_voting_across_congresses(show: bool = False, cache_dir: Optional[str] = None, store_dir: Optional[str] = None):
     """Analyze voting results across congresses.
 
     Args:
         show (bool, optional): Show plots. Defaults to False.
+        cache_dir (Optional[str], optional): Directory to cache the parsed data in. Defaults to None (no caching).
+        store_dir (Optional[str], optional): Directory of a vote store to load each congress from, instead of the CSV files. Defaults to None (use the CSV files).
     """
+    store = open_store(store_dir, cache_dir) if store_dir is not None else None
 
     # Options for calculating the votes
     cv_options = hr.CalculateVotes.Options(
@@ -100,10 +130,14 @@ def analyze_voting_across_congresses(show: bool = False):
             continue
         logger.info(f'Loading data for congress {congress_int}...')
 
-        congress = "%03d" % congress_int
-        download_data(congress)
-        loader = make_loader(congress)
-        votes, rollcalls, members = loader.load_consistency()
+        if store is not None:
+            votes, rollcalls, member_table = store.load(congresses=[congress_int])
+            members = member_table.to_members(congress_int)
+        else:
+            congress = "%03d" % congress_int
+            download_data(congress)
+            loader = make_loader(congress, cache_dir)
+            votes, rollcalls, members = loader.load_consistency()
 
         data = utils.VoteData(
             votes=votes,
@@ -124,10 +158,15 @@ if __name__ == "__main__":
     parser.add_argument("--command", type=str, choices=['download', 'analyze', 'analyze-batch'], required=False, help="Command to run.", default="all")
     parser.add_argument("--congress", type=str, required=False, nargs="+", help="Year of congress, or 'all', or several years.", default="117")
     parser.add_argument("--show", action="store_true", help="Show plots.")
+    parser.add_argument("--cache-dir", type=str, required=False, help="Directory to cache the parsed CSV files in, to speed up later runs.", default=None)
+    parser.add_argument("--store", type=str, required=False, help="Directory of a vote store partitioned by congress, built from the CSV files for all congresses on first use. Only the requested congresses are loaded from it.", default=None)
+    parser.add_argument("--data-only", action="store_true", help="Skip rendering plot images, only save the plot data as JSON.")
     args = parser.parse_args()
 
+    utils.set_render_queue(utils.RenderQueue(data_only=args.data_only))
+
     if args.command == 'analyze-batch':
-        analyze_voting_across_congresses(args.show)
+        analyze_voting_across_congresses(args.show, args.cache_dir, args.store)
     else:
             
         for congress in args.congress:
@@ -135,4 +174,4 @@ if __name__ == "__main__":
                 download_data(congress)
 
             if args.command in ['analyze']:
-                analyze(congress)
\ No newline at end of file
+                analyze(congress, args.cache_dir, args.store)
\ No newline at end of file
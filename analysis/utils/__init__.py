@@ -1,6 +1,8 @@
 from .assignments_from_pop_shifts import plot_shift_pop
+from .compute import Computations, get_computations, set_computations
 from .pes_survey import plot_pes_counts
 from .pop_rankings import plot_state_pop_rankings
 from .rankings_fracs import plot_rankings_fracs_ave, plot_rankings_fracs_for_year, plot_rankings_fracs_heat
+from .render import RenderQueue, get_render_queue, set_render_queue
 from .residents_per_rep import plot_residents_per_rep, plot_residents_per_rep_frac
 from .voting import report_voting, AnalyzeVotingResults, analyze_voting, analyze_voting_across_congresses, VoteData
\ No newline at end of file
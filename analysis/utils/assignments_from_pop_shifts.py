@@ -1,8 +1,9 @@
+from .render import get_render_queue
+
 import houseofreps as hr
 import plotly.graph_objects as go
 from typing import Dict, Optional, Tuple, List, Union
 from loguru import logger
-import os
 from tqdm import tqdm
 
 
@@ -86,13 +87,8 @@ def plot_table(top_n: int, smallest: Union[List[Tuple[hr.St,Optional[float]]],Li
         )
 
     label = "add" if is_add else "lose"
-    os.makedirs("plots", exist_ok=True)
     fname = 'plots/pop_shift_add_remove_%s_table_%s.jpg' % (year.value, label)
-    fig.write_image(fname)
-    logger.info(f"Saved plot to: {fname}")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, fname, show)
 
 
 def plot_add_remove_bars(year: hr.Year, st_to_pop_shift_for_add: Dict[hr.St,float], st_to_pop_shift_for_lose: Dict[hr.St,Optional[float]], show: bool):
@@ -132,9 +128,4 @@ def plot_add_remove_bars(year: hr.Year, st_to_pop_shift_for_add: Dict[hr.St,floa
         yaxis_range=[-0.8,0.8],
         )
 
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/pop_shift_add_remove_%s.jpg' % year.value)
-    logger.info(f"Saved plot to: plots/pop_shift_add_remove_{year.value}.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, f'plots/pop_shift_add_remove_{year.value}.jpg', show)
@@ -0,0 +1,120 @@
+import houseofreps as hr
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import os
+from loguru import logger
+
+
+def get_state_population_rankings(year: hr.Year) -> List[Tuple[float, hr.St]]:
+    df = hr.residents_per_rep_table()
+    df = df[df["year"] == year].sort_values("rank")
+    return list(zip(df["pop"].tolist(), df["st"]))
+
+
+class Computations:
+    """Computes each (year, quantity) used by the plots once. Results are cached in memory, and on disk if a cache directory is given.
+    The disk cache is invalidated when the population data of the package changes.
+    """
+
+    # Version of the disk cache layout - bump to invalidate existing caches
+    CACHE_VERSION = 1
+
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """Constructor
+
+        Args:
+            cache_dir (Optional[str], optional): Directory to cache results in across runs. Defaults to None (memory only).
+        """
+        self.cache_dir = cache_dir
+        self.no_computed = 0
+        self._cache: Dict[Tuple[str, hr.Year], Any] = {}
+        self._source: Optional[Dict[str, Any]] = None
+
+
+    @property
+    def source(self) -> Dict[str, Any]:
+        """Fingerprint of the population data that all results are computed from
+        """
+        if self._source is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(hr.__file__)), "apportionment.csv")
+            self._source = hr.fingerprint_file(path).to_dict()
+        return self._source
+
+
+    def _get(self, quantity: str, year: hr.Year, compute: Callable[[hr.Year], Any], to_json: Callable[[Any], Any], from_json: Callable[[Any], Any]) -> Any:
+        key = (quantity, year)
+        if key in self._cache:
+            return self._cache[key]
+
+        fname = os.path.join(self.cache_dir, f"{quantity}_{year.value}.json") if self.cache_dir is not None else None
+        if fname is not None and os.path.exists(fname):
+            with open(fname, "r") as f:
+                entry = json.load(f)
+            if entry.get("version") == self.CACHE_VERSION and entry.get("source", {}).get("sha256") == self.source["sha256"]:
+                self._cache[key] = from_json(entry["value"])
+                return self._cache[key]
+            logger.debug(f"Cache entry {fname} is stale - recomputing")
+
+        value = compute(year)
+        self.no_computed += 1
+        self._cache[key] = value
+        if fname is not None:
+            assert self.cache_dir is not None
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(fname, "w") as f:
+                json.dump({ "version": self.CACHE_VERSION, "source": self.source, "value": to_json(value) }, f)
+        return value
+
+
+    def residents_per_rep(self, year: hr.Year) -> hr.ResidentsPerRep:
+        """Residents per representative, see hr.calculate_residents_per_rep_for_year
+
+        Args:
+            year (hr.Year): Year
+
+        Returns:
+            hr.ResidentsPerRep: Residents per representative. Shared between callers - do not modify.
+        """
+        return self._get("residents_per_rep", year, hr.calculate_residents_per_rep_for_year, hr.ResidentsPerRep.to_dict, hr.ResidentsPerRep.from_dict)
+
+
+    def state_pop_rankings(self, year: hr.Year) -> List[Tuple[float, hr.St]]:
+        """States ranked by population, highest first, excluding DC
+
+        Args:
+            year (hr.Year): Year
+
+        Returns:
+            List[Tuple[float, hr.St]]: Population and state. Shared between callers - do not modify.
+        """
+        return self._get(
+            "state_pop_rankings",
+            year,
+            get_state_population_rankings,
+            lambda rankings: [ [pop, st.value] for pop, st in rankings ],
+            lambda rankings: [ (pop, hr.St(st)) for pop, st in rankings ]
+            )
+
+
+# Shared by the plot functions unless they are passed their own
+_COMPUTATIONS = Computations()
+
+
+def get_computations() -> Computations:
+    """Computations shared by the plot functions
+
+    Returns:
+        Computations: Computations
+    """
+    return _COMPUTATIONS
+
+
+def set_computations(computations: Computations):
+    """Set the computations shared by the plot functions, e.g. to cache them on disk
+
+    Args:
+        computations (Computations): Computations
+    """
+    global _COMPUTATIONS
+    _COMPUTATIONS = computations
@@ -2,11 +2,12 @@
 # https://www.census.gov/library/stories/2022/05/2020-census-undercount-overcount-rates-by-state.html
 # https://www2.census.gov/programs-surveys/decennial/coverage-measurement/pes/2020-source-and-accuracy-pes-estimates.pdf
 
+from .render import get_render_queue
+
 import houseofreps as hr
 import copy
 from loguru import logger
 import plotly.graph_objects as go
-import os
 
 
 def plot_pes_counts(show: bool):
@@ -94,10 +95,5 @@ def plot_pes_counts(show: bool):
         font=dict(size=18),
         )
     
-    os.makedirs("plots", exist_ok=True)
     fname = 'plots/pes_survey_table_%s.jpg' % (year.value)
-    fig.write_image(fname)
-    logger.info(f"Saved plot to: {fname}")
-
-    if show:
-        fig.show()
\ No newline at end of file
+    get_render_queue().submit(fig, fname, show)
\ No newline at end of file
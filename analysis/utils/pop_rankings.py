@@ -1,28 +1,16 @@
 from .helpers import COL_OVER, COL_UNDER
+from .compute import get_computations
+from .render import get_render_queue
 
 import houseofreps as hr
 import plotly.graph_objects as go
 from typing import List, Dict, Tuple, Optional
-import os
 import numpy as np
-from loguru import logger
-
-
-def get_state_population_rankings(year: hr.Year) -> List[Tuple[float, hr.St]]:
-    rankings = []
-    house = hr.HouseOfReps(year=year, pop_type=hr.PopType.APPORTIONMENT)
-    for st,state in house.states.items():
-        if st == hr.St.DISTRICT_OF_COLUMBIA:
-            continue
-        rankings.append((state.pop,st))
-
-    rankings.sort(key = lambda x: -x[0])
-    return rankings
 
 
 def plot_state_pop_rankings(year: hr.Year, show: bool):
-    rankings = get_state_population_rankings(year)
-    rpr = hr.calculate_residents_per_rep_for_year(year)
+    rankings = get_computations().state_pop_rankings(year)
+    rpr = get_computations().residents_per_rep(year)
 
     st_best_name = {}
     st_worst_name = {}
@@ -81,9 +69,4 @@ def plot_state_pop_rankings(year: hr.Year, show: bool):
         font=dict(size=18),
     )
 
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/state_pop_rankings_%s.jpg' % year.value)
-    logger.info(f"Saved plot to: plots/state_pop_rankings_{year.value}.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, f'plots/state_pop_rankings_{year.value}.jpg', show)
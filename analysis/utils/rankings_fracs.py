@@ -1,16 +1,15 @@
 from .helpers import COL_OVER, COL_UNDER, COL_OVER_RGB, COL_UNDER_RGB
-from .pop_rankings import get_state_population_rankings
+from .compute import get_computations
+from .render import get_render_queue
 
 import houseofreps as hr
 import plotly.graph_objects as go
-import os
 import numpy as np
-from loguru import logger
 
 
 def plot_rankings_fracs_for_year(year: hr.Year, show: bool):
-    rpr = hr.calculate_residents_per_rep_for_year(year)
-    rankings = get_state_population_rankings(year)
+    rpr = get_computations().residents_per_rep(year)
+    rankings = get_computations().state_pop_rankings(year)
 
     x,y,xticks = [],[],[]
     for i,(pop,st) in enumerate(rankings):
@@ -74,12 +73,7 @@ def plot_rankings_fracs_for_year(year: hr.Year, show: bool):
         yaxis_range=[0.5,1.5],
         )
     
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/state_pop_rankings_frac_%s.jpg' % year.value)
-    logger.info(f"Saved plot to: plots/state_pop_rankings_frac_{year.value}.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, f'plots/state_pop_rankings_frac_{year.value}.jpg', show)
 
 
 def plot_rankings_fracs_ave(show: bool):
@@ -88,8 +82,8 @@ def plot_rankings_fracs_ave(show: bool):
     x = None
     ymean: np.ndarray = np.array([], dtype=float)
     for year in hr.Year:
-        rpr = hr.calculate_residents_per_rep_for_year(year)
-        rankings = get_state_population_rankings(year)
+        rpr = get_computations().residents_per_rep(year)
+        rankings = get_computations().state_pop_rankings(year)
 
         x,y = [],[]
         for i,(pop,st) in enumerate(rankings):
@@ -144,12 +138,7 @@ def plot_rankings_fracs_ave(show: bool):
         yaxis_range=[0.5,1.5],
         )
         
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/state_pop_rankings_frac_ave.jpg')
-    logger.info(f"Saved plot to: plots/state_pop_rankings_frac_ave.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, 'plots/state_pop_rankings_frac_ave.jpg', show)
 
 
 def plot_rankings_fracs_heat(show: bool):
@@ -159,8 +148,8 @@ def plot_rankings_fracs_heat(show: bool):
     years = sorted(list(hr.Year), key=lambda year: year.value)
     year_to_ranking_delaware = {}
     for iyear,year in enumerate(years):
-        rpr = hr.calculate_residents_per_rep_for_year(year)
-        rankings = get_state_population_rankings(year)
+        rpr = get_computations().residents_per_rep(year)
+        rankings = get_computations().state_pop_rankings(year)
 
         y,z = [],[]
         for i,(pop,st) in enumerate(reversed(rankings)):
@@ -231,9 +220,4 @@ def plot_rankings_fracs_heat(show: bool):
         showlegend=True,
         )    
 
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/state_pop_rankings_frac_heat.jpg')
-    logger.info(f"Saved plot to: plots/state_pop_rankings_frac_heat.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, 'plots/state_pop_rankings_frac_heat.jpg', show)
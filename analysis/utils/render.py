@@ -0,0 +1,108 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+import plotly.graph_objects as go
+import plotly.io as pio
+import os
+from loguru import logger
+
+
+def _write_image(fig_json: str, fname: str) -> str:
+    pio.from_json(fig_json).write_image(fname)
+    return fname
+
+
+class RenderQueue:
+    """Queue of figures to save. Static image export is slow, so queued figures are exported concurrently in a process pool when the queue is flushed.
+    Use as a context manager to flush on exit.
+    """
+
+
+    def __init__(self, max_workers: Optional[int] = 0, data_only: bool = False):
+        """Constructor
+
+        Args:
+            max_workers (Optional[int], optional): Number of worker processes. 0 exports each figure immediately in this process, None uses the number of CPUs. Defaults to 0.
+            data_only (bool, optional): Skip rendering images, and only save the figure data as plotly JSON next to each image path. For headless pipeline runs. Defaults to False.
+        """
+        self.max_workers = max_workers
+        self.data_only = data_only
+        self._queued: List[Tuple[str, str]] = []
+
+
+    def __enter__(self) -> "RenderQueue":
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+        elif len(self._queued) > 0:
+            logger.warning(f"Dropped {len(self._queued)} queued figures because of an exception: {exc_type.__name__}")
+            self._queued = []
+
+
+    def submit(self, fig: go.Figure, fname: str, show: bool = False):
+        """Save a figure, or queue it to be saved
+
+        Args:
+            fig (go.Figure): Figure
+            fname (str): Image file name
+            show (bool, optional): Show the figure. Defaults to False.
+        """
+        if os.path.dirname(fname) != "":
+            os.makedirs(os.path.dirname(fname), exist_ok=True)
+
+        if self.data_only:
+            fname_json = os.path.splitext(fname)[0] + ".json"
+            fig.write_json(fname_json)
+            logger.info(f"Saved plot data to: {fname_json}")
+        elif self.max_workers == 0:
+            fig.write_image(fname)
+            logger.info(f"Saved plot to: {fname}")
+        else:
+            self._queued.append((fig.to_json(), fname))
+
+        if show:
+            fig.show()
+
+
+    def flush(self) -> List[str]:
+        """Export all queued figures
+
+        Returns:
+            List[str]: File names written, in the order they finished
+        """
+        queued, self._queued = self._queued, []
+        if len(queued) == 0:
+            return []
+
+        fnames = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [ executor.submit(_write_image, fig_json, fname) for fig_json, fname in queued ]
+            for future in as_completed(futures):
+                fnames.append(future.result())
+                logger.info(f"Saved plot to: {fnames[-1]}")
+        return fnames
+
+
+# Shared by the plot functions. Defaults to exporting each figure immediately
+_RENDER_QUEUE = RenderQueue()
+
+
+def get_render_queue() -> RenderQueue:
+    """Render queue shared by the plot functions
+
+    Returns:
+        RenderQueue: Render queue
+    """
+    return _RENDER_QUEUE
+
+
+def set_render_queue(render_queue: RenderQueue):
+    """Set the render queue shared by the plot functions
+
+    Args:
+        render_queue (RenderQueue): Render queue
+    """
+    global _RENDER_QUEUE
+    _RENDER_QUEUE = render_queue
@@ -1,14 +1,14 @@
 from .helpers import COL_OVER, COL_UNDER
+from .compute import get_computations
+from .render import get_render_queue
 
 import houseofreps as hr
 import plotly.graph_objects as go
-import os
 import numpy as np
-from loguru import logger
 
 
 def plot_residents_per_rep(year: hr.Year, show: bool):
-    rpr = hr.calculate_residents_per_rep_for_year(year)
+    rpr = get_computations().residents_per_rep(year)
 
     vals = sorted(rpr.residents_per_rep.items(), key=lambda x: x[1])
 
@@ -63,20 +63,15 @@ def plot_residents_per_rep(year: hr.Year, show: bool):
         yaxis_range=[0,1150000]
     )
 
-    # Save the plot as an HTML file
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/no_residents_per_rep_{rpr.year.value}.jpg')
-    logger.info(f"Saved plot to: plots/no_residents_per_rep_{rpr.year.value}.jpg")
-
-    if show:
-        fig.show()
+    # Save the plot
+    get_render_queue().submit(fig, f'plots/no_residents_per_rep_{rpr.year.value}.jpg', show)
 
     return fig
     
 def plot_residents_per_rep_frac(show: bool):
     rprs = []
     for year in hr.Year:
-        rpr = hr.calculate_residents_per_rep_for_year(year)
+        rpr = get_computations().residents_per_rep(year)
         rprs.append(rpr)
 
     mean_dat, std_dat, labels = [], [], []
@@ -143,12 +138,7 @@ def plot_residents_per_rep_frac(show: bool):
         )
     )
 
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image(f'plots/no_residents_per_rep_frac.jpg')
-    logger.info(f"Saved plot to: plots/no_residents_per_rep_frac.jpg")
-
-    if show:
-        fig.show()
+    get_render_queue().submit(fig, 'plots/no_residents_per_rep_frac.jpg', show)
 
     return fig
 
@@ -1,8 +1,11 @@
+from .render import get_render_queue
+
 import houseofreps as hr
 from loguru import logger
 from dataclasses import dataclass
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 import plotly.graph_objects as go
+import numpy as np
 import os
 
 
@@ -73,15 +76,12 @@ def analyze_voting_across_congresses(
         width=800,
         height=600
         )
-    os.makedirs("plots", exist_ok=True)
-    fig.write_image("plots/diffs.png")
-    fig.show()
-    logger.info(f'Wrote to plots/diffs.png')
+    get_render_queue().submit(fig, "plots/diffs.png", show=True)
 
 
 def analyze_voting(
     votes: hr.VotesAll, 
-    members: hr.Members, 
+    members: Union[hr.Members, hr.MemberTable], 
     rollcalls: hr.RollCallsAll,
     cv_options: hr.CalculateVotes.Options
     ) -> AnalyzeVotingResults:
@@ -91,26 +91,26 @@ def analyze_voting(
     rolls_flipped_decisions = []
     max_diff, roll_max_diff = 0.0, None
     no_rollnumbers_missing_members = 0
-    for congress, rollnumber_to_rollvotes in votes.congress_to_rollnumber_to_votes.items():
-        for rollnumber, rv in rollnumber_to_rollvotes.items():
-            rc = rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber]
-            # Calculate vote results
-            cv = hr.CalculateVotes(
-                rv, members, rc,
-                options=cv_options
-                )
-            vr_actual = cv.calculate_votes()
-            vr_frac = cv.calculate_votes_fractional().vote_results
-
-            if vr_actual.majority_decision != vr_frac.majority_decision:
-                rolls_flipped_decisions.append(AnalyzeVotingResults.Roll(congress, rollnumber))
-                logger.info(f'Congress {congress} rollnumber {rollnumber} has a flip')
-
-            # Compute max diff
-            max_diff_0 = max([ abs(vr_actual.castcode_to_count[castcode] - vr_frac.castcode_to_count[castcode])  for castcode in vr_actual.castcode_to_count.keys() ])
-            if max_diff_0 > max_diff:
-                max_diff = max_diff_0
-                roll_max_diff = AnalyzeVotingResults.Roll(congress, rollnumber)
+    for congress in votes.congress_to_rollnumber_to_votes.keys():
+        # Calculate vote results for all rolls of the congress at once
+        matrix = hr.VoteMatrix.from_votes_all(votes, congress)
+        cvb = hr.CalculateVotesBatch(
+            matrix, hr.member_state_idxs(members, matrix),
+            options=cv_options
+            )
+        vrb_actual = cvb.calculate_votes(rollcalls)
+        vrb_frac = cvb.calculate_votes_fractional()
+
+        for idx in np.flatnonzero(vrb_actual.majority_pass != vrb_frac.majority_pass):
+            rollnumber = int(matrix.rollnumbers[idx])
+            rolls_flipped_decisions.append(AnalyzeVotingResults.Roll(congress, rollnumber))
+            logger.info(f'Congress {congress} rollnumber {rollnumber} has a flip')
+
+        # Compute max diff over the castcodes cast in each roll
+        diffs = np.where(vrb_actual.present, np.abs(vrb_actual.counts - vrb_frac.counts), 0.0).max(axis=1)
+        if len(diffs) > 0 and diffs.max() > max_diff:
+            max_diff = float(diffs.max())
+            roll_max_diff = AnalyzeVotingResults.Roll(congress, int(matrix.rollnumbers[np.argmax(diffs)]))
 
     # Report missing members
     if no_rollnumbers_missing_members > 0:
@@ -128,7 +128,7 @@ def report_voting(
     cv_options: hr.CalculateVotes.Options,
     votes: hr.VotesAll,
     rollcalls: hr.RollCallsAll,
-    members: hr.Members
+    members: Union[hr.Members, hr.MemberTable]
     ):
     logger.info("Voting analysis results:")
 
@@ -156,10 +156,12 @@ def report_voting(
 def report_voting_roll(
     votes: hr.VotesAll,
     rollcalls: hr.RollCallsAll, 
-    members: hr.Members,
+    members: Union[hr.Members, hr.MemberTable],
     roll: AnalyzeVotingResults.Roll,
     cv_options: hr.CalculateVotes.Options
     ):
+    if isinstance(members, hr.MemberTable):
+        members = members.to_members(roll.congress)
     rv = votes.congress_to_rollnumber_to_votes[roll.congress][roll.rollnumber]
     rc = rollcalls.congress_to_rollnumber_to_rollcall[roll.congress][roll.rollnumber]
     cv = hr.CalculateVotes(
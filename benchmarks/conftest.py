@@ -0,0 +1,31 @@
+import houseofreps as hr
+import pytest
+import os
+
+
+# Scales of the synthetic voteview data
+VOTEVIEW_SCALES = {
+    "small": hr.SyntheticVoteViewOptions(no_congresses=2, no_rolls=100),
+    "medium": hr.SyntheticVoteViewOptions(no_congresses=10, no_rolls=500),
+    "large": hr.SyntheticVoteViewOptions(no_congresses=40, no_rolls=1000),
+    "full": hr.SyntheticVoteViewOptions(no_congresses=117, no_rolls=600)
+    }
+
+# Scales to run, set with e.g. HOUSEOFREPS_BENCH_SCALES=small,medium,large,full
+BENCH_SCALES = os.environ.get("HOUSEOFREPS_BENCH_SCALES", "small,medium").split(",")
+
+
+@pytest.fixture(scope="session", params=[ scale for scale in VOTEVIEW_SCALES.keys() if scale in BENCH_SCALES ])
+def voteview_csvs(request, tmp_path_factory):
+    """Synthetic voteview csvs at each scale, written once per session
+    """
+    loader = hr.write_synthetic_voteview_csvs(str(tmp_path_factory.mktemp(f"voteview_{request.param}")), VOTEVIEW_SCALES[request.param])
+    return { 'votes': loader.votes_csv, 'rollcalls': loader.rollcalls_csv, 'members': loader.members_csv }
+
+
+@pytest.fixture(scope="session")
+def voteview_data(voteview_csvs):
+    """Votes, rollcalls and members loaded from the synthetic voteview csvs
+    """
+    loader = hr.LoadVoteViewCsv(votes_csv=voteview_csvs['votes'], rollcalls_csv=voteview_csvs['rollcalls'], members_csv=voteview_csvs['members'])
+    return loader.load_consistency()
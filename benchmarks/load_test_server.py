@@ -0,0 +1,153 @@
+"""Load test of the apportionment server (houseofreps serve).
+
+Runs concurrent keep-alive clients that send a mix of /apportion, /margins and /electoral queries, drawn from a fixed number of distinct population overrides so the cache hit rate can be controlled, and reports throughput and latency percentiles.
+Starts a server in this process unless --port is given:
+
+    python benchmarks/load_test_server.py --clients 16 --requests 500 --distinct 50
+    python benchmarks/load_test_server.py --port 8435 --batch-size 5000
+"""
+import houseofreps as hr
+from houseofreps.server import ApportionmentServer
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, path: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+    body = json.dumps(params).encode("utf8")
+    writer.write(f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    content_length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            content_length = int(value)
+    return status, json.loads(await reader.readexactly(content_length))
+
+
+async def _client(host: str, port: int, queries: List[Tuple[str, Dict[str, Any]]], latencies: List[float], errors: List[int]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for path, params in queries:
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, path, params)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+def _make_queries(no_clients: int, no_requests: int, no_distinct: int, seed: int) -> List[List[Tuple[str, Dict[str, Any]]]]:
+    rng = np.random.default_rng(seed)
+    sts = hr.St.all_except_dc()
+    pops = np.array([ hr.ST_TRUE[st].year_to_pop[hr.Year.YR2020].apportionment for st in sts ])
+
+    # Each distinct query perturbs the population of one state
+    overrides = []
+    for _ in range(no_distinct):
+        idx = rng.integers(len(sts))
+        overrides.append({ sts[idx].value: float(pops[idx] * rng.uniform(0.9, 1.1)) })
+
+    paths = [ "/apportion", "/margins", "/electoral" ]
+    return [
+        [ (paths[rng.integers(len(paths))], { "pops": overrides[rng.integers(no_distinct)] }) for _ in range(no_requests) ]
+        for _ in range(no_clients)
+        ]
+
+
+async def _run_batch(host: str, port: int, batch_size: int, seed: int) -> float:
+    rng = np.random.default_rng(seed)
+    sts = hr.St.all_except_dc()
+    pops = np.array([ hr.ST_TRUE[st].year_to_pop[hr.Year.YR2020].apportionment for st in sts ])
+    scenarios = [ dict(zip([ st.value for st in sts ], row)) for row in (pops * rng.uniform(0.9, 1.1, size=(batch_size, len(sts)))).tolist() ]
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        start = time.perf_counter()
+        status, _ = await _request(reader, writer, "/batch", { "scenarios": scenarios })
+        assert status == 200, f"Batch request failed with status {status}"
+        return time.perf_counter() - start
+    finally:
+        writer.close()
+
+
+async def run_load_test(
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+    no_clients: int = 16,
+    no_requests: int = 200,
+    no_distinct: int = 50,
+    batch_size: int = 0,
+    seed: int = 0
+    ) -> Dict[str, Any]:
+    """Run the load test
+
+    Args:
+        host (str, optional): Host of the server. Defaults to "127.0.0.1".
+        port (Optional[int], optional): Port of the server. Defaults to None, which starts a server in this process.
+        no_clients (int, optional): Number of concurrent clients. Defaults to 16.
+        no_requests (int, optional): Number of requests per client. Defaults to 200.
+        no_distinct (int, optional): Number of distinct population overrides queried. Defaults to 50.
+        batch_size (int, optional): If positive, also time one /batch request with this many scenarios. Defaults to 0.
+        seed (int, optional): Random seed. Defaults to 0.
+
+    Returns:
+        Dict[str, Any]: Results
+    """
+    server = None
+    if port is None:
+        server = ApportionmentServer(host=host, port=0)
+        await server.start()
+        port = server.port
+
+    try:
+        latencies: List[float] = []
+        errors: List[int] = []
+        start = time.perf_counter()
+        await asyncio.gather(*[ _client(host, port, queries, latencies, errors) for queries in _make_queries(no_clients, no_requests, no_distinct, seed) ])
+        elapsed = time.perf_counter() - start
+
+        lat_ms = np.array(latencies) * 1000.0
+        results: Dict[str, Any] = {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "elapsed_s": elapsed,
+            "requests_per_s": len(latencies) / elapsed,
+            "latency_ms": { f"p{q}": float(np.percentile(lat_ms, q)) for q in (50, 95, 99) }
+            }
+        if batch_size > 0:
+            results["batch_s"] = await _run_batch(host, port, batch_size, seed)
+
+        reader, writer = await asyncio.open_connection(host, port)
+        _, stats = await _request(reader, writer, "/stats", {})
+        writer.close()
+        results["cache"] = stats["cache"]
+        return results
+    finally:
+        if server is not None:
+            await server.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the apportionment server.")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Host of the server.")
+    parser.add_argument("--port", type=int, default=None, help="Port of a running server. Defaults to starting one in this process.")
+    parser.add_argument("--clients", type=int, default=16, help="Number of concurrent clients.")
+    parser.add_argument("--requests", type=int, default=200, help="Number of requests per client.")
+    parser.add_argument("--distinct", type=int, default=50, help="Number of distinct population overrides queried.")
+    parser.add_argument("--batch-size", type=int, default=0, help="Also time one batch request with this many scenarios.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load_test(args.host, args.port, args.clients, args.requests, args.distinct, args.batch_size, args.seed))
+    print(json.dumps(results, indent=2))
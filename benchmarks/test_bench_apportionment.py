@@ -0,0 +1,39 @@
+import houseofreps as hr
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("year", [ hr.Year.YR1960, hr.Year.YR2020 ])
+@pytest.mark.parametrize("no_seats", [ 435, 1000, 5000 ])
+def test_assign_house_seats_priority(benchmark, year: hr.Year, no_seats: int):
+    def run():
+        house = hr.HouseOfReps(year=year, pop_type=hr.PopType.APPORTIONMENT, no_voting_house_seats=no_seats)
+        house.assign_house_seats_priority()
+        return house
+    house = benchmark(run)
+    assert sum(house.states[st].no_reps.voting for st in hr.St) == no_seats
+
+
+@pytest.mark.parametrize("method", list(hr.ApportionmentMethod))
+@pytest.mark.parametrize("no_scenarios", [ 1, 1000, 100000 ])
+def test_apportion(benchmark, method: hr.ApportionmentMethod, no_scenarios: int):
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    pops = np.array([ house.states[st].pop for st in hr.St.all_except_dc() ])
+    pops = pops * np.random.default_rng(0).uniform(0.95, 1.05, size=(no_scenarios, len(pops)))
+    no_reps = benchmark(hr.apportion, pops, 435, method)
+    assert (no_reps.sum(axis=1) == 435).all()
+
+
+@pytest.mark.parametrize("exact", [ False, True ])
+@pytest.mark.parametrize("no_scenarios", [ 1, 1000, 100000 ])
+def test_apportion_exact(benchmark, exact: bool, no_scenarios: int):
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    pops = hr.to_persons([ house.states[st].pop for st in hr.St.all_except_dc() ])
+    pops = (pops * np.random.default_rng(0).uniform(0.95, 1.05, size=(no_scenarios, len(pops)))).astype(np.int64)
+    if exact:
+        no_reps = benchmark(hr.apportion_exact, pops, 435)
+    else:
+        no_reps = benchmark(hr.apportion, pops.astype(float), 435)
+    assert (no_reps.sum(axis=1) == 435).all()
@@ -0,0 +1,16 @@
+import houseofreps as hr
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("st,target", [
+    (hr.St.NEW_YORK, hr.Target.ADD),
+    (hr.St.MINNESOTA, hr.Target.LOSE),
+    (hr.St.RHODE_ISLAND, hr.Target.LOSE)
+    ])
+@pytest.mark.parametrize("pop_change_mode", list(hr.PopChangeMode))
+def test_find_min_pop_change_required_for_change_repr(benchmark, st: hr.St, target: hr.Target, pop_change_mode: hr.PopChangeMode):
+    # Each call runs thousands of apportionments - a few rounds are enough
+    pop_change = benchmark.pedantic(hr.find_min_pop_change_required_for_change_repr, args=(hr.Year.YR2020, st, target, pop_change_mode), rounds=3, iterations=1)
+    assert pop_change is not None
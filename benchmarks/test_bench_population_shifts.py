@@ -0,0 +1,50 @@
+import houseofreps as hr
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture
+def house() -> hr.HouseOfReps:
+    return hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+
+
+@pytest.mark.parametrize("no_shifts", [ 1, 50 ])
+def test_shift_pop_from_entire_us_to_state(benchmark, house: hr.HouseOfReps, no_shifts: int):
+    def run():
+        for st in list(hr.St)[:no_shifts]:
+            hr.shift_pop_from_entire_us_to_state(house, st_to=st, pop_shift_millions=0.01, verbose=False)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("no_shifts", [ 1, 50 ])
+def test_shift_pop_from_entire_us_to_state_by_global_percentage(benchmark, house: hr.HouseOfReps, no_shifts: int):
+    def run():
+        for st in list(hr.St)[:no_shifts]:
+            hr.shift_pop_from_entire_us_to_state_by_global_percentage(house, st_to=st, percent_of_entire_us=0.001, verbose=False)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("no_shifts", [ 1, 50 ])
+def test_shift_pop_from_entire_us_to_state_by_local_percentage(benchmark, house: hr.HouseOfReps, no_shifts: int):
+    def run():
+        for st in list(hr.St)[:no_shifts]:
+            hr.shift_pop_from_entire_us_to_state_by_local_percentage(house, st_to=st, percent_of_st_to=0.001, verbose=False)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("no_shifts", [ 1, 50 ])
+def test_shift_pop_from_state_to_entire_us(benchmark, house: hr.HouseOfReps, no_shifts: int):
+    def run():
+        for st in list(hr.St)[:no_shifts]:
+            hr.shift_pop_from_state_to_entire_us(house, st_from=st, percent_of_st_from=0.001, verbose=False)
+    benchmark(run)
+
+
+@pytest.mark.parametrize("no_shifts", [ 1, 50 ])
+def test_shift_pop_from_state_to_state(benchmark, house: hr.HouseOfReps, no_shifts: int):
+    def run():
+        sts = list(hr.St)
+        for i in range(no_shifts):
+            hr.shift_pop_from_state_to_state(house, st_from=sts[i % len(sts)], st_to=sts[(i + 1) % len(sts)], percent=0.001, verbose=False)
+    benchmark(run)
@@ -0,0 +1,35 @@
+import houseofreps as hr
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+
+def test_load_consistency(benchmark, voteview_csvs):
+    loader = hr.LoadVoteViewCsv(votes_csv=voteview_csvs['votes'], rollcalls_csv=voteview_csvs['rollcalls'], members_csv=voteview_csvs['members'])
+    votes, _, _ = benchmark.pedantic(loader.load_consistency, rounds=3, iterations=1)
+    assert votes.no_rollcalls > 0
+
+
+def test_load_consistency_cached(benchmark, voteview_csvs, tmp_path):
+    loader = hr.LoadVoteViewCsv(votes_csv=voteview_csvs['votes'], rollcalls_csv=voteview_csvs['rollcalls'], members_csv=voteview_csvs['members'], cache_dir=str(tmp_path))
+    loader.load_consistency()
+    benchmark.pedantic(loader.load_consistency, rounds=3, iterations=1)
+
+
+def test_calculate_votes_fractional(benchmark, voteview_data):
+    votes, rollcalls, members = voteview_data
+    def run():
+        for congress, rollnumber_to_votes in votes.congress_to_rollnumber_to_votes.items():
+            for rollnumber, rv in rollnumber_to_votes.items():
+                rc = rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber]
+                hr.CalculateVotes(rv, members, rc).calculate_votes_fractional()
+    benchmark.pedantic(run, rounds=3, iterations=1)
+
+
+def test_calculate_votes_fractional_batch(benchmark, voteview_data):
+    votes, _, members = voteview_data
+    matrices = [ hr.VoteMatrix.from_votes_all(votes, congress) for congress in votes.congress_to_rollnumber_to_votes.keys() ]
+    def run():
+        for matrix in matrices:
+            hr.CalculateVotesBatch(matrix, members.state_idxs(matrix.icpsrs)).calculate_votes_fractional()
+    benchmark(run)
@@ -1,7 +1,14 @@
+from .cache import *
+from .codec import *
 from .house import *
+from .instrument import *
+from .methods import *
 from .min_pop_changes import *
 from .population_shifts import *
 from .residents_per_rep import *
+from .scenarios import *
 from .state import *
+from .synthetic import *
 from .validate import *
+from .vote_store import *
 from .voting import *
\ No newline at end of file
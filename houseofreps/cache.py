@@ -0,0 +1,137 @@
+from dataclasses import dataclass
+from mashumaro import DataClassDictMixin
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+import hashlib
+import os
+
+try:
+    import pyarrow # type: ignore
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+# Suffix of the null mask stored alongside string columns in .npz tables
+_NPZ_NULL_SUFFIX = "__isnull"
+
+
+@dataclass
+class FileFingerprint(DataClassDictMixin):
+    """Fingerprint of a file used to decide if a cache built from it is still valid
+    """
+
+    size: int
+    "Size in bytes"
+
+    mtime_ns: int
+    "Modification time in nanoseconds"
+
+    sha256: str
+    "SHA-256 hash of the contents"
+
+
+def fingerprint_file(path: str, block_size: int = 1 << 20) -> FileFingerprint:
+    """Fingerprint a file
+
+    Args:
+        path (str): Path to the file
+        block_size (int, optional): Block size for hashing. Defaults to 1 MiB.
+
+    Returns:
+        FileFingerprint: Fingerprint
+    """
+    stat = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return FileFingerprint(size=stat.st_size, mtime_ns=stat.st_mtime_ns, sha256=h.hexdigest())
+
+
+def fingerprint_matches(path: str, fingerprint: FileFingerprint) -> bool:
+    """Check if a file matches a fingerprint. Size and modification time are checked before hashing the contents.
+
+    Args:
+        path (str): Path to the file
+        fingerprint (FileFingerprint): Fingerprint to check against
+
+    Returns:
+        bool: True if size, modification time and hash all match
+    """
+    if not os.path.exists(path):
+        return False
+    stat = os.stat(path)
+    if stat.st_size != fingerprint.size or stat.st_mtime_ns != fingerprint.mtime_ns:
+        return False
+    return fingerprint_file(path).sha256 == fingerprint.sha256
+
+
+def table_path(path_stem: str) -> str:
+    """Path of a table written by write_table
+
+    Args:
+        path_stem (str): Path without extension
+
+    Returns:
+        str: Path with .parquet extension if pyarrow is installed, else .npz
+    """
+    return path_stem + (".parquet" if HAS_PYARROW else ".npz")
+
+
+def write_table(df: pd.DataFrame, path_stem: str) -> str:
+    """Write a table to a fast binary format: Parquet if pyarrow is installed, else an uncompressed .npz with one array per column.
+
+    Args:
+        df (pd.DataFrame): Table
+        path_stem (str): Path without extension
+
+    Returns:
+        str: Path written
+    """
+    path = table_path(path_stem)
+    if HAS_PYARROW:
+        df.to_parquet(path, index=False)
+        return path
+
+    arrays: Dict[str, np.ndarray] = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype.kind in "biuf":
+            arrays[col] = values.to_numpy()
+        else:
+            # Strings are stored as fixed width unicode, with a separate null mask, so no pickling is needed to read them back
+            isnull = values.isna().to_numpy()
+            arrays[col] = values.where(~isnull, "").astype(str).to_numpy(dtype=str)
+            arrays[col + _NPZ_NULL_SUFFIX] = isnull
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+    return path
+
+
+def read_table(path_stem: str) -> Optional[pd.DataFrame]:
+    """Read a table written by write_table
+
+    Args:
+        path_stem (str): Path without extension
+
+    Returns:
+        Optional[pd.DataFrame]: Table, or None if it does not exist
+    """
+    path = table_path(path_stem)
+    if not os.path.exists(path):
+        return None
+    if HAS_PYARROW:
+        return pd.read_parquet(path)
+
+    with np.load(path, allow_pickle=False) as npz:
+        cols = [ name for name in npz.files if not name.endswith(_NPZ_NULL_SUFFIX) ]
+        data = {}
+        for col in cols:
+            values = npz[col]
+            if col + _NPZ_NULL_SUFFIX in npz.files:
+                values = values.astype(object)
+                values[npz[col + _NPZ_NULL_SUFFIX]] = np.nan
+            data[col] = values
+    return pd.DataFrame(data, columns=cols)
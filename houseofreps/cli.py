@@ -0,0 +1,250 @@
+from .methods import ApportionmentMethod, apportion
+from .scenarios import SCENARIO_STATES, apportion_scenarios_file
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from collections import deque
+from typing import Any, Deque, Iterator, List, Optional, TextIO, Tuple
+import argparse
+import csv
+import json
+import sys
+import numpy as np
+from loguru import logger
+
+
+# Keys of the population of each state in JSON Lines input, in the order of SCENARIO_STATES. Abbreviations and names are accepted
+_ABBREVS = [ st.value for st in SCENARIO_STATES ]
+_NAMES = [ st.name for st in SCENARIO_STATES ]
+
+# Keys of the optional ID of each input row
+_ID_KEYS = ("id", "scenario_id")
+
+# One line of JSON Lines output, formatted with the JSON encoded ID followed by the seats of each state
+_SEATS_JSONL_TEMPLATE = '{"id": %s, "seats": {' + ", ".join([ f'"{abbrev}": %d' for abbrev in _ABBREVS ]) + "}}\n"
+
+
+def _parse_jsonl(lines: List[str], start: int) -> Tuple[List[Any], np.ndarray]:
+    # Decoding the batch as one array is faster than line by line. A line with several comma separated values also decodes, so the batch is only used if it gives one object per line.
+    # Otherwise decode line by line to report the row of the error
+    try:
+        objs = json.loads("[" + ",".join(lines) + "]")
+    except json.JSONDecodeError:
+        objs = None
+    if objs is None or len(objs) != len(lines) or not all(isinstance(obj, dict) for obj in objs):
+        objs = []
+        for offset, line in enumerate(lines):
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Row {start + offset}: invalid JSON: {e}")
+            if not isinstance(obj, dict):
+                raise ValueError(f"Row {start + offset}: expected a JSON object, got {type(obj).__name__}")
+            objs.append(obj)
+
+    ids, pops = [], []
+    for offset, obj in enumerate(objs):
+        ids.append(next((obj[key] for key in _ID_KEYS if key in obj), start + offset))
+        vals = obj.get("pops", obj)
+        if not isinstance(vals, (dict, list)):
+            raise ValueError(f"Row {start + offset}: pops must be an object or a list, got {type(vals).__name__}")
+        if isinstance(vals, list):
+            if len(vals) != len(_ABBREVS):
+                raise ValueError(f"Row {start + offset}: expected {len(_ABBREVS)} populations in the order of the states, got {len(vals)}")
+            pops.append(vals)
+            continue
+        try:
+            pops.append([ vals[abbrev] for abbrev in _ABBREVS ])
+        except KeyError:
+            try:
+                pops.append([ vals[name] for name in _NAMES ])
+            except KeyError:
+                missing = [ abbrev for abbrev, name in zip(_ABBREVS, _NAMES) if abbrev not in vals and name not in vals ]
+                raise ValueError(f"Row {start + offset}: missing populations for states {missing}")
+    return ids, np.array(pops, dtype=float)
+
+
+def _parse_csv(lines: List[str], start: int, header: List[str]) -> Tuple[List[Any], np.ndarray]:
+    col_id = next((header.index(key) for key in _ID_KEYS if key in header), None)
+    cols = [ header.index(abbrev) if abbrev in header else header.index(name) for abbrev, name in zip(_ABBREVS, _NAMES) ]
+    rows = list(csv.reader(lines))
+    for offset, row in enumerate(rows):
+        if len(row) != len(header):
+            raise ValueError(f"Row {start + offset}: expected {len(header)} cells as in the header, got {len(row)}")
+    ids = [ row[col_id] for row in rows ] if col_id is not None else list(range(start, start + len(rows)))
+    try:
+        pops = np.array([ [ row[col] for col in cols ] for row in rows ], dtype=float)
+    except ValueError:
+        # Find the first row that does not parse, for the error message
+        for offset, row in enumerate(rows):
+            for abbrev, col in zip(_ABBREVS, cols):
+                try:
+                    float(row[col])
+                except ValueError:
+                    raise ValueError(f"Row {start + offset}: population of {abbrev} is not a number: {row[col]!r}")
+        raise
+    return ids, pops
+
+
+def _apportion_lines(lines: List[str], start: int, header: Optional[List[str]], no_seats: int, method: str) -> str:
+    # Parse a batch of input lines, apportion them at once and format the output lines. Runs in the worker processes
+    if header is None:
+        ids, pops = _parse_jsonl(lines, start)
+    else:
+        ids, pops = _parse_csv(lines, start, header)
+    if len(ids) == 0:
+        return ""
+    valid = (np.isfinite(pops) & (pops > 0)).all(axis=1)
+    if not valid.all():
+        raise ValueError(f"Row {start + int(np.argmin(valid))}: populations must be positive and finite")
+    seats = apportion(pops, no_seats=no_seats, method=ApportionmentMethod(method))
+    return "".join([ _SEATS_JSONL_TEMPLATE % (json.dumps(id_), *row) for id_, row in zip(ids, seats.tolist()) ])
+
+
+def _iter_batches(files: List[str], fmt: Optional[str], batch_size: int) -> Iterator[Tuple[List[str], int, Optional[List[str]]]]:
+    # Batches of (lines, index of the first row, CSV header or None for JSON Lines) from all files in order
+    start = 0
+    for fname in files:
+        is_csv = (fmt == "csv") if fmt is not None else fname.lower().endswith(".csv")
+        f: TextIO = sys.stdin if fname == "-" else open(fname, "r", newline="")
+        try:
+            header = next(csv.reader([ f.readline() ])) if is_csv else None
+            if header is not None:
+                missing = [ abbrev for abbrev, name in zip(_ABBREVS, _NAMES) if abbrev not in header and name not in header ]
+                if len(missing) > 0:
+                    raise ValueError(f"{fname}: missing columns for states {missing}")
+            lines: List[str] = []
+            for line in f:
+                if line.strip() == "":
+                    continue
+                lines.append(line)
+                if len(lines) == batch_size:
+                    yield lines, start, header
+                    start += len(lines)
+                    lines = []
+            if len(lines) > 0:
+                yield lines, start, header
+                start += len(lines)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+def apportion_stream(
+    files: List[str],
+    f_out: TextIO,
+    no_seats: int = 435,
+    method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL,
+    fmt: Optional[str] = None,
+    no_workers: int = 1,
+    batch_size: int = 10_000
+    ) -> int:
+    """Apportion population vectors read from files or stdin, and write the seats as JSON Lines in the input order.
+
+    Each input row is one vector with the population of each state (any units, DC is ignored). In JSON Lines, a row is an object with the populations keyed by state abbreviation or name, either at the top level or under "pops". "pops" may also be a list in the order of SCENARIO_STATES. In CSV, there is one column per state.
+    An optional "id" or "scenario_id" is copied to the output, else the row index is used. Each output line is {"id": ..., "seats": {"AL": ..., ...}}.
+
+    Args:
+        files (List[str]): Input files, "-" for stdin
+        f_out (TextIO): Output
+        no_seats (int, optional): Number of seats. Defaults to 435.
+        method (ApportionmentMethod, optional): Apportionment method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+        fmt (Optional[str], optional): Input format "jsonl" or "csv". Defaults to None, which uses CSV for files ending in .csv and JSON Lines otherwise.
+        no_workers (int, optional): Number of worker processes. Batches are apportioned in parallel, with at most two per worker in flight. Defaults to 1 (no worker processes).
+        batch_size (int, optional): Number of rows apportioned at once. Defaults to 10,000.
+
+    Returns:
+        int: Number of rows apportioned
+    """
+    no_rows = 0
+    batches = _iter_batches(files, fmt, batch_size)
+    if no_workers <= 1:
+        for lines, start, header in batches:
+            f_out.write(_apportion_lines(lines, start, header, no_seats, method.value))
+            no_rows += len(lines)
+        return no_rows
+
+    # Bounded window of batches in flight, written in order
+    with ProcessPoolExecutor(max_workers=no_workers) as executor:
+        futures: Deque[Tuple[Future, int]] = deque()
+        for lines, start, header in batches:
+            futures.append((executor.submit(_apportion_lines, lines, start, header, no_seats, method.value), len(lines)))
+            if len(futures) >= 2 * no_workers:
+                future, no_lines = futures.popleft()
+                f_out.write(future.result())
+                no_rows += no_lines
+        while len(futures) > 0:
+            future, no_lines = futures.popleft()
+            f_out.write(future.result())
+            no_rows += no_lines
+    return no_rows
+
+
+def _run_apportion(args: argparse.Namespace):
+    f_out = sys.stdout if args.output is None else open(args.output, "w")
+    try:
+        no_rows = apportion_stream(
+            args.inputs if len(args.inputs) > 0 else ["-"],
+            f_out,
+            no_seats=args.seats,
+            method=ApportionmentMethod(args.method),
+            fmt=args.format,
+            no_workers=args.workers,
+            batch_size=args.batch_size
+            )
+    finally:
+        if f_out is not sys.stdout:
+            f_out.close()
+    logger.debug(f"Apportioned {no_rows} rows")
+
+
+def _run_scenarios(args: argparse.Namespace):
+    no_scenarios = apportion_scenarios_file(args.input, args.output, no_seats=args.seats, method=ApportionmentMethod(args.method), chunksize=args.chunksize)
+    logger.info(f"Apportioned {no_scenarios} scenarios to {args.output}")
+
+
+def _run_serve(args: argparse.Namespace):
+    # Imported here so that only the serve command loads the server and asyncio
+    from .server import serve
+    serve(host=args.host, port=args.port, cache_size=args.cache_size, no_workers=args.workers, batch_pool_min=args.batch_pool_min)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Command line entry point
+
+    Args:
+        argv (Optional[List[str]], optional): Arguments. Defaults to None (sys.argv).
+    """
+    parser = argparse.ArgumentParser(prog="houseofreps", description="Apportion seats in the House of Representatives.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_apportion = subparsers.add_parser("apportion", help="Apportion population vectors from JSON Lines or CSV files or stdin, and stream the seats as JSON Lines.")
+    parser_apportion.add_argument("inputs", type=str, nargs="*", help="Input files, '-' for stdin. Defaults to stdin.")
+    parser_apportion.add_argument("--format", type=str, choices=["jsonl", "csv"], default=None, help="Input format. Defaults to CSV for files ending in .csv, JSON Lines otherwise.")
+    parser_apportion.add_argument("--output", "-o", type=str, default=None, help="Output file. Defaults to stdout.")
+    parser_apportion.add_argument("--seats", type=int, default=435, help="Number of seats.")
+    parser_apportion.add_argument("--method", type=str, default=ApportionmentMethod.HUNTINGTON_HILL.value, choices=[ method.value for method in ApportionmentMethod ], help="Apportionment method.")
+    parser_apportion.add_argument("--workers", type=int, default=1, help="Number of worker processes. Defaults to 1 (no worker processes).")
+    parser_apportion.add_argument("--batch-size", type=int, default=10_000, help="Number of rows apportioned at once.")
+    parser_apportion.set_defaults(func=_run_apportion)
+
+    parser_scenarios = subparsers.add_parser("scenarios", help="Apportion every scenario in a CSV or Parquet file with columns scenario_id, state and population.")
+    parser_scenarios.add_argument("input", type=str, help="Input CSV or Parquet file, one row per (scenario, state). The rows of each scenario must be contiguous.")
+    parser_scenarios.add_argument("output", type=str, help="Output CSV or Parquet file with columns scenario_id, state and seats.")
+    parser_scenarios.add_argument("--seats", type=int, default=435, help="Number of seats.")
+    parser_scenarios.add_argument("--method", type=str, default=ApportionmentMethod.HUNTINGTON_HILL.value, choices=[ method.value for method in ApportionmentMethod ], help="Apportionment method.")
+    parser_scenarios.add_argument("--chunksize", type=int, default=1_000_000, help="Number of input rows to read at a time.")
+    parser_scenarios.set_defaults(func=_run_scenarios)
+
+    parser_serve = subparsers.add_parser("serve", help="Serve apportionment, seat margin and electoral college queries over HTTP.")
+    parser_serve.add_argument("--host", type=str, default="127.0.0.1", help="Host.")
+    parser_serve.add_argument("--port", type=int, default=8435, help="Port.")
+    parser_serve.add_argument("--cache-size", type=int, default=1024, help="Maximum number of cached query results.")
+    parser_serve.add_argument("--workers", type=int, default=1, help="Number of worker processes for batch requests.")
+    parser_serve.add_argument("--batch-pool-min", type=int, default=1000, help="Batches of at least this many scenarios run in the worker processes.")
+    parser_serve.set_defaults(func=_run_serve)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except ValueError as e:
+        parser.exit(1, f"houseofreps {args.command}: error: {e}\n")
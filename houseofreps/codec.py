@@ -0,0 +1,332 @@
+from .voting import CASTCODE_FROM_INT, RollCall, RollCallsAll, VoteResults, VotesAll, VotesColumnar, VOTES_CSV_DTYPES
+
+from dataclasses import fields
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import numpy as np
+import struct
+
+
+# Compact binary format for votes, rollcalls and vote results. Length-prefixed and column-wise, so it is written and read block by block without parsing individual values.
+#
+#   header: MAGIC, uint16 version, uint8 length + kind of data
+#   blocks until the end of the file: uint32 number of columns, then for each column
+#       uint16 length + name, uint8 length + numpy dtype string (or "str"), uint64 length + payload
+#
+# Numeric payloads are the raw little-endian array. String payloads are a uint64 number of values n, n uint8 flags (see _STR_*), n int64 end offsets and the UTF-8 data.
+# All integers are little-endian.
+MAGIC = b"HORBIN"
+VERSION = 1
+
+# Kinds of data
+KIND_VOTES = "votes"
+KIND_ROLLCALLS = "rollcalls"
+KIND_VOTE_RESULTS = "vote_results"
+
+# Flags of string values. None and NaN (as read by pandas for missing values) are kept apart so they round-trip exactly
+_STR_DTYPE = "str"
+_STR_VALUE = 0
+_STR_NONE = 1
+_STR_NAN = 2
+
+Column = Union[np.ndarray, List[Optional[str]]]
+
+
+def _str_flag(value: Optional[str]) -> int:
+    if isinstance(value, str):
+        return _STR_VALUE
+    if value is None:
+        return _STR_NONE
+    # NaN is the only value not equal to itself
+    if isinstance(value, float) and value != value:
+        return _STR_NAN
+    raise TypeError(f"String columns can only contain str, None or NaN, got {type(value).__name__}: {value!r}")
+
+
+def _encode_column(values: Column) -> Tuple[str, bytes]:
+    if isinstance(values, np.ndarray) and values.dtype.kind in "biuf":
+        values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+        return values.dtype.str, values.tobytes()
+
+    flags = np.array([ _str_flag(value) for value in values ], dtype=np.uint8)
+    encoded = [ value.encode() if flag == _STR_VALUE else b"" for value, flag in zip(values, flags.tolist()) ]
+    ends = np.cumsum([ len(value) for value in encoded ], dtype=np.int64)
+    return _STR_DTYPE, struct.pack("<Q", len(flags)) + flags.tobytes() + ends.astype("<i8").tobytes() + b"".join(encoded)
+
+
+def _decode_column(dtype: str, payload: bytes) -> Column:
+    if dtype != _STR_DTYPE:
+        return np.frombuffer(payload, dtype=np.dtype(dtype)).copy()
+
+    (no_values,) = struct.unpack_from("<Q", payload)
+    flags = np.frombuffer(payload, dtype=np.uint8, count=no_values, offset=8).tolist()
+    ends = np.frombuffer(payload, dtype="<i8", count=no_values, offset=8 + no_values).tolist()
+    data = payload[8 + 9*no_values:]
+    values: List[Optional[str]] = []
+    start = 0
+    for flag, end in zip(flags, ends):
+        if flag == _STR_VALUE:
+            values.append(data[start:end].decode())
+        else:
+            values.append(None if flag == _STR_NONE else float("nan"))
+        start = end
+    return values
+
+
+def _read_exactly(f: BinaryIO, no_bytes: int) -> bytes:
+    data = f.read(no_bytes)
+    if len(data) != no_bytes:
+        raise ValueError(f"Truncated binary file: expected {no_bytes} bytes, got {len(data)}")
+    return data
+
+
+class BinaryWriter:
+    """Streaming writer of the binary format. Each block is a set of named columns, written as soon as it is given.
+    """
+
+
+    def __init__(self, f: BinaryIO, kind: str):
+        """Constructor. Writes the header.
+
+        Args:
+            f (BinaryIO): File opened for binary writing
+            kind (str): Kind of data, one of KIND_*
+        """
+        self.f = f
+        kind_bytes = kind.encode()
+        f.write(MAGIC + struct.pack("<HB", VERSION, len(kind_bytes)) + kind_bytes)
+
+
+    def write_block(self, columns: Dict[str, Column]):
+        """Write a block of columns
+
+        Args:
+            columns (Dict[str, Column]): Column name to numeric array or list of strings
+        """
+        parts = [ struct.pack("<I", len(columns)) ]
+        for name, values in columns.items():
+            dtype, payload = _encode_column(values)
+            name_bytes, dtype_bytes = name.encode(), dtype.encode()
+            parts += [
+                struct.pack("<H", len(name_bytes)), name_bytes,
+                struct.pack("<B", len(dtype_bytes)), dtype_bytes,
+                struct.pack("<Q", len(payload)), payload
+                ]
+        self.f.write(b"".join(parts))
+
+
+class BinaryReader:
+    """Streaming reader of the binary format. Iterating gives one dict of columns per block.
+    """
+
+
+    def __init__(self, f: BinaryIO, kind: str):
+        """Constructor. Reads and checks the header.
+
+        Args:
+            f (BinaryIO): File opened for binary reading
+            kind (str): Expected kind of data, one of KIND_*
+
+        Raises:
+            ValueError: If the file is not in the binary format, or has a different version or kind
+        """
+        self.f = f
+        if _read_exactly(f, len(MAGIC)) != MAGIC:
+            raise ValueError("Not a houseofreps binary file")
+        version, len_kind = struct.unpack("<HB", _read_exactly(f, 3))
+        if version != VERSION:
+            raise ValueError(f"Binary file version {version} != {VERSION}")
+        kind_file = _read_exactly(f, len_kind).decode()
+        if kind_file != kind:
+            raise ValueError(f"Binary file contains {kind_file}, expected {kind}")
+
+
+    def __iter__(self) -> Iterator[Dict[str, Column]]:
+        while True:
+            header = self.f.read(4)
+            if len(header) == 0:
+                return
+            if len(header) != 4:
+                raise ValueError("Truncated binary file: incomplete block header")
+            (no_columns,) = struct.unpack("<I", header)
+            columns: Dict[str, Column] = {}
+            for _ in range(no_columns):
+                (len_name,) = struct.unpack("<H", _read_exactly(self.f, 2))
+                name = _read_exactly(self.f, len_name).decode()
+                (len_dtype,) = struct.unpack("<B", _read_exactly(self.f, 1))
+                dtype = _read_exactly(self.f, len_dtype).decode()
+                (len_payload,) = struct.unpack("<Q", _read_exactly(self.f, 8))
+                columns[name] = _decode_column(dtype, _read_exactly(self.f, len_payload))
+            yield columns
+
+
+def write_votes_binary(votes: Union[VotesAll, VotesColumnar, Iterable[VotesColumnar]], f: BinaryIO):
+    """Write votes in the binary format. Votes given as chunks, e.g. from LoadVoteViewCsv.iter_votes_chunks, are streamed one block per chunk.
+    Measured on 870k synthetic votes against to_dict + JSON, columnar votes are written about 200x faster. A VotesAll is first converted with VotesColumnar.from_votes_all, which dominates the time, so it is only about 5x faster and misses the 20x target - only the columnar path meets it.
+
+    Args:
+        votes (Union[VotesAll, VotesColumnar, Iterable[VotesColumnar]]): Votes
+        f (BinaryIO): File opened for binary writing
+    """
+    if isinstance(votes, VotesAll):
+        votes = VotesColumnar.from_votes_all(votes)
+    if isinstance(votes, VotesColumnar):
+        votes = [ votes ]
+    writer = BinaryWriter(f, KIND_VOTES)
+    for votes_chunk in votes:
+        # Congress and roll number once per run of votes of the same rollcall
+        starts, ends = votes_chunk.roll_bounds()
+        writer.write_block({
+            "roll_congress": votes_chunk.congress[starts],
+            "roll_rollnumber": votes_chunk.rollnumber[starts],
+            "roll_no_votes": ends - starts,
+            "icpsr": votes_chunk.icpsr,
+            "cast_code": votes_chunk.cast_code
+            })
+
+
+def iter_votes_binary(f: BinaryIO) -> Iterator[VotesColumnar]:
+    """Stream votes written by write_votes_binary, one chunk per block
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        Iterator[VotesColumnar]: Votes in each block
+    """
+    for columns in BinaryReader(f, KIND_VOTES):
+        yield VotesColumnar(
+            congress=np.repeat(columns["roll_congress"], columns["roll_no_votes"]).astype(VOTES_CSV_DTYPES["congress"], copy=False),
+            rollnumber=np.repeat(columns["roll_rollnumber"], columns["roll_no_votes"]).astype(VOTES_CSV_DTYPES["rollnumber"], copy=False),
+            icpsr=columns["icpsr"].astype(VOTES_CSV_DTYPES["icpsr"], copy=False),
+            cast_code=columns["cast_code"].astype(VOTES_CSV_DTYPES["cast_code"], copy=False)
+            )
+
+
+def read_votes_columnar_binary(f: BinaryIO) -> VotesColumnar:
+    """Read votes written by write_votes_binary as columns, about 400x faster than JSON + from_dict on 870k synthetic votes
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        VotesColumnar: Votes, in the order they were written
+    """
+    return VotesColumnar.concatenate(list(iter_votes_binary(f)))
+
+
+def read_votes_binary(f: BinaryIO) -> VotesAll:
+    """Read votes written by write_votes_binary. Building the VotesAll dicts dominates the time, so on 870k synthetic votes this is only about 9x faster than JSON + from_dict and misses the 20x target, which only the columnar path meets - use read_votes_columnar_binary or iter_votes_binary where columns will do.
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        VotesAll: Votes, in the order they were written
+    """
+    votes = VotesAll()
+    for votes_chunk in iter_votes_binary(f):
+        votes_chunk.add_to_votes_all(votes)
+    return votes
+
+
+# Columns of RollCall stored as int64, the rest are strings
+_ROLLCALL_INT_COLS = [ "congress", "rollnumber", "yea_count", "nay_count" ]
+
+
+def write_rollcalls_binary(rollcalls: RollCallsAll, f: BinaryIO):
+    """Write rollcalls in the binary format, one block per congress
+
+    Args:
+        rollcalls (RollCallsAll): Rollcalls
+        f (BinaryIO): File opened for binary writing
+    """
+    writer = BinaryWriter(f, KIND_ROLLCALLS)
+    names = [ fld.name for fld in fields(RollCall) ]
+    for rollnumber_to_rollcall in rollcalls.congress_to_rollnumber_to_rollcall.values():
+        rcs = list(rollnumber_to_rollcall.values())
+        writer.write_block({
+            name: np.array([ getattr(rc, name) for rc in rcs ], dtype=np.int64) if name in _ROLLCALL_INT_COLS else [ getattr(rc, name) for rc in rcs ]
+            for name in names
+            })
+
+
+def read_rollcalls_binary(f: BinaryIO) -> RollCallsAll:
+    """Read rollcalls written by write_rollcalls_binary
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        RollCallsAll: Rollcalls
+    """
+    rca = RollCallsAll()
+    names = [ fld.name for fld in fields(RollCall) ]
+    for columns in BinaryReader(f, KIND_ROLLCALLS):
+        values = [ columns[name].tolist() if name in _ROLLCALL_INT_COLS else columns[name] for name in names ]
+        for row in zip(*values):
+            rc = RollCall(**dict(zip(names, row)))
+            rca.congress_to_rollnumber_to_rollcall.setdefault(rc.congress, {})[rc.rollnumber] = rc
+    return rca
+
+
+def write_vote_results_binary(vote_results: Iterable[VoteResults], f: BinaryIO, block_size: int = 100_000):
+    """Write vote results in the binary format, streamed in blocks
+
+    Args:
+        vote_results (Iterable[VoteResults]): Vote results
+        f (BinaryIO): File opened for binary writing
+        block_size (int, optional): Number of vote results per block. Defaults to 100,000.
+    """
+    writer = BinaryWriter(f, KIND_VOTE_RESULTS)
+
+    def _write(block: List[VoteResults]):
+        counts = [ count for vr in block for count in vr.castcode_to_count.values() ]
+        writer.write_block({
+            "congress": np.array([ vr.congress for vr in block ], dtype=np.int64),
+            "rollnumber": np.array([ vr.rollnumber for vr in block ], dtype=np.int64),
+            "no_castcodes": np.array([ len(vr.castcode_to_count) for vr in block ], dtype=np.int64),
+            "castcode": np.array([ castcode.value for vr in block for castcode in vr.castcode_to_count.keys() ], dtype=np.int8),
+            "count": np.array(counts, dtype=np.float64),
+            # Counts are ints for actual votes and floats for fractional votes
+            "count_is_int": np.array([ isinstance(count, int) for count in counts ], dtype=bool)
+            })
+
+    block: List[VoteResults] = []
+    for vr in vote_results:
+        block.append(vr)
+        if len(block) == block_size:
+            _write(block)
+            block = []
+    if len(block) > 0:
+        _write(block)
+
+
+def iter_vote_results_binary(f: BinaryIO) -> Iterator[VoteResults]:
+    """Stream vote results written by write_vote_results_binary
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        Iterator[VoteResults]: Vote results
+    """
+    for columns in BinaryReader(f, KIND_VOTE_RESULTS):
+        castcodes = [ CASTCODE_FROM_INT[castcode] for castcode in columns["castcode"].tolist() ]
+        counts = [ int(count) if is_int else count for count, is_int in zip(columns["count"].tolist(), columns["count_is_int"].tolist()) ]
+        start = 0
+        for congress, rollnumber, no_castcodes in zip(columns["congress"].tolist(), columns["rollnumber"].tolist(), columns["no_castcodes"].tolist()):
+            end = start + no_castcodes
+            yield VoteResults(congress=congress, rollnumber=rollnumber, castcode_to_count=dict(zip(castcodes[start:end], counts[start:end])))
+            start = end
+
+
+def read_vote_results_binary(f: BinaryIO) -> List[VoteResults]:
+    """Read vote results written by write_vote_results_binary
+
+    Args:
+        f (BinaryIO): File opened for binary reading
+
+    Returns:
+        List[VoteResults]: Vote results
+    """
+    return list(iter_vote_results_binary(f))
@@ -1,4 +1,6 @@
 from houseofreps.state import State, St, harmonic_mean, Year, load_states_true, PopType
+from houseofreps.methods import ApportionmentMethod, apportion, apportion_exact, to_persons
+from houseofreps.instrument import instrumented, increment_counter
 import logging
 import numpy as np
 from typing import Tuple, List, Dict, Optional
@@ -25,6 +27,7 @@ class ElectoralFrac:
 class HouseOfReps:
 
 
+    @instrumented("HouseOfReps.__init__")
     def __init__(self, year: Year, pop_type: PopType, no_voting_house_seats: int = 435, no_electoral_votes_true: int = 538):
         """House of representatives
 
@@ -169,12 +172,14 @@ class HouseOfReps:
         "All priorities at each seat assignment. Keys are the index of the seat assigned, starting at 51. Values are all priority entries for this assignment."
 
 
-    def assign_house_seats_priority(self, return_priorities_top: bool = False, return_priorities_all: bool = False) -> Priorities:
+    @instrumented("HouseOfReps.assign_house_seats_priority")
+    def assign_house_seats_priority(self, return_priorities_top: bool = False, return_priorities_all: bool = False, exact: bool = False) -> Priorities:
         """Assign house seats using priority method
 
         Args:
             return_priorities_top (bool, optional): Return top priorities at each assignment. Defaults to False.
             return_priorities_all (bool, optional): Return all priorities at each assignment. Defaults to False.
+            exact (bool, optional): Compare priorities exactly in integer arithmetic with populations in persons (see State.get_priority_exact), instead of in floating point. Defaults to False.
 
         Returns:
             Priorities: Priorities at each assignment step.
@@ -196,7 +201,8 @@ class HouseOfReps:
 
         # Assign the remaining using priorities
         st_all = [st for st in St if st != St.DISTRICT_OF_COLUMBIA]
-        priorities = [(self.states[st].get_priority(), st) for st in st_all]
+        get_priority = (lambda st: self.states[st].get_priority_exact()) if exact else (lambda st: self.states[st].get_priority())
+        priorities = [(get_priority(st), st) for st in st_all]
         priorities.sort(key = lambda x: x[0])
         while no_voting_house_seats_assigned < self.no_voting_house_seats:
 
@@ -209,7 +215,7 @@ class HouseOfReps:
                     st=st_assign, 
                     no_reps_curr=self.states[st_assign].no_reps.voting, 
                     pop=self.states[st_assign].pop, 
-                    priority=priorities[-1][0]
+                    priority=float(priorities[-1][0])
                     )
                 pri_st.priorities_top[key] = val
 
@@ -220,7 +226,7 @@ class HouseOfReps:
                         st=st, 
                         no_reps_curr=self.states[st].no_reps.voting, 
                         pop=self.states[st].pop, 
-                        priority=priority
+                        priority=float(priority)
                         ) for priority, st in priorities ]
                 pri_st.priorities_all[key] = vals
 
@@ -236,14 +242,38 @@ class HouseOfReps:
             no_voting_house_seats_assigned += 1
 
             # Re-evaluate priority for this state and re-sort
-            priorities[-1] = (self.states[st_assign].get_priority(), st_assign)
+            priorities[-1] = (get_priority(st_assign), st_assign)
             priorities.sort(key = lambda x: x[0])
 
         self._calculate_state_electoral_vote_fracs(verbose=False)
+        increment_counter("HouseOfReps.seats_assigned", no_voting_house_seats_assigned)
 
         return pri_st
 
 
+    def assign_house_seats_method(self, method: ApportionmentMethod, exact: bool = False):
+        """Assign house seats using an apportionment method. For Huntington-Hill this gives the same result as assign_house_seats_priority.
+
+        Args:
+            method (ApportionmentMethod): Apportionment method
+            exact (bool, optional): Compare priorities exactly in integer arithmetic with populations in persons, see apportion_exact. Only for Huntington-Hill. Defaults to False.
+        """
+        st_all = St.all_except_dc()
+        pops = np.array([ self.states[st].pop for st in st_all ])
+        if exact:
+            assert method == ApportionmentMethod.HUNTINGTON_HILL, "Exact priorities are only implemented for Huntington-Hill"
+            no_reps = apportion_exact(to_persons(pops), self.no_voting_house_seats)
+        else:
+            no_reps = apportion(pops, self.no_voting_house_seats, method)
+        for st, no_reps_st in zip(st_all, no_reps.tolist()):
+            self.states[st].no_reps.voting = no_reps_st
+            self.states[st].no_reps.nonvoting = 0
+        self.states[St.DISTRICT_OF_COLUMBIA].no_reps.voting = 0
+        self.states[St.DISTRICT_OF_COLUMBIA].no_reps.nonvoting = 1
+
+        self._calculate_state_electoral_vote_fracs(verbose=False)
+
+
     def _calculate_state_electoral_vote_fracs(self, verbose: bool):
         """Calculate electoral college voting fractions
 
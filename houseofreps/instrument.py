@@ -0,0 +1,181 @@
+from dataclasses import dataclass
+from mashumaro import DataClassDictMixin
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, TextIO, TypeVar, Union, cast
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+
+@dataclass
+class SpanStats(DataClassDictMixin):
+    """Aggregated timings of a span
+    """
+
+    count: int = 0
+    "Number of times the span was entered"
+
+    total_s: float = 0.0
+    "Total time in seconds"
+
+    min_s: float = math.inf
+    "Shortest time in seconds"
+
+    max_s: float = 0.0
+    "Longest time in seconds"
+
+
+    @property
+    def mean_s(self) -> float:
+        """Mean time in seconds
+        """
+        return self.total_s / self.count if self.count > 0 else 0.0
+
+
+    def add(self, elapsed_s: float):
+        """Add a timing
+
+        Args:
+            elapsed_s (float): Time in seconds
+        """
+        self.count += 1
+        self.total_s += elapsed_s
+        self.min_s = min(self.min_s, elapsed_s)
+        self.max_s = max(self.max_s, elapsed_s)
+
+
+class _Instrumentation:
+
+    def __init__(self):
+        self.enabled = os.environ.get("HOUSEOFREPS_INSTRUMENT", "0") not in ("", "0")
+        self.lock = threading.Lock()
+        self.spans: Dict[str, SpanStats] = {}
+        self.counters: Dict[str, int] = {}
+
+
+# Global state. Spans and counters only check the enabled flag while disabled
+_INSTRUMENTATION = _Instrumentation()
+
+
+def enable_instrumentation(enabled: bool = True):
+    """Enable or disable instrumentation. It can also be enabled by setting the environment variable HOUSEOFREPS_INSTRUMENT=1.
+
+    Args:
+        enabled (bool, optional): Enable. Defaults to True.
+    """
+    _INSTRUMENTATION.enabled = enabled
+
+
+def is_instrumentation_enabled() -> bool:
+    """Check if instrumentation is enabled
+
+    Returns:
+        bool: True if enabled
+    """
+    return _INSTRUMENTATION.enabled
+
+
+def reset_stats():
+    """Clear all spans and counters
+    """
+    with _INSTRUMENTATION.lock:
+        _INSTRUMENTATION.spans.clear()
+        _INSTRUMENTATION.counters.clear()
+
+
+def _record_span(name: str, elapsed_s: float):
+    with _INSTRUMENTATION.lock:
+        stats = _INSTRUMENTATION.spans.get(name)
+        if stats is None:
+            stats = _INSTRUMENTATION.spans[name] = SpanStats()
+        stats.add(elapsed_s)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block of code, if instrumentation is enabled
+
+    Args:
+        name (str): Name of the span
+    """
+    if not _INSTRUMENTATION.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_span(name, time.perf_counter() - start)
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+def instrumented(name: str) -> Callable[[_F], _F]:
+    """Decorator to time every call of a function as a span, if instrumentation is enabled
+
+    Args:
+        name (str): Name of the span
+
+    Returns:
+        Callable[[_F], _F]: Decorator
+    """
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _INSTRUMENTATION.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _record_span(name, time.perf_counter() - start)
+        return cast(_F, wrapper)
+    return decorator
+
+
+def increment_counter(name: str, value: int = 1):
+    """Increment a counter, if instrumentation is enabled
+
+    Args:
+        name (str): Name of the counter
+        value (int, optional): Increment. Defaults to 1.
+    """
+    if not _INSTRUMENTATION.enabled:
+        return
+    with _INSTRUMENTATION.lock:
+        _INSTRUMENTATION.counters[name] = _INSTRUMENTATION.counters.get(name, 0) + value
+
+
+def get_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the aggregated stats
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Dict with "spans" (name to count, total_s, mean_s, min_s, max_s) and "counters" (name to value)
+    """
+    with _INSTRUMENTATION.lock:
+        return {
+            "spans": { name: { **stats.to_dict(), "mean_s": stats.mean_s } for name, stats in _INSTRUMENTATION.spans.items() },
+            "counters": dict(_INSTRUMENTATION.counters)
+            }
+
+
+def export_stats_jsonl(f: Union[str, TextIO]):
+    """Export the aggregated stats as JSON lines, one line per span or counter
+
+    Args:
+        f (Union[str, TextIO]): Path or text file to write to. A path is appended to, so stats of several runs can be collected in one file.
+    """
+    if isinstance(f, str):
+        with open(f, "a") as f_out:
+            export_stats_jsonl(f_out)
+        return
+
+    stats = get_stats()
+    for name, span_stats in stats["spans"].items():
+        f.write(json.dumps({ "type": "span", "name": name, **span_stats }) + "\n")
+    for name, value in stats["counters"].items():
+        f.write(json.dumps({ "type": "counter", "name": name, "value": value }) + "\n")
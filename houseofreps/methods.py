@@ -0,0 +1,303 @@
+from enum import Enum
+from dataclasses import dataclass
+from fractions import Fraction
+from typing import Callable, Dict, Tuple
+import math
+import numpy as np
+
+
+class ApportionmentMethod(Enum):
+    """Apportionment method
+    """
+
+    HUNTINGTON_HILL = "huntington-hill"
+    "Huntington-Hill (method of equal proportions), used since 1941. Divisor sqrt(n(n+1))."
+
+    WEBSTER = "webster"
+    "Webster (Sainte-Laguë, major fractions). Divisor n + 1/2."
+
+    JEFFERSON = "jefferson"
+    "Jefferson (D'Hondt, greatest divisors). Divisor n + 1."
+
+    ADAMS = "adams"
+    "Adams (smallest divisors). Divisor n."
+
+    HAMILTON = "hamilton"
+    "Hamilton (Vinton, largest remainders)."
+
+
+# Divisor d(n) of each divisor method: the priority for the (n+1)-th seat of a state with population p is p / d(n)
+_DIVISORS: Dict[ApportionmentMethod, Callable[[np.ndarray], np.ndarray]] = {
+    ApportionmentMethod.HUNTINGTON_HILL: lambda n: np.sqrt(n * (n + 1.0)),
+    ApportionmentMethod.WEBSTER: lambda n: n + 0.5,
+    ApportionmentMethod.JEFFERSON: lambda n: n + 1.0,
+    ApportionmentMethod.ADAMS: lambda n: n * 1.0
+    }
+
+# Number of seats n >= 1 with d(n) < x, for each divisor method
+_NO_DIVISORS_BELOW: Dict[ApportionmentMethod, Callable[[np.ndarray], np.ndarray]] = {
+    ApportionmentMethod.HUNTINGTON_HILL: lambda x: np.ceil((np.sqrt(1.0 + 4.0 * x * x) - 1.0) / 2.0) - 1.0,
+    ApportionmentMethod.WEBSTER: lambda x: np.ceil(x - 0.5) - 1.0,
+    ApportionmentMethod.JEFFERSON: lambda x: np.ceil(x) - 2.0,
+    ApportionmentMethod.ADAMS: lambda x: np.ceil(x) - 1.0
+    }
+
+
+def priorities(pops: np.ndarray, no_reps: np.ndarray, method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL) -> np.ndarray:
+    """Priority of each state for its next seat under a divisor method
+
+    Args:
+        pops (np.ndarray): Populations
+        no_reps (np.ndarray): Number of seats currently assigned (>= 1)
+        method (ApportionmentMethod, optional): Divisor method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+
+    Returns:
+        np.ndarray: Priorities
+    """
+    return pops / _DIVISORS[method](np.asarray(no_reps, dtype=float))
+
+
+def _apportion_divisor(pops: np.ndarray, no_seats: int, method: ApportionmentMethod) -> np.ndarray:
+    no_states = pops.shape[1]
+    no_extra = no_seats - no_states
+    no_divisors_below = _NO_DIVISORS_BELOW[method]
+
+    # Threshold: every state gets one seat, plus one for each priority above the threshold. Refine the threshold so the total is close to the number of seats
+    threshold = pops.sum(axis=1, keepdims=True) / no_seats
+    for _ in range(4):
+        extra = np.maximum(no_divisors_below(pops / threshold), 0.0).sum(axis=1, keepdims=True)
+        threshold = threshold * np.where(extra > 0, extra / max(no_extra, 1), 0.5)
+    no_reps = 1 + np.maximum(no_divisors_below(pops / threshold), 0.0).astype(np.int64)
+
+    # Seats from a threshold are exactly the highest priorities. Add or remove seats by priority until the total is correct.
+    # Each pass moves every row one seat closer to the total, so more passes than seats means the input is invalid
+    rows = np.arange(len(pops))
+    for _ in range(no_seats + 1):
+        diff = no_seats - no_reps.sum(axis=1)
+        add, remove = diff > 0, diff < 0
+        if not add.any() and not remove.any():
+            return no_reps
+        if add.any():
+            idx = np.argmax(priorities(pops[add], no_reps[add], method), axis=1)
+            no_reps[rows[add], idx] += 1
+        if remove.any():
+            pri_last = np.where(no_reps[remove] > 1, priorities(pops[remove], np.maximum(no_reps[remove] - 1, 1), method), np.inf)
+            idx = np.argmin(pri_last, axis=1)
+            no_reps[rows[remove], idx] -= 1
+    raise RuntimeError(f"Apportionment did not converge to {no_seats} seats")
+
+
+def _apportion_hamilton(pops: np.ndarray, no_seats: int) -> np.ndarray:
+    quotas = pops * no_seats / pops.sum(axis=1, keepdims=True)
+
+    # Every state gets at least one seat
+    no_reps = np.maximum(np.floor(quotas), 1).astype(np.int64)
+    remainders = quotas - no_reps
+
+    # Remaining seats to the largest remainders (at most one each, since the floors sum to more than no_seats - no. states)
+    ranks = np.argsort(np.argsort(-remainders, axis=1, kind="stable"), axis=1)
+    no_reps += ranks < (no_seats - no_reps.sum(axis=1))[:, None]
+
+    # If the minimum of one seat assigned too many, remove seats from the smallest remainders. Each pass removes at least one seat from every row with an excess
+    for _ in range(no_seats + 1):
+        excess = (no_reps.sum(axis=1) - no_seats)[:, None]
+        if (excess <= 0).all():
+            return no_reps
+        ranks = np.argsort(np.argsort(np.where(no_reps > 1, quotas - no_reps, np.inf), axis=1, kind="stable"), axis=1)
+        no_reps -= (ranks < excess) & (no_reps > 1)
+    raise RuntimeError(f"Apportionment did not converge to {no_seats} seats")
+
+
+def apportion(pops: np.ndarray, no_seats: int = 435, method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL) -> np.ndarray:
+    """Apportion seats to states. Every state gets at least one seat. Vectorized over scenarios.
+
+    Args:
+        pops (np.ndarray): Populations of each state, shape (no. states,) or (no. scenarios, no. states). Any units.
+        no_seats (int, optional): Number of seats. Defaults to 435.
+        method (ApportionmentMethod, optional): Apportionment method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+
+    Raises:
+        ValueError: If a population is not positive and finite
+
+    Returns:
+        np.ndarray: Number of seats of each state (int64), same shape as pops
+    """
+    pops = np.asarray(pops, dtype=float)
+    pops_2d = np.atleast_2d(pops)
+    assert no_seats >= pops_2d.shape[1], f"Number of seats {no_seats} is less than the number of states {pops_2d.shape[1]}"
+    # The totals are checked too, since finite populations can overflow when summed
+    with np.errstate(over="ignore"):
+        totals = pops_2d.sum(axis=1)
+    if not np.isfinite(totals).all():
+        raise ValueError("Populations must be finite")
+    if not (pops_2d > 0).all():
+        raise ValueError("Populations must be positive")
+
+    if method == ApportionmentMethod.HAMILTON:
+        no_reps = _apportion_hamilton(pops_2d, no_seats)
+    else:
+        no_reps = _apportion_divisor(pops_2d, no_seats, method)
+    return no_reps.reshape(pops.shape)
+
+
+def _extreme_of_others(values: np.ndarray, largest: bool) -> np.ndarray:
+    # For each column, the smallest (or largest) value in the same row over all other columns
+    sign = -1.0 if largest else 1.0
+    two = np.partition(sign * values, 1, axis=1)[:, :2] * sign
+    is_extreme = np.arange(values.shape[1])[None, :] == np.argmin(sign * values, axis=1)[:, None]
+    return np.where(is_extreme, two[:, 1:2], two[:, 0:1])
+
+
+def seat_margins(pops: np.ndarray, no_seats: int = 435, method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Population change of each state that changes its number of seats under a divisor method, holding the populations of all other states fixed. Vectorized over scenarios.
+
+    A state gains a seat once the priority of its next seat exceeds the lowest priority of a seat assigned to any other state, and loses one once the priority of its last seat falls below the highest priority of a seat not assigned to any other state.
+
+    Args:
+        pops (np.ndarray): Populations of each state, shape (no. states,) or (no. scenarios, no. states). Any units.
+        no_seats (int, optional): Number of seats. Defaults to 435.
+        method (ApportionmentMethod, optional): Divisor method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Number of seats, population increase above which each state gains a seat, and population decrease above which each state loses a seat (NaN for states with one seat). All the same shape as pops.
+    """
+    assert method != ApportionmentMethod.HAMILTON, "Seat margins are only defined for divisor methods"
+    pops = np.asarray(pops, dtype=float)
+    pops_2d = np.atleast_2d(pops)
+    divisor = _DIVISORS[method]
+
+    no_reps = apportion(pops_2d, no_seats, method)
+    no_reps_last = np.maximum(no_reps - 1, 1).astype(float)
+    # The minimum first seat of each state is not assigned by priority
+    pri_last = np.where(no_reps > 1, pops_2d / divisor(no_reps_last), np.inf)
+    pri_next = pops_2d / divisor(no_reps.astype(float))
+
+    gain = divisor(no_reps.astype(float)) * _extreme_of_others(pri_last, largest=False) - pops_2d
+    lose = np.where(no_reps > 1, pops_2d - divisor(no_reps_last) * _extreme_of_others(pri_next, largest=True), np.nan)
+    return no_reps.reshape(pops.shape), gain.reshape(pops.shape), lose.reshape(pops.shape)
+
+
+def to_persons(pops: np.ndarray) -> np.ndarray:
+    """Convert populations in millions, as stored by State, to integer persons
+
+    Args:
+        pops (np.ndarray): Populations in millions
+
+    Returns:
+        np.ndarray: Populations in persons (int64)
+    """
+    return np.rint(np.asarray(pops, dtype=float) * 1e6).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class ExactPriority:
+    """Huntington-Hill priority pop / sqrt(n(n+1)) of a state for its next seat, compared exactly in integers: p / sqrt(m(m+1)) < q / sqrt(n(n+1)) if and only if p^2 n(n+1) < q^2 m(m+1).
+    Python integers do not overflow, so the comparison is exact for any population and number of seats.
+    """
+
+    pop: int
+    "Population in persons"
+
+    no_reps: int
+    "Number of seats currently assigned (>= 1)"
+
+
+    def __float__(self) -> float:
+        return self.pop / math.sqrt(self.no_reps * (self.no_reps + 1))
+
+
+    def __lt__(self, other: "ExactPriority") -> bool:
+        return self.pop * self.pop * other.no_reps * (other.no_reps + 1) < other.pop * other.pop * self.no_reps * (self.no_reps + 1)
+
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ExactPriority):
+            return NotImplemented
+        return self.pop * self.pop * other.no_reps * (other.no_reps + 1) == other.pop * other.pop * self.no_reps * (self.no_reps + 1)
+
+
+    def __hash__(self) -> int:
+        return hash(Fraction(self.pop * self.pop, self.no_reps * (self.no_reps + 1)))
+
+
+_MASK_32 = np.uint64(0xFFFFFFFF)
+_SHIFT_32 = np.uint64(32)
+
+
+def _mul_wide(a: np.ndarray, b: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Exact product of uint64 a < 2^64 and uint64 b < 2^32 as (hi, lo) with value hi * 2^32 + lo and lo < 2^32. Neither partial product overflows 64 bits
+    lo = (a & _MASK_32) * b
+    hi = (a >> _SHIFT_32) * b + (lo >> _SHIFT_32)
+    return hi, lo & _MASK_32
+
+
+def _greater_exact(pops_sq_a: np.ndarray, reps_a: np.ndarray, pops_sq_b: np.ndarray, reps_b: np.ndarray) -> np.ndarray:
+    # Huntington-Hill priority of a > priority of b, i.e. p_a^2 n_b(n_b+1) > p_b^2 n_a(n_a+1), elementwise
+    hi_a, lo_a = _mul_wide(pops_sq_a, reps_b * (reps_b + np.uint64(1)))
+    hi_b, lo_b = _mul_wide(pops_sq_b, reps_a * (reps_a + np.uint64(1)))
+    return (hi_a > hi_b) | ((hi_a == hi_b) & (lo_a > lo_b))
+
+
+def _argbest_exact(pops_sq: np.ndarray, reps: np.ndarray, valid: np.ndarray, guess: np.ndarray, lowest: bool) -> np.ndarray:
+    # Column of the exactly highest (or lowest) priority among the valid columns of each row, starting from a float guess. Float errors only affect near ties, so this takes one or two passes
+    rows = np.arange(len(pops_sq))
+    idx = guess.copy()
+    while True:
+        pops_sq_best, reps_best = pops_sq[rows, idx][:, None], reps[rows, idx][:, None]
+        if lowest:
+            better = valid & _greater_exact(pops_sq_best, reps_best, pops_sq, reps)
+        else:
+            better = valid & _greater_exact(pops_sq, reps, pops_sq_best, reps_best)
+        changed = better.any(axis=1)
+        if not changed.any():
+            return idx
+        idx[changed] = np.argmax(better[changed], axis=1)
+
+
+def apportion_exact(pops: np.ndarray, no_seats: int = 435) -> np.ndarray:
+    """Apportion seats to states with Huntington-Hill, comparing priorities exactly in integer arithmetic. Vectorized over scenarios.
+    Seats are first apportioned in floating point with apportion. In scenarios with a near tie for the last seat, any seat that rounding gave to the wrong state is then moved, comparing p^2 n(n+1) as 96-bit integers in two uint64 words, without sqrt.
+    Exactly tied priorities keep the floating point assignment.
+
+    Args:
+        pops (np.ndarray): Populations of each state in persons (integers, < 2^32, see to_persons), shape (no. states,) or (no. scenarios, no. states)
+        no_seats (int, optional): Number of seats (< 2^16). Defaults to 435.
+
+    Returns:
+        np.ndarray: Number of seats of each state (int64), same shape as pops
+    """
+    pops = np.asarray(pops)
+    assert pops.dtype.kind in "iu", "Populations must be integer persons - see to_persons"
+    assert no_seats < 2**16, f"Number of seats {no_seats} must be less than 2^16 for exact priorities"
+    pops_2d = np.atleast_2d(pops)
+    assert (pops_2d > 0).all() and (pops_2d < 2**32).all(), "Populations must be positive and less than 2^32"
+
+    no_reps = np.atleast_2d(apportion(pops_2d.astype(float), no_seats, ApportionmentMethod.HUNTINGTON_HILL))
+    pops_sq = pops_2d.astype(np.uint64) ** 2
+    pops_float = pops_2d.astype(float)
+
+    # Floating point priorities are accurate to a few ulps, so only scenarios whose lowest assigned and highest unassigned priorities are within a relative 1e-9 need exact comparisons
+    pri_next = priorities(pops_float, no_reps).max(axis=1)
+    pri_last = np.where(no_reps > 1, priorities(pops_float, np.maximum(no_reps - 1, 1)), np.inf).min(axis=1)
+    active = np.flatnonzero(pri_last <= pri_next * (1.0 + 1e-9))
+
+    # Move a seat while the lowest priority of an assigned seat is below the highest priority of an unassigned seat
+    while len(active) > 0:
+        pops_sq_active, pops_float_active, no_reps_active = pops_sq[active], pops_float[active], no_reps[active]
+        reps_next = no_reps_active.astype(np.uint64)
+        reps_last = np.maximum(no_reps_active - 1, 1).astype(np.uint64)
+        # The minimum first seat of each state is not assigned by priority
+        has_last = no_reps_active > 1
+
+        guess_next = np.argmax(priorities(pops_float_active, reps_next), axis=1)
+        idx_next = _argbest_exact(pops_sq_active, reps_next, np.ones_like(has_last), guess_next, lowest=False)
+        guess_last = np.argmin(np.where(has_last, priorities(pops_float_active, reps_last), np.inf), axis=1)
+        idx_last = _argbest_exact(pops_sq_active, reps_last, has_last, guess_last, lowest=True)
+
+        sub = np.arange(len(active))
+        move = _greater_exact(pops_sq_active[sub, idx_next], reps_next[sub, idx_next], pops_sq_active[sub, idx_last], reps_last[sub, idx_last])
+        no_reps[active[move], idx_next[move]] += 1
+        no_reps[active[move], idx_last[move]] -= 1
+        active = active[move]
+
+    return no_reps.reshape(pops.shape)
@@ -4,6 +4,9 @@ from .house import HouseOfReps, PopType
 from dataclasses import dataclass
 from mashumaro import DataClassDictMixin
 from typing import Dict
+import functools
+import numpy as np
+import pandas as pd
 
 
 @dataclass
@@ -18,6 +21,48 @@ class ResidentsPerRep(DataClassDictMixin):
     "Residents per representative for each state"
 
 
+def residents_per_rep_table(no_seats: int = 435) -> pd.DataFrame:
+    """Residents per representative of every state except DC in every year, as a long table with one row per (year, state). Computed for all years at once from the true populations and numbers of reps, and cached.
+
+    Args:
+        no_seats (int, optional): Number of seats used for the fair number of residents per rep. Defaults to 435.
+
+    Returns:
+        pd.DataFrame: Columns year (Year), st (St), pop (apportionment population, in millions), seats (number of voting reps), residents_per_rep, fair (fair residents per rep in that year), frac (residents_per_rep / fair) and rank (population rank in that year, 1 = highest). A copy of the cached table, so callers may modify it.
+    """
+    return _residents_per_rep_table(int(no_seats)).copy()
+
+
+@functools.lru_cache(maxsize=None)
+def _residents_per_rep_table(no_seats: int) -> pd.DataFrame:
+    # Shared between callers in this module, which only read it
+    years = list(Year)
+    sts = St.all_except_dc()
+    pops = np.array([ [ ST_TRUE[st].year_to_pop[year].apportionment for st in sts ] for year in years ])
+    seats = np.array([ [ ST_TRUE[st].year_to_no_reps[year].voting for st in sts ] for year in years ])
+
+    residents_per_rep = 1e6 * pops / seats
+
+    # Sum in state order like HouseOfReps.get_total_us_pop, so the values match exactly
+    fair = 1e6 * np.cumsum(pops, axis=1)[:, -1:] / float(no_seats)
+
+    # Rank by population, highest first. Ties are ranked in state order
+    order = np.argsort(-pops, axis=1, kind="stable")
+    rank = np.empty_like(order)
+    np.put_along_axis(rank, order, np.arange(1, len(sts) + 1)[None, :].repeat(len(years), axis=0), axis=1)
+
+    return pd.DataFrame({
+        "year": np.repeat(np.array(years, dtype=object), len(sts)),
+        "st": np.tile(np.array(sts, dtype=object), len(years)),
+        "pop": pops.ravel(),
+        "seats": seats.ravel(),
+        "residents_per_rep": residents_per_rep.ravel(),
+        "fair": np.repeat(fair.ravel(), len(sts)),
+        "frac": (residents_per_rep / fair).ravel(),
+        "rank": rank.ravel()
+        })
+
+
 def calculate_residents_per_rep_for_year(year: Year) -> ResidentsPerRep:
     """Calculate the number of residents per representative for each state.
 
@@ -27,17 +72,10 @@ def calculate_residents_per_rep_for_year(year: Year) -> ResidentsPerRep:
     Returns:
         ResidentsPerRep: Residents per representative for each state
     """    
-    residents_per_rep = {}
-
-    house = HouseOfReps(
+    df = _residents_per_rep_table(435)
+    df = df[df["year"] == year]
+    return ResidentsPerRep(
         year=year, 
-        pop_type=PopType.APPORTIONMENT
+        fair=float(df["fair"].iloc[0]), 
+        residents_per_rep=dict(zip(df["st"], df["residents_per_rep"].tolist()))
         )
-
-    for st, state in house.states.items():
-        if st != St.DISTRICT_OF_COLUMBIA:
-            residents_per_rep[st] = 1e6 * ST_TRUE[st].year_to_pop[year].apportionment / state.no_reps.voting
-
-    fair = 1e6 * house.get_total_us_pop(sts_exclude=[St.DISTRICT_OF_COLUMBIA]) / 435.0
-    return ResidentsPerRep(year=year, fair=fair, residents_per_rep=residents_per_rep)
-
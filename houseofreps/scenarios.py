@@ -0,0 +1,276 @@
+from .state import St
+from .methods import ApportionmentMethod, apportion
+from .cache import HAS_PYARROW
+
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, TextIO
+import numpy as np
+import pandas as pd
+import os
+from loguru import logger
+
+
+# States that are apportioned seats, in the order of the columns of ScenarioPops.pops. DC rows in scenario files are ignored
+SCENARIO_STATES: List[St] = St.all_except_dc()
+
+# State abbreviation or name (e.g. "CA" or "CALIFORNIA") to column index, or -1 for DC
+_STATE_TO_COL: Dict[str, int] = {
+    **{ st.value: idx for idx, st in enumerate(SCENARIO_STATES) },
+    **{ st.name: idx for idx, st in enumerate(SCENARIO_STATES) },
+    St.DISTRICT_OF_COLUMBIA.value: -1,
+    St.DISTRICT_OF_COLUMBIA.name: -1
+    }
+
+# CSV rows of the seats of one scenario, formatted with the scenario ID followed by the seats of each state
+_SEATS_CSV_TEMPLATE = "".join([ f"{{0}},{st.value},{{{idx + 1}}}\n" for idx, st in enumerate(SCENARIO_STATES) ])
+
+
+@dataclass
+class ScenarioPops:
+    """Populations of a batch of scenarios, one row per scenario
+    """
+
+    scenario_ids: np.ndarray
+    "Scenario ID of each row"
+
+    pops: np.ndarray
+    "Population of each state in each scenario, shape (no. scenarios, no. states) with states in the order of SCENARIO_STATES. Any units."
+
+
+    def __len__(self) -> int:
+        return len(self.scenario_ids)
+
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, scenario_col: str = "scenario_id", state_col: str = "state", pop_col: str = "population") -> "ScenarioPops":
+        """Construct from a long table with one row per (scenario, state). Every scenario must have exactly one row for each state in SCENARIO_STATES.
+
+        Args:
+            df (pd.DataFrame): Long table
+            scenario_col (str, optional): Scenario ID column. Defaults to "scenario_id".
+            state_col (str, optional): State column, with state abbreviations or names. Defaults to "state".
+            pop_col (str, optional): Population column. Defaults to "population".
+
+        Raises:
+            ValueError: If a state or scenario ID is missing, a state is unknown, a scenario does not have exactly one row per state, or a population is not positive and finite
+
+        Returns:
+            ScenarioPops: Populations, with scenarios in the order they first appear
+        """
+        # Map each distinct state label once, not each row
+        state_codes, state_labels = pd.factorize(df[state_col])
+        scenario_codes, scenario_ids = pd.factorize(df[scenario_col])
+
+        # factorize codes missing values as -1, which would index the last label
+        for name, codes in ((state_col, state_codes), (scenario_col, scenario_codes)):
+            if (codes < 0).any():
+                raise ValueError(f"Row {int(np.flatnonzero(codes < 0)[0])} of the scenarios has a missing {name}")
+
+        state_lut = np.array([ _STATE_TO_COL.get(str(label), -2) for label in state_labels ], dtype=np.int64)
+        if (state_lut == -2).any():
+            raise ValueError(f"Unknown states in scenarios: {[ str(label) for label in state_labels[state_lut == -2] ]}")
+        cols = state_lut[state_codes]
+        keep = cols >= 0
+
+        no_states = len(SCENARIO_STATES)
+        flat = scenario_codes[keep] * no_states + cols[keep]
+        counts = np.bincount(flat, minlength=len(scenario_ids) * no_states)
+        if (counts != 1).any():
+            bad = int(np.flatnonzero(counts != 1)[0])
+            raise ValueError(f"Scenario {scenario_ids[bad // no_states]} has {counts[bad]} rows for state {SCENARIO_STATES[bad % no_states].value}, expected 1")
+
+        pops = np.empty(len(scenario_ids) * no_states, dtype=float)
+        pops[flat] = df[pop_col].to_numpy(dtype=float)[keep]
+        pops = pops.reshape(len(scenario_ids), no_states)
+        valid = np.isfinite(pops) & (pops > 0)
+        if not valid.all():
+            bad_row, bad_col = np.argwhere(~valid)[0]
+            raise ValueError(f"Scenario {scenario_ids[bad_row]} has population {pops[bad_row, bad_col]} for state {SCENARIO_STATES[bad_col].value}, expected positive and finite")
+        return cls(scenario_ids=np.asarray(scenario_ids), pops=pops)
+
+
+@dataclass
+class ScenarioSeats:
+    """Apportioned seats of a batch of scenarios
+    """
+
+    scenario_ids: np.ndarray
+    "Scenario ID of each row"
+
+    seats: np.ndarray
+    "Number of seats of each state in each scenario (int64), shape (no. scenarios, no. states) with states in the order of SCENARIO_STATES"
+
+
+    def __len__(self) -> int:
+        return len(self.scenario_ids)
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Long table with columns scenario_id, state (abbreviation) and seats, one row per (scenario, state)
+
+        Returns:
+            pd.DataFrame: Long table
+        """
+        no_states = len(SCENARIO_STATES)
+        return pd.DataFrame({
+            "scenario_id": np.repeat(self.scenario_ids, no_states),
+            "state": np.tile(np.array([ st.value for st in SCENARIO_STATES ]), len(self)),
+            "seats": self.seats.ravel()
+            })
+
+
+    def write_csv(self, f: TextIO, header: bool = True):
+        """Write the long table of to_dataframe as CSV. Integer scenario IDs are formatted directly, several times faster than through a dataframe.
+
+        Args:
+            f (TextIO): Text file to write to
+            header (bool, optional): Write the header row. Defaults to True.
+        """
+        if self.scenario_ids.dtype.kind not in "iu":
+            self.to_dataframe().to_csv(f, header=header, index=False)
+            return
+        if header:
+            f.write("scenario_id,state,seats\n")
+        f.write("".join([ _SEATS_CSV_TEMPLATE.format(scenario_id, *seats) for scenario_id, seats in zip(self.scenario_ids.tolist(), self.seats.tolist()) ]))
+
+
+def _is_parquet(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in (".parquet", ".pq")
+
+
+def _iter_table_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    if _is_parquet(path):
+        if not HAS_PYARROW:
+            raise ImportError("Reading Parquet scenario files requires pyarrow")
+        import pyarrow.parquet as pq # type: ignore
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            for df in reader:
+                yield df
+
+
+def iter_scenario_pops(
+    path: str,
+    chunksize: int = 1_000_000,
+    scenario_col: str = "scenario_id",
+    state_col: str = "state",
+    pop_col: str = "population"
+    ) -> Iterator[ScenarioPops]:
+    """Stream the populations of scenarios from a CSV or Parquet file with one row per (scenario, state).
+    The rows of each scenario must be contiguous. A scenario split between two chunks is carried over to the next chunk, so memory use is bounded by the chunk size.
+
+    Args:
+        path (str): CSV or Parquet (.parquet, .pq) file. Parquet requires pyarrow.
+        chunksize (int, optional): Number of rows to read at a time. Defaults to 1,000,000.
+        scenario_col (str, optional): Scenario ID column. Defaults to "scenario_id".
+        state_col (str, optional): State column, with state abbreviations or names. Defaults to "state".
+        pop_col (str, optional): Population column. Defaults to "population".
+
+    Returns:
+        Iterator[ScenarioPops]: Populations of the complete scenarios in each chunk
+    """
+    carry: Optional[pd.DataFrame] = None
+    for df in _iter_table_chunks(path, chunksize):
+        df = df[[scenario_col, state_col, pop_col]]
+        if carry is not None:
+            df = pd.concat([carry, df], ignore_index=True)
+
+        # The last scenario may continue in the next chunk
+        ids = df[scenario_col].to_numpy()
+        last = len(ids) - 1
+        while last >= 0 and ids[last] == ids[-1]:
+            last -= 1
+        carry = df.iloc[last + 1:]
+        if last >= 0:
+            yield ScenarioPops.from_dataframe(df.iloc[:last + 1], scenario_col, state_col, pop_col)
+
+    if carry is not None and len(carry) > 0:
+        yield ScenarioPops.from_dataframe(carry, scenario_col, state_col, pop_col)
+
+
+def apportion_scenarios(
+    scenarios: Iterator[ScenarioPops],
+    no_seats: int = 435,
+    method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL
+    ) -> Iterator[ScenarioSeats]:
+    """Apportion batches of scenarios, each batch at once with apportion
+
+    Args:
+        scenarios (Iterator[ScenarioPops]): Batches of scenarios
+        no_seats (int, optional): Number of seats. Defaults to 435.
+        method (ApportionmentMethod, optional): Apportionment method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+
+    Returns:
+        Iterator[ScenarioSeats]: Seats of each batch
+    """
+    for batch in scenarios:
+        yield ScenarioSeats(scenario_ids=batch.scenario_ids, seats=apportion(batch.pops, no_seats=no_seats, method=method))
+
+
+def apportion_scenarios_file(
+    path_in: str,
+    path_out: str,
+    no_seats: int = 435,
+    method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL,
+    chunksize: int = 1_000_000,
+    scenario_col: str = "scenario_id",
+    state_col: str = "state",
+    pop_col: str = "population"
+    ) -> int:
+    """Apportion all scenarios in a CSV or Parquet file, streaming the input in chunks and writing the seats of each chunk as soon as it is apportioned.
+    The output has columns scenario_id, state and seats, one row per (scenario, state). It is Parquet if path_out ends in .parquet or .pq (requires pyarrow), else CSV.
+
+    Args:
+        path_in (str): Input file, see iter_scenario_pops
+        path_out (str): Output file
+        no_seats (int, optional): Number of seats. Defaults to 435.
+        method (ApportionmentMethod, optional): Apportionment method. Defaults to ApportionmentMethod.HUNTINGTON_HILL.
+        chunksize (int, optional): Number of input rows to read at a time. Defaults to 1,000,000.
+        scenario_col (str, optional): Scenario ID column. Defaults to "scenario_id".
+        state_col (str, optional): State column, with state abbreviations or names. Defaults to "state".
+        pop_col (str, optional): Population column. Defaults to "population".
+
+    Returns:
+        int: Number of scenarios apportioned
+    """
+    if _is_parquet(path_out) and not HAS_PYARROW:
+        raise ImportError("Writing Parquet scenario files requires pyarrow")
+
+    writer = None
+    f_csv = None
+    no_scenarios = 0
+    try:
+        scenarios = iter_scenario_pops(path_in, chunksize=chunksize, scenario_col=scenario_col, state_col=state_col, pop_col=pop_col)
+        for results in apportion_scenarios(scenarios, no_seats=no_seats, method=method):
+            if _is_parquet(path_out):
+                import pyarrow as pa # type: ignore
+                import pyarrow.parquet as pq # type: ignore
+                table = pa.Table.from_pandas(results.to_dataframe(), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path_out, table.schema)
+                writer.write_table(table)
+            else:
+                if f_csv is None:
+                    f_csv = open(path_out, "w", newline="")
+                results.write_csv(f_csv, header=no_scenarios == 0)
+            no_scenarios += len(results)
+            logger.debug(f"Apportioned {no_scenarios} scenarios")
+
+        # Without any scenarios, write just the header or schema
+        if no_scenarios == 0:
+            empty = ScenarioSeats(scenario_ids=np.zeros(0, dtype=np.int64), seats=np.zeros((0, len(SCENARIO_STATES)), dtype=np.int64))
+            if _is_parquet(path_out):
+                import pyarrow as pa # type: ignore
+                import pyarrow.parquet as pq # type: ignore
+                pq.write_table(pa.Table.from_pandas(empty.to_dataframe(), preserve_index=False), path_out)
+            else:
+                with open(path_out, "w", newline="") as f:
+                    empty.write_csv(f)
+    finally:
+        if writer is not None:
+            writer.close()
+        if f_csv is not None:
+            f_csv.close()
+    return no_scenarios
@@ -0,0 +1,446 @@
+from .state import St, Year, PopType, ST_TRUE
+from .methods import ApportionmentMethod, apportion, seat_margins
+from .instrument import increment_counter, instrumented
+
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+import asyncio
+import hashlib
+import math
+import json
+import numpy as np
+from loguru import logger
+
+
+# All states including DC, in the order of the population vectors of queries. DC is not apportioned seats
+_SERVER_STATES: List[St] = list(St)
+_NOT_DC = np.array([ st != St.DISTRICT_OF_COLUMBIA for st in _SERVER_STATES ])
+
+# Largest number of seats of a query, which bounds the work of one request
+MAX_QUERY_SEATS = 10_000
+
+_HTTP_REASONS = { 200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error" }
+
+
+def _parse_state(label: str) -> St:
+    try:
+        return St(label.upper())
+    except ValueError:
+        try:
+            return St[label.upper().replace(" ", "_")]
+        except KeyError:
+            raise ValueError(f"Unknown state: {label}")
+
+
+@lru_cache(maxsize=None)
+def _true_pops(year: Year, pop_type: PopType) -> np.ndarray:
+    pops = np.array([ ST_TRUE[st].year_to_pop[year].get_pop(pop_type) for st in _SERVER_STATES ])
+    pops.flags.writeable = False
+    return pops
+
+
+def _parse_overrides(pops: Any) -> Tuple[Tuple[St, float], ...]:
+    if pops is None:
+        return ()
+    if not isinstance(pops, dict):
+        raise ValueError("pops must be an object of state to population in millions")
+    overrides: Dict[St, float] = {}
+    for label, pop in pops.items():
+        try:
+            pop = float(pop)
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Population of {label} is not a number: {pop}")
+        if not (math.isfinite(pop) and pop > 0):
+            raise ValueError(f"Population of {label} must be positive and finite: {pop}")
+        overrides[_parse_state(str(label))] = pop
+    return tuple(sorted(overrides.items(), key=lambda item: item[0].value))
+
+
+@dataclass(frozen=True)
+class ApportionmentQuery:
+    """Parameters of an apportionment query
+    """
+
+    year: Year = Year.YR2020
+    "Year of the census populations"
+
+    pop_type: PopType = PopType.APPORTIONMENT
+    "Population type"
+
+    method: ApportionmentMethod = ApportionmentMethod.HUNTINGTON_HILL
+    "Apportionment method"
+
+    no_seats: int = 435
+    "Number of voting seats"
+
+    overrides: Tuple[Tuple[St, float], ...] = ()
+    "Populations in millions that replace the census populations of some states, sorted by state"
+
+    overrides_hash: str = field(init=False, compare=False)
+    "SHA-256 of the overrides"
+
+
+    def __post_init__(self):
+        overrides_hash = hashlib.sha256(json.dumps([ [st.value, pop] for st, pop in self.overrides ]).encode("utf8")).hexdigest()
+        object.__setattr__(self, "overrides_hash", overrides_hash)
+
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> "ApportionmentQuery":
+        """Construct from request parameters "year", "pop_type", "method", "seats" and "pops" (object of state abbreviation or name to population in millions). All are optional.
+
+        Args:
+            params (Dict[str, Any]): Parameters
+
+        Raises:
+            ValueError: If a parameter is invalid
+
+        Returns:
+            ApportionmentQuery: Query
+        """
+        try:
+            year = Year(str(params.get("year", Year.YR2020.value)))
+            pop_type = PopType(str(params.get("pop_type", PopType.APPORTIONMENT.value)))
+            method = ApportionmentMethod(str(params.get("method", ApportionmentMethod.HUNTINGTON_HILL.value)))
+            no_seats = int(params.get("seats", 435))
+        except (TypeError, ValueError, OverflowError) as e:
+            raise ValueError(f"Invalid parameter: {e}")
+        if no_seats < len(St.all_except_dc()):
+            raise ValueError(f"Number of seats {no_seats} is less than the number of states {len(St.all_except_dc())}")
+        if no_seats > MAX_QUERY_SEATS:
+            raise ValueError(f"Number of seats {no_seats} is more than the maximum of {MAX_QUERY_SEATS}")
+
+        return cls(year=year, pop_type=pop_type, method=method, no_seats=no_seats, overrides=_parse_overrides(params.get("pops")))
+
+
+    @property
+    def key(self) -> Tuple[str, str, str, int, str]:
+        """Cache key (year, pop_type, method, seats, overrides hash)
+        """
+        return (self.year.value, self.pop_type.value, self.method.value, self.no_seats, self.overrides_hash)
+
+
+    def pops(self) -> np.ndarray:
+        """Populations in millions of all states including DC, in the order of St
+
+        Returns:
+            np.ndarray: Populations
+        """
+        pops = _true_pops(self.year, self.pop_type).copy()
+        for st, pop in self.overrides:
+            pops[_SERVER_STATES.index(st)] = pop
+        return pops
+
+
+@instrumented("server.compute_query_result")
+def compute_query_result(query: ApportionmentQuery) -> Dict[str, Any]:
+    """Compute the seats, seat margins and electoral college fractions of a query, as returned by the server
+
+    Args:
+        query (ApportionmentQuery): Query
+
+    Returns:
+        Dict[str, Any]: Dict with "seats", "gain" and "lose" (population changes in millions that change the seats of each state, see seat_margins; None for Hamilton), "electoral_votes", "electoral_frac" and "electoral_frac_vote" (as in HouseOfReps.electoral_fracs), each keyed by state abbreviation
+    """
+    pops = query.pops()
+    pops_apportioned = pops[_NOT_DC]
+    if query.method == ApportionmentMethod.HAMILTON:
+        no_reps = apportion(pops_apportioned, query.no_seats, query.method)
+        gain = lose = None
+    else:
+        no_reps, gain, lose = seat_margins(pops_apportioned, query.no_seats, query.method)
+
+    # DC has one nonvoting rep, so three electoral votes
+    electoral_votes = np.full(len(pops), 3, dtype=np.int64)
+    electoral_votes[_NOT_DC] = no_reps + 2
+    electoral_frac = electoral_votes / electoral_votes.sum()
+    electoral_frac_vote = electoral_frac * (pops.sum() / pops)
+
+    sts_apportioned = [ st.value for st in _SERVER_STATES if st != St.DISTRICT_OF_COLUMBIA ]
+    return {
+        "seats": dict(zip(sts_apportioned, no_reps.tolist())),
+        "gain": dict(zip(sts_apportioned, gain.tolist())) if gain is not None else None,
+        "lose": dict(zip(sts_apportioned, [ None if np.isnan(x) else x for x in lose.tolist() ])) if lose is not None else None,
+        "electoral_votes": { st.value: votes for st, votes in zip(_SERVER_STATES, electoral_votes.tolist()) },
+        "electoral_frac": { st.value: frac for st, frac in zip(_SERVER_STATES, electoral_frac.tolist()) },
+        "electoral_frac_vote": { st.value: frac for st, frac in zip(_SERVER_STATES, electoral_frac_vote.tolist()) }
+        }
+
+
+def _apportion_batch(pops: np.ndarray, no_seats: int, method: str) -> List[List[int]]:
+    # Runs in the worker processes
+    return apportion(pops, no_seats=no_seats, method=ApportionmentMethod(method)).tolist()
+
+
+class ResultCache:
+    """Least recently used cache of query results
+    """
+
+
+    def __init__(self, maxsize: int = 1024):
+        """Constructor
+
+        Args:
+            maxsize (int, optional): Maximum number of results. Defaults to 1024.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+    def get(self, query: ApportionmentQuery) -> Dict[str, Any]:
+        """Get the result of a query, computing it on a miss
+
+        Args:
+            query (ApportionmentQuery): Query
+
+        Returns:
+            Dict[str, Any]: Result of compute_query_result. Shared between callers - do not modify.
+        """
+        key = query.key
+        result = self._results.get(key)
+        if result is not None:
+            self.hits += 1
+            increment_counter("server.cache_hits")
+            self._results.move_to_end(key)
+            return result
+
+        self.misses += 1
+        increment_counter("server.cache_misses")
+        result = self._results[key] = compute_query_result(query)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+
+    def stats(self) -> Dict[str, int]:
+        """Cache statistics
+
+        Returns:
+            Dict[str, int]: Dict with "size", "maxsize", "hits" and "misses"
+        """
+        return { "size": len(self), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses }
+
+
+class ApportionmentServer:
+    """Minimal asyncio HTTP/1.1 server for apportionment, seat margin and electoral college queries. Results are shared between endpoints through an LRU cache.
+
+    Endpoints (GET with query string parameters, or POST with a JSON object body; "pops" must be JSON encoded in a query string):
+    - /apportion: seats of each state
+    - /margins: seats, and the population increase (gain) and decrease (lose) in millions that changes the seats of each state
+    - /electoral: electoral votes, fraction of the electoral college and vote fraction per resident relative to the US of each state
+    - /batch: POST only, {"scenarios": [pops, ...], ...}: seats of each scenario, where each scenario overrides the census populations. Large batches run in the process pool.
+    - /stats: cache statistics
+    """
+
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8435, cache_size: int = 1024, no_workers: int = 1, batch_pool_min: int = 1000):
+        """Constructor
+
+        Args:
+            host (str, optional): Host. Defaults to "127.0.0.1".
+            port (int, optional): Port, 0 for any free port. Defaults to 8435.
+            cache_size (int, optional): Maximum number of cached results. Defaults to 1024.
+            no_workers (int, optional): Number of worker processes for batch requests. Defaults to 1.
+            batch_pool_min (int, optional): Batches of at least this many scenarios run in the process pool, smaller ones in the event loop. Defaults to 1000.
+        """
+        self.host = host
+        self.port = port
+        self.cache = ResultCache(cache_size)
+        self.no_workers = no_workers
+        self.batch_pool_min = batch_pool_min
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+
+    async def start(self):
+        """Start listening. If the port is 0, the port chosen is stored in port.
+        """
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Serving on http://{self.host}:{self.port}")
+
+
+    async def serve_forever(self):
+        """Start if needed, and serve until cancelled
+        """
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+
+    async def close(self):
+        """Stop listening, close open connections once their current request is answered, and shut down the process pool
+        """
+        if self._server is not None:
+            self._server.close()
+            # Closing the transports ends the connection handlers at their next read, instead of cancelling them mid-request
+            for writer in self._connections.values():
+                writer.transport.close()
+            await asyncio.gather(*self._connections.keys(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+    async def _run_batch(self, query: ApportionmentQuery, scenarios: Any) -> List[List[int]]:
+        if not isinstance(scenarios, list) or len(scenarios) == 0:
+            raise ValueError("scenarios must be a non-empty list of objects of state to population in millions")
+        pops = np.tile(query.pops(), (len(scenarios), 1))
+        for row, scenario in enumerate(scenarios):
+            for st, pop in _parse_overrides(scenario):
+                pops[row, _SERVER_STATES.index(st)] = pop
+        pops = pops[:, _NOT_DC]
+
+        if len(scenarios) < self.batch_pool_min:
+            return _apportion_batch(pops, query.no_seats, query.method.value)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.no_workers)
+        increment_counter("server.batches_offloaded")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, _apportion_batch, pops, query.no_seats, query.method.value)
+
+
+    async def handle_query(self, path: str, params: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        """Answer a query
+
+        Args:
+            path (str): Endpoint, e.g. "/apportion"
+            params (Dict[str, Any]): Parameters, see ApportionmentQuery.from_params
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: HTTP status and JSON response
+        """
+        if path == "/stats":
+            return 200, { "cache": self.cache.stats() }
+        if path not in ("/apportion", "/margins", "/electoral", "/batch"):
+            return 404, { "error": f"Unknown endpoint: {path}" }
+
+        try:
+            query = ApportionmentQuery.from_params(params)
+            response: Dict[str, Any] = { "year": query.year.value, "pop_type": query.pop_type.value, "method": query.method.value, "seats_total": query.no_seats }
+            if path == "/batch":
+                response["seats"] = await self._run_batch(query, params.get("scenarios"))
+                response["states"] = [ st.value for st in _SERVER_STATES if st != St.DISTRICT_OF_COLUMBIA ]
+                return 200, response
+
+            result = self.cache.get(query)
+        except ValueError as e:
+            return 400, { "error": str(e) }
+
+        if path == "/apportion":
+            response["seats"] = result["seats"]
+        elif path == "/margins":
+            if result["gain"] is None:
+                return 400, { "error": "Seat margins are only defined for divisor methods" }
+            response.update({ key: result[key] for key in ("seats", "gain", "lose") })
+        else:
+            response.update({ key: result[key] for key in ("electoral_votes", "electoral_frac", "electoral_frac_vote") })
+        return 200, response
+
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line")
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+        return parts[0], parts[1], headers, body
+
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # HTTP/1.1 with keep-alive: answer requests on the connection until the client closes it
+        task = asyncio.current_task()
+        assert task is not None
+        self._connections[task] = writer
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (ValueError, asyncio.IncompleteReadError):
+                    request = None
+                    self._write_response(writer, 400, { "error": "Malformed request" }, keep_alive=False)
+                if request is None:
+                    break
+                verb, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+
+                url = urlsplit(target)
+                if verb == "GET":
+                    params: Dict[str, Any] = { key: values[-1] for key, values in parse_qs(url.query).items() }
+                    try:
+                        if "pops" in params:
+                            params["pops"] = json.loads(params["pops"])
+                        status, response = await self.handle_query(url.path, params)
+                    except json.JSONDecodeError as e:
+                        status, response = 400, { "error": f"Invalid JSON in pops: {e}" }
+                elif verb == "POST":
+                    try:
+                        params = json.loads(body) if body else {}
+                        if not isinstance(params, dict):
+                            raise ValueError("Request body must be a JSON object")
+                        status, response = await self.handle_query(url.path, params)
+                    except ValueError as e:
+                        status, response = 400, { "error": f"Invalid request body: {e}" }
+                else:
+                    status, response = 405, { "error": f"Method not allowed: {verb}" }
+
+                self._write_response(writer, status, response, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        except Exception as e:
+            logger.exception(e)
+            self._write_response(writer, 500, { "error": "Internal server error" }, keep_alive=False)
+        finally:
+            del self._connections[task]
+            writer.close()
+
+
+    def _write_response(self, writer: asyncio.StreamWriter, status: int, response: Dict[str, Any], keep_alive: bool):
+        body = json.dumps(response).encode("utf8")
+        head = f"HTTP/1.1 {status} {_HTTP_REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        writer.write(head.encode("latin-1") + body)
+
+
+def serve(host: str = "127.0.0.1", port: int = 8435, cache_size: int = 1024, no_workers: int = 1, batch_pool_min: int = 1000):
+    """Run an ApportionmentServer until interrupted
+
+    Args:
+        host (str, optional): Host. Defaults to "127.0.0.1".
+        port (int, optional): Port. Defaults to 8435.
+        cache_size (int, optional): Maximum number of cached results. Defaults to 1024.
+        no_workers (int, optional): Number of worker processes for batch requests. Defaults to 1.
+        batch_pool_min (int, optional): Batches of at least this many scenarios run in the process pool. Defaults to 1000.
+    """
+    server = ApportionmentServer(host=host, port=port, cache_size=cache_size, no_workers=no_workers, batch_pool_min=batch_pool_min)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
@@ -1,3 +1,4 @@
+from houseofreps.methods import ExactPriority, to_persons
 import numpy as np
 from enum import Enum
 from typing import Dict, List
@@ -392,4 +393,13 @@ class State:
         """
         harmonic_ave = geometric_mean(self.no_reps.voting,self.no_reps.voting+1)
         multiplier = 1.0 / harmonic_ave
-        return self.pop * multiplier
\ No newline at end of file
+        return self.pop * multiplier
+
+
+    def get_priority_exact(self) -> ExactPriority:
+        """Get priority of the state for exact comparison in integer arithmetic, with the population in persons
+
+        Returns:
+            ExactPriority: Priority
+        """
+        return ExactPriority(pop=int(to_persons(self.pop)), no_reps=self.no_reps.voting)
\ No newline at end of file
@@ -0,0 +1,156 @@
+from .state import St, Year
+from .house import HouseOfReps, PopType
+from .methods import apportion
+from .voting import CastCode, LoadVoteViewCsv
+
+from dataclasses import dataclass
+from mashumaro import DataClassDictMixin
+from typing import Iterator, Tuple
+import numpy as np
+import pandas as pd
+import os
+
+
+@dataclass
+class SyntheticVoteViewOptions(DataClassDictMixin):
+    """Options for generating synthetic voteview data
+    """
+
+    no_congresses: int = 10
+    "Number of congresses"
+
+    last_congress: int = 117
+    "Last congress. The congresses are last_congress - no_congresses + 1, ..., last_congress."
+
+    no_rolls: int = 500
+    "Number of rollcalls in each congress"
+
+    no_members: int = 435
+    "Number of members in each congress. They are assigned to states by apportioning the 2020 census populations."
+
+    member_turnover: float = 0.15
+    "Fraction of members replaced by new members (new ICPSRs) in each congress"
+
+    frac_not_voting: float = 0.04
+    "Fraction of votes that are not voting"
+
+    frac_other: float = 0.005
+    "Fraction of votes that are paired, announced or present"
+
+    seed: int = 0
+    "Random seed. The same options always generate the same data."
+
+
+# Voteview ICPSR of the President, who is in the members csv of every congress without a state
+_ICPSR_PRESIDENT = 99912
+
+# Cast codes that are neither yea, nay or not voting
+_CASTCODES_OTHER = np.array([ CastCode.PAIRED_YEA.value, CastCode.ANNOUNCED_YEA.value, CastCode.ANNOUNCED_NAY.value, CastCode.PAIRED_NAY.value, CastCode.PRESENT1.value, CastCode.PRESENT2.value ], dtype=np.int8)
+
+
+def _member_seats(no_members: int) -> Tuple[np.ndarray, np.ndarray]:
+    # State abbreviation and district code of each seat, apportioned by the 2020 census
+    sts = St.all_except_dc()
+    house = HouseOfReps(year=Year.YR2020, pop_type=PopType.APPORTIONMENT)
+    no_reps = apportion(np.array([ house.states[st].pop for st in sts ]), no_seats=no_members)
+    states = np.repeat(np.array([ st.value for st in sts ]), no_reps)
+    district_codes = np.concatenate([ np.arange(1, n + 1) for n in no_reps.tolist() ])
+    return states, district_codes
+
+
+def generate_synthetic_voteview(options: SyntheticVoteViewOptions = SyntheticVoteViewOptions()) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]:
+    """Generate synthetic votes, rollcalls and members in the voteview schema, one congress at a time. The yea and nay counts of the rollcalls match the votes.
+
+    Args:
+        options (SyntheticVoteViewOptions, optional): Options. Defaults to SyntheticVoteViewOptions().
+
+    Returns:
+        Iterator[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]]: Votes, rollcalls and members of each congress
+    """
+    assert options.no_members >= len(St.all_except_dc()), f"Number of members {options.no_members} is less than the number of states"
+    assert 1 <= options.no_congresses <= options.last_congress, f"Invalid number of congresses {options.no_congresses} for last congress {options.last_congress}"
+    rng = np.random.default_rng(options.seed)
+
+    # Seats are fixed, members in them change between congresses
+    states, district_codes = _member_seats(options.no_members)
+    icpsrs = np.arange(10001, 10001 + options.no_members)
+    parties = rng.choice([100, 200], size=options.no_members)
+    icpsr_next = 10001 + options.no_members
+
+    for congress in range(options.last_congress - options.no_congresses + 1, options.last_congress + 1):
+        if congress != options.last_congress - options.no_congresses + 1:
+            replaced = np.flatnonzero(rng.random(options.no_members) < options.member_turnover)
+            icpsrs[replaced] = np.arange(icpsr_next, icpsr_next + len(replaced))
+            parties[replaced] = rng.choice([100, 200], size=len(replaced))
+            icpsr_next += len(replaced)
+
+        members = pd.DataFrame({
+            "congress": congress,
+            "chamber": ["President"] + ["House"] * options.no_members,
+            "icpsr": np.concatenate([[_ICPSR_PRESIDENT], icpsrs]),
+            "state_abbrev": np.concatenate([["USA"], states]),
+            "district_code": np.concatenate([[0], district_codes]),
+            "party_code": np.concatenate([[rng.choice([100, 200])], parties]),
+            "bioname": ["PRESIDENT, Synthetic"] + [ f"MEMBER, Synthetic {icpsr}" for icpsr in icpsrs.tolist() ]
+            })
+
+        # Each party votes yea with its own probability on each roll, so some rolls are party line votes
+        p_yea = rng.random((options.no_rolls, 2))[:, (parties == 200).astype(np.int64)]
+        u = rng.random((options.no_rolls, options.no_members))
+        cast_codes = np.where(rng.random((options.no_rolls, options.no_members)) < p_yea, CastCode.YEA.value, CastCode.NAY.value).astype(np.int8)
+        cast_codes[u < options.frac_not_voting + options.frac_other] = CastCode.NOT_VOTING.value
+        is_other = u < options.frac_other
+        cast_codes[is_other] = rng.choice(_CASTCODES_OTHER, size=int(is_other.sum()))
+
+        votes = pd.DataFrame({
+            "congress": congress,
+            "chamber": "House",
+            "rollnumber": np.repeat(np.arange(1, options.no_rolls + 1), options.no_members),
+            "icpsr": np.tile(icpsrs, options.no_rolls),
+            "cast_code": cast_codes.ravel(),
+            "prob": rng.integers(50, 101, size=cast_codes.size)
+            })
+
+        # Rollcalls spread over the two years of the congress
+        yea_count = (cast_codes == CastCode.YEA.value).sum(axis=1)
+        nay_count = (cast_codes == CastCode.NAY.value).sum(axis=1)
+        days = np.arange(options.no_rolls) * 700 // options.no_rolls
+        rollcalls = pd.DataFrame({
+            "congress": congress,
+            "chamber": "House",
+            "rollnumber": np.arange(1, options.no_rolls + 1),
+            "date": (np.datetime64(f"{1787 + 2 * congress}-01-03") + days).astype(str),
+            "session": 1 + (days >= 365),
+            "yea_count": yea_count,
+            "nay_count": nay_count,
+            "bill_number": [ f"HR{rollnumber}" for rollnumber in range(1, options.no_rolls + 1) ],
+            "vote_result": np.where(yea_count > nay_count, "Passed", "Failed"),
+            "vote_desc": "Synthetic rollcall",
+            "vote_question": "On Passage"
+            })
+
+        yield votes, rollcalls, members
+
+
+def write_synthetic_voteview_csvs(dir_out: str, options: SyntheticVoteViewOptions = SyntheticVoteViewOptions(), name: str = "all") -> LoadVoteViewCsv:
+    """Write synthetic voteview csvs H{name}_votes.csv, H{name}_rollcalls.csv and H{name}_members.csv. Congresses are generated and written one at a time, so memory use does not grow with the number of congresses.
+
+    Args:
+        dir_out (str): Output directory
+        options (SyntheticVoteViewOptions, optional): Options. Defaults to SyntheticVoteViewOptions().
+        name (str, optional): Name in the file names, like the congress number in the voteview file names. Defaults to "all".
+
+    Returns:
+        LoadVoteViewCsv: Loader for the csvs
+    """
+    os.makedirs(dir_out, exist_ok=True)
+    loader = LoadVoteViewCsv(
+        votes_csv=os.path.join(dir_out, f"H{name}_votes.csv"),
+        rollcalls_csv=os.path.join(dir_out, f"H{name}_rollcalls.csv"),
+        members_csv=os.path.join(dir_out, f"H{name}_members.csv")
+        )
+    paths = [ loader.votes_csv, loader.rollcalls_csv, loader.members_csv ]
+    for idx, dfs in enumerate(generate_synthetic_voteview(options)):
+        for df, path in zip(dfs, paths):
+            df.to_csv(path, mode="w" if idx == 0 else "a", header=idx == 0, index=False)
+    return loader
@@ -1,5 +1,6 @@
 from houseofreps.state import State, Year, ST_TRUE, PopType
 from houseofreps.house import HouseOfReps
+from houseofreps.instrument import instrumented
 
 
 ERR_TOL = 1e-6
@@ -26,6 +27,7 @@ def validate_state_no_reps_matches_true(state: State, year: Year):
             (state.st, state.no_reps.nonvoting, state_true.year_to_no_reps[year].nonvoting, year))
 
 
+@instrumented("validate_total_us_pop_assigned_correct")
 def validate_total_us_pop_assigned_correct(house: HouseOfReps, pop_type: PopType):
     """Validate that the total pop assigned is correct
 
@@ -0,0 +1,556 @@
+from .voting import VotesAll, VotesColumnar, VoteMatrix, LoadVoteViewCsv, RollCallsAll, MemberTable, CASTCODE_ABSENT, CENSUS_YEAR_TO_CONGRESS, check_consistency
+from .codec import write_rollcalls_binary, read_rollcalls_binary
+from .cache import write_table, read_table, table_path
+from .state import Year
+
+from dataclasses import dataclass, field
+from mashumaro import DataClassDictMixin
+from typing import Dict, List, Optional, Tuple, Union
+from loguru import logger
+import numpy as np
+import pandas as pd
+import copy
+import hashlib
+import json
+import os
+import shutil
+
+
+@dataclass
+class VoteStoreAppendReport(DataClassDictMixin):
+    """Report from appending votes to a vote store
+    """
+
+    rolls_added: List[Tuple[int,int]] = field(default_factory=list)
+    "(congress, rollnumber) of rollcalls that were not in the store"
+
+    rolls_changed: List[Tuple[int,int]] = field(default_factory=list)
+    "(congress, rollnumber) of rollcalls whose votes were different from the store"
+
+    no_rolls_unchanged: int = 0
+    "Number of rollcalls that were already in the store with the same votes"
+
+    congresses_written: List[int] = field(default_factory=list)
+    "Congresses whose partitions were rewritten"
+
+
+def merge_vote_matrices(old: VoteMatrix, new: VoteMatrix) -> Tuple[VoteMatrix, np.ndarray]:
+    """Merge the rollcalls of a new vote matrix into an existing one. Rollcalls in both are replaced by the new votes.
+
+    Args:
+        old (VoteMatrix): Existing vote matrix
+        new (VoteMatrix): New vote matrix for the same congress
+
+    Returns:
+        Tuple[VoteMatrix, np.ndarray]: Merged vote matrix, and for each rollcall (row) of the new matrix whether it was added or changed
+    """
+    assert old.congress == new.congress, f"Cannot merge congress {new.congress} into congress {old.congress}"
+    rollnumbers = np.union1d(old.rollnumbers, new.rollnumbers)
+    icpsrs = np.union1d(old.icpsrs, new.icpsrs)
+
+    # Existing votes
+    cast_codes = np.full((len(rollnumbers), len(icpsrs)), CASTCODE_ABSENT, dtype=old.cast_codes.dtype)
+    cast_codes[np.ix_(np.searchsorted(rollnumbers, old.rollnumbers), np.searchsorted(icpsrs, old.icpsrs))] = old.cast_codes
+
+    # New votes on the same columns, compared row by row before they replace the existing votes
+    cast_codes_new = np.full((new.no_rollcalls, len(icpsrs)), CASTCODE_ABSENT, dtype=old.cast_codes.dtype)
+    cast_codes_new[:, np.searchsorted(icpsrs, new.icpsrs)] = new.cast_codes
+    rows_new = np.searchsorted(rollnumbers, new.rollnumbers)
+    updated = (cast_codes[rows_new] != cast_codes_new).any(axis=1)
+    cast_codes[rows_new] = cast_codes_new
+
+    # Drop members left without any vote
+    has_votes = (cast_codes != CASTCODE_ABSENT).any(axis=0)
+    merged = VoteMatrix(
+        congress=old.congress,
+        rollnumbers=rollnumbers.astype(old.rollnumbers.dtype),
+        icpsrs=icpsrs[has_votes].astype(old.icpsrs.dtype),
+        cast_codes=cast_codes[:, has_votes]
+        )
+    return merged, updated
+
+
+def _row_digest(matrix: VoteMatrix, idx: int) -> str:
+    # Digest of the votes of one rollcall, independent of the other members of the matrix
+    row = np.asarray(matrix.cast_codes[idx])
+    present = row != CASTCODE_ABSENT
+    h = hashlib.sha256(matrix.icpsrs[present].astype(np.int64).tobytes())
+    h.update(row[present].astype(np.int64).tobytes())
+    return h.hexdigest()[:16]
+
+
+def source_digests(votes: VotesColumnar, rolls: List[Tuple[int,int]]) -> Dict[Tuple[int,int], str]:
+    """Digests of the source votes of rollcalls, before they are repaired. 
+    Stored for repaired rollcalls, so that VoteStore.changed_votes can compare new source votes with the source votes of the store rather than with the repaired votes.
+
+    Args:
+        votes (VotesColumnar): Source votes
+        rolls (List[Tuple[int,int]]): (congress, rollnumber) of the rollcalls
+
+    Returns:
+        Dict[Tuple[int,int], str]: Digest of each rollcall
+    """
+    digests = {}
+    for congress in sorted(set(congress for congress, _ in rolls)):
+        matrix = VoteMatrix.from_votes_columnar(votes, congress)
+        for rollnumber in [ rollnumber for c, rollnumber in rolls if c == congress ]:
+            digests[(congress, rollnumber)] = _row_digest(matrix, matrix.roll_idx(rollnumber))
+    return digests
+
+
+class VoteStore:
+    """Vote matrices for many congresses persisted as NumPy files, one directory per congress, optionally with the rollcalls and members of each congress.
+    Each write of a congress goes to a new version directory congress_<n>/v<k>. Swapping the manifest to the new version is the single commit point, so readers see either all old or all new files of a congress.
+
+    Matrices are opened memory-mapped and read-only, so any number of processes can share one copy of the data through the OS page cache.
+    The store pickles as just its directory, so it is cheap to send to worker processes.
+    Loading selected congresses or census decades reads only their partitions, so the store replaces parsing the voteview CSVs of all congresses.
+    """
+
+
+    # Version of the store layout
+    VERSION = 2
+
+    # Arrays stored for each congress
+    ARRAYS = ["rollnumbers", "icpsrs", "cast_codes"]
+
+
+    def __init__(self, store_dir: str):
+        """Open an existing store
+
+        Args:
+            store_dir (str): Directory of the store
+        """
+        self.store_dir = store_dir
+
+        manifest = self._read_manifest(store_dir)
+        assert manifest is not None, f"No vote store found at {store_dir}"
+        self.manifest = manifest
+        assert self.manifest["version"] == self.VERSION, f"Vote store version {self.manifest['version']} != {self.VERSION}"
+
+
+    def __reduce__(self):
+        return (VoteStore, (self.store_dir,))
+
+
+    @classmethod
+    def write(cls, 
+        store_dir: str, 
+        votes: Union[VotesAll, VotesColumnar], 
+        rollcalls: Optional[RollCallsAll] = None, 
+        members: Optional[MemberTable] = None,
+        repaired: Optional[Dict[Tuple[int,int], str]] = None
+        ) -> "VoteStore":
+        """Write votes to a new store. An existing store in the directory is replaced, and stays readable until the new manifest is written.
+
+        Args:
+            store_dir (str): Directory of the store
+            votes (Union[VotesAll, VotesColumnar]): Votes
+            rollcalls (Optional[RollCallsAll], optional): Rollcalls, stored with the votes of each congress. Defaults to None.
+            members (Optional[MemberTable], optional): Members, stored with the votes of each congress. Defaults to None.
+            repaired (Optional[Dict[Tuple[int,int], str]], optional): Digests of the source votes of repaired rollcalls, see source_digests. Defaults to None.
+
+        Returns:
+            VoteStore: Store
+        """
+        if isinstance(votes, VotesAll):
+            votes = VotesColumnar.from_votes_all(votes)
+        os.makedirs(store_dir, exist_ok=True)
+        manifest_live = cls._read_manifest(store_dir)
+
+        # New versions go after any already on disk, so no version a manifest points to is overwritten
+        congresses: Dict[str, Dict[str, int]] = {}
+        for congress in np.unique(votes.congress).tolist():
+            matrix = VoteMatrix.from_votes_columnar(votes, congress)
+            version = max(cls._disk_versions(store_dir, congress), default=0) + 1
+            congresses[str(congress)] = cls._write_matrix(store_dir, matrix, version=version)
+            cls._set_repaired(congresses[str(congress)], congress, matrix.rollnumbers, repaired)
+            cls._write_partitions(store_dir, congress, congresses[str(congress)], rollcalls, members, previous=None)
+
+        # Write the manifest last - it marks the store as complete
+        cls._write_manifest(store_dir, { "version": cls.VERSION, "congresses": congresses })
+
+        # Keep the versions of the replaced manifest until the next write, as append does
+        entries_live = manifest_live["congresses"] if manifest_live is not None else {}
+        for congress in cls._disk_congresses(store_dir):
+            keep = [ entries[str(congress)]["version"] for entries in (entries_live, congresses) if "version" in entries.get(str(congress), {}) ]
+            cls._prune_versions(store_dir, congress, keep=keep)
+        logger.debug(f"Wrote vote store for {len(congresses)} congresses to {store_dir}")
+        return cls(store_dir)
+
+
+    @classmethod
+    def write_voteview_csv(cls, store_dir: str, loader: LoadVoteViewCsv) -> "VoteStore":
+        """Write a new store from voteview CSVs, after checking consistency as in LoadVoteViewCsv.load_consistency. 
+        Votes are repaired against the members of each congress, as in append_voteview_csv, so writing and appending the same CSVs store the same votes.
+
+        Args:
+            store_dir (str): Directory of the store
+            loader (LoadVoteViewCsv): Loader with the votes, rollcalls and members CSVs
+
+        Raises:
+            RuntimeError: If the votes are not consistent with the rollcalls CSV
+
+        Returns:
+            VoteStore: Store
+        """
+        rollcalls = loader.load_rollcalls()
+        members = loader.load_member_table()
+        votes_source = loader.load_votes_columnar()
+        votes, report = check_consistency(votes_source, rollcalls, members)
+        if len(report.repaired) > 0:
+            logger.debug(f"Removed votes of members not in the members csv to repair {len(report.repaired)} rollcalls")
+        if not report.is_consistent:
+            raise RuntimeError(report.summary())
+        repaired = source_digests(votes_source, [ (roll.congress, roll.rollnumber) for roll in report.repaired ])
+        return cls.write(store_dir, votes, rollcalls=rollcalls, members=members, repaired=repaired)
+
+
+    @classmethod
+    def _write_partitions(cls, store_dir: str, congress: int, entry: Dict, rollcalls: Optional[RollCallsAll], members: Optional[MemberTable], previous: Optional[int]):
+        dir_version = cls._version_dir(store_dir, congress, entry["version"])
+        dir_previous = cls._version_dir(store_dir, congress, previous) if previous is not None else None
+        if rollcalls is not None:
+            with open(os.path.join(dir_version, "rollcalls.bin"), "wb") as f:
+                write_rollcalls_binary(RollCallsAll({ congress: rollcalls.congress_to_rollnumber_to_rollcall.get(congress, {}) }), f)
+            entry["rollcalls"] = True
+        elif entry.get("rollcalls", False) and dir_previous is not None:
+            cls._link_or_copy(os.path.join(dir_previous, "rollcalls.bin"), os.path.join(dir_version, "rollcalls.bin"))
+        if members is not None:
+            df = members.to_dataframe()
+            write_table(df[df.congress == congress], os.path.join(dir_version, "members"))
+            entry["members"] = True
+        elif entry.get("members", False) and dir_previous is not None:
+            cls._link_or_copy(table_path(os.path.join(dir_previous, "members")), table_path(os.path.join(dir_version, "members")))
+
+
+    @staticmethod
+    def _set_repaired(entry: Dict, congress: int, rollnumbers: np.ndarray, repaired: Optional[Dict[Tuple[int,int], str]]) -> bool:
+        # Replace the source digests of the given rollcalls of a congress. Rollcalls not repaired have none, as their stored votes are their source votes. Returns whether the entry changed
+        rollnumbers_set = set(rollnumbers.tolist())
+        digests = { key: digest for key, digest in entry.get("repaired", {}).items() if int(key) not in rollnumbers_set }
+        digests.update({ str(rollnumber): digest for (c, rollnumber), digest in (repaired or {}).items() if c == congress and rollnumber in rollnumbers_set })
+        if digests == entry.get("repaired", {}):
+            return False
+        if len(digests) > 0:
+            entry["repaired"] = digests
+        else:
+            del entry["repaired"]
+        return True
+
+
+    @staticmethod
+    def _link_or_copy(src: str, dst: str):
+        # Files of a version are never modified, so versions can share them
+        try:
+            os.link(src, dst)
+        except OSError:
+            shutil.copyfile(src, dst)
+
+
+    @staticmethod
+    def _congress_dir(store_dir: str, congress: int) -> str:
+        return os.path.join(store_dir, "congress_%03d" % congress)
+
+
+    @staticmethod
+    def _disk_congresses(store_dir: str) -> List[int]:
+        return sorted(int(name[len("congress_"):]) for name in os.listdir(store_dir) if name.startswith("congress_") and name[len("congress_"):].isdigit())
+
+
+    @classmethod
+    def _disk_versions(cls, store_dir: str, congress: int) -> List[int]:
+        dir_congress = cls._congress_dir(store_dir, congress)
+        if not os.path.isdir(dir_congress):
+            return []
+        return sorted(int(name[1:]) for name in os.listdir(dir_congress) if name.startswith("v") and name[1:].isdigit())
+
+
+    @classmethod
+    def _version_dir(cls, store_dir: str, congress: int, version: int) -> str:
+        return os.path.join(cls._congress_dir(store_dir, congress), "v%d" % version)
+
+
+    @classmethod
+    def _write_matrix(cls, store_dir: str, matrix: VoteMatrix, version: int) -> Dict[str, int]:
+        # A new version directory is never read until the manifest points to it. Clear any left by an interrupted write
+        dir_version = cls._version_dir(store_dir, matrix.congress, version)
+        if os.path.exists(dir_version):
+            shutil.rmtree(dir_version)
+        os.makedirs(dir_version)
+        for name in cls.ARRAYS:
+            np.save(os.path.join(dir_version, name + ".npy"), getattr(matrix, name))
+        return { "version": version, "no_rollcalls": matrix.no_rollcalls, "no_members": matrix.no_members }
+
+
+    @classmethod
+    def _prune_versions(cls, store_dir: str, congress: int, keep: List[int]):
+        # Readers that loaded the previous manifest may still open the previous version, so it is kept until the next write
+        dir_congress = cls._congress_dir(store_dir, congress)
+        for version in cls._disk_versions(store_dir, congress):
+            if version not in keep:
+                shutil.rmtree(cls._version_dir(store_dir, congress, version))
+        if len(os.listdir(dir_congress)) == 0:
+            os.rmdir(dir_congress)
+
+
+    @staticmethod
+    def _read_manifest(store_dir: str) -> Optional[Dict]:
+        fname_manifest = os.path.join(store_dir, "manifest.json")
+        if not os.path.exists(fname_manifest):
+            return None
+        with open(fname_manifest, "r") as f:
+            return json.load(f)
+
+
+    @staticmethod
+    def _write_manifest(store_dir: str, manifest: Dict):
+        fname_tmp = os.path.join(store_dir, "manifest.json.tmp")
+        with open(fname_tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(fname_tmp, os.path.join(store_dir, "manifest.json"))
+
+
+    @property
+    def congresses(self) -> List[int]:
+        """Congresses in the store, sorted
+        """
+        return sorted(int(congress) for congress in self.manifest["congresses"].keys())
+
+
+    def _entry_dir(self, congress: int) -> str:
+        assert str(congress) in self.manifest["congresses"], f"Congress {congress} not in vote store {self.store_dir}"
+        return self._version_dir(self.store_dir, congress, self.manifest["congresses"][str(congress)]["version"])
+
+
+    def open_congress(self, congress: int) -> VoteMatrix:
+        """Open the vote matrix of a congress, memory-mapped read-only. No data is read until it is accessed.
+
+        Args:
+            congress (int): Congress
+
+        Returns:
+            VoteMatrix: Vote matrix
+        """
+        dir_version = self._entry_dir(congress)
+        arrays = {
+            name: np.load(os.path.join(dir_version, name + ".npy"), mmap_mode="r")
+            for name in self.ARRAYS
+            }
+        return VoteMatrix(congress=congress, **arrays)
+
+
+    def select_congresses(self, congresses: Optional[List[int]] = None, census_years: Optional[List[Year]] = None) -> List[int]:
+        """Congresses in the store that match a selection
+
+        Args:
+            congresses (Optional[List[int]], optional): Congresses. Defaults to None (all).
+            census_years (Optional[List[Year]], optional): Census years, selecting the congresses apportioned by them (see CENSUS_YEAR_TO_CONGRESS). Defaults to None (all).
+
+        Returns:
+            List[int]: Selected congresses in the store, sorted
+        """
+        selected = set(self.congresses)
+        if congresses is not None:
+            selected &= set(congresses)
+        if census_years is not None:
+            selected &= set(congress for census_year in census_years for congress in CENSUS_YEAR_TO_CONGRESS[census_year])
+        return sorted(selected)
+
+
+    def load_votes(self, congresses: Optional[List[int]] = None, census_years: Optional[List[Year]] = None) -> VotesAll:
+        """Load votes. Only the partitions of the selected congresses are read.
+
+        Args:
+            congresses (Optional[List[int]], optional): Congresses. Defaults to None (all).
+            census_years (Optional[List[Year]], optional): Census years. Defaults to None (all).
+
+        Returns:
+            VotesAll: Votes
+        """
+        votes = VotesAll()
+        for congress in self.select_congresses(congresses, census_years):
+            self.open_congress(congress).to_votes_columnar().add_to_votes_all(votes)
+        return votes
+
+
+    def load_rollcalls(self, congresses: Optional[List[int]] = None, census_years: Optional[List[Year]] = None) -> RollCallsAll:
+        """Load rollcalls. Only the partitions of the selected congresses are read.
+
+        Args:
+            congresses (Optional[List[int]], optional): Congresses. Defaults to None (all).
+            census_years (Optional[List[Year]], optional): Census years. Defaults to None (all).
+
+        Returns:
+            RollCallsAll: Rollcalls
+        """
+        rollcalls = RollCallsAll()
+        for congress in self.select_congresses(congresses, census_years):
+            assert self.manifest["congresses"][str(congress)].get("rollcalls", False), f"No rollcalls stored for congress {congress} in vote store {self.store_dir}"
+            with open(os.path.join(self._entry_dir(congress), "rollcalls.bin"), "rb") as f:
+                rollcalls.congress_to_rollnumber_to_rollcall.update(read_rollcalls_binary(f).congress_to_rollnumber_to_rollcall)
+        return rollcalls
+
+
+    def load_member_table(self, congresses: Optional[List[int]] = None, census_years: Optional[List[Year]] = None) -> MemberTable:
+        """Load members. Only the partitions of the selected congresses are read.
+
+        Args:
+            congresses (Optional[List[int]], optional): Congresses. Defaults to None (all).
+            census_years (Optional[List[Year]], optional): Census years. Defaults to None (all).
+
+        Returns:
+            MemberTable: Members
+        """
+        dfs = []
+        for congress in self.select_congresses(congresses, census_years):
+            assert self.manifest["congresses"][str(congress)].get("members", False), f"No members stored for congress {congress} in vote store {self.store_dir}"
+            dfs.append(read_table(os.path.join(self._entry_dir(congress), "members")))
+        if len(dfs) == 0:
+            return MemberTable(congress=np.zeros(0, dtype=np.int16), icpsr=np.zeros(0, dtype=np.int32), columns={})
+        return MemberTable.from_dataframe(pd.concat(dfs, ignore_index=True))
+
+
+    def load(self, congresses: Optional[List[int]] = None, census_years: Optional[List[Year]] = None) -> Tuple[VotesAll, RollCallsAll, MemberTable]:
+        """Load votes, rollcalls and members of selected congresses, as LoadVoteViewCsv.load_consistency does for CSVs. Nothing else is read from disk.
+
+        Args:
+            congresses (Optional[List[int]], optional): Congresses. Defaults to None (all).
+            census_years (Optional[List[Year]], optional): Census years, e.g. [Year.YR2010] for congresses 112-116. Defaults to None (all).
+
+        Returns:
+            Tuple[VotesAll, RollCallsAll, MemberTable]: Votes, rollcalls, members
+        """
+        return (
+            self.load_votes(congresses, census_years), 
+            self.load_rollcalls(congresses, census_years), 
+            self.load_member_table(congresses, census_years)
+            )
+
+
+    def changed_votes(self, votes: VotesColumnar) -> VotesColumnar:
+        """Select the votes of rollcalls that are not in the store, or whose votes are different from the store. Only the partitions of congresses in the votes are read.
+        Rollcalls whose votes were repaired when stored are compared by the digest of their source votes, so source votes compare as unchanged until they change.
+
+        Args:
+            votes (VotesColumnar): Source votes
+
+        Returns:
+            VotesColumnar: Votes of new or changed rollcalls
+        """
+        keep = np.zeros(len(votes), dtype=bool)
+        for congress in np.unique(votes.congress).tolist():
+            is_congress = votes.congress == congress
+            if str(congress) not in self.manifest["congresses"]:
+                keep |= is_congress
+                continue
+            new = VoteMatrix.from_votes_columnar(votes, congress)
+            _, updated = merge_vote_matrices(self.open_congress(congress), new)
+            repaired = self.manifest["congresses"][str(congress)].get("repaired", {})
+            for idx in np.flatnonzero(updated).tolist():
+                digest = repaired.get(str(int(new.rollnumbers[idx])))
+                if digest is not None and digest == _row_digest(new, idx):
+                    updated[idx] = False
+            keep |= is_congress & np.isin(votes.rollnumber, new.rollnumbers[updated])
+        return votes.take(keep)
+
+
+    def append(self, 
+        votes: Union[VotesAll, VotesColumnar], 
+        rollcalls: Optional[RollCallsAll] = None, 
+        members: Optional[MemberTable] = None,
+        repaired: Optional[Dict[Tuple[int,int], str]] = None
+        ) -> VoteStoreAppendReport:
+        """Append votes to the store. Rollcalls already in the store are replaced if their votes are different. 
+        Only the partitions of congresses with new or changed rollcalls are rewritten, so the cost is proportional to the size of the delta.
+
+        Args:
+            votes (Union[VotesAll, VotesColumnar]): Votes, for any congresses
+            rollcalls (Optional[RollCallsAll], optional): Rollcalls, rewritten for the congresses whose partitions are rewritten. Defaults to None.
+            members (Optional[MemberTable], optional): Members, rewritten for the congresses whose partitions are rewritten. Defaults to None.
+            repaired (Optional[Dict[Tuple[int,int], str]], optional): Digests of the source votes of repaired rollcalls in the votes, see source_digests. Replace those stored for every rollcall in the votes. Defaults to None.
+
+        Returns:
+            VoteStoreAppendReport: Report of the rollcalls added and changed
+        """
+        if isinstance(votes, VotesAll):
+            votes = VotesColumnar.from_votes_all(votes)
+
+        # Only the written manifest is shared with readers. The copy becomes this store's manifest once written
+        manifest = copy.deepcopy(self.manifest)
+        report = VoteStoreAppendReport()
+        versions_kept: Dict[int, List[int]] = {}
+        repaired_changed = False
+        for congress in np.unique(votes.congress).tolist():
+            new = VoteMatrix.from_votes_columnar(votes, congress)
+            if str(congress) in manifest["congresses"]:
+                old = self.open_congress(congress)
+                merged, updated = merge_vote_matrices(old, new)
+                exists = np.isin(new.rollnumbers, old.rollnumbers)
+            else:
+                merged, updated = new, np.ones(new.no_rollcalls, dtype=bool)
+                exists = np.zeros(new.no_rollcalls, dtype=bool)
+
+            report.rolls_added += [ (congress, rollnumber) for rollnumber in new.rollnumbers[updated & ~exists].tolist() ]
+            report.rolls_changed += [ (congress, rollnumber) for rollnumber in new.rollnumbers[updated & exists].tolist() ]
+            report.no_rolls_unchanged += int((~updated).sum())
+
+            # Source digests change without a new version when a repaired rollcall's source votes change but repair to the same votes
+            entry = manifest["congresses"].setdefault(str(congress), {})
+            repaired_changed |= self._set_repaired(entry, congress, new.rollnumbers, repaired)
+            if not updated.any():
+                continue
+
+            # Write a new version, keeping the flags of rollcalls and members already stored. Those not given are carried over from the previous version
+            previous = entry.get("version")
+            entry.update(self._write_matrix(self.store_dir, merged, version=previous + 1 if previous is not None else 1))
+            self._write_partitions(self.store_dir, congress, entry, rollcalls, members, previous=previous)
+            report.congresses_written.append(congress)
+            versions_kept[congress] = [ version for version in (previous, entry["version"]) if version is not None ]
+
+        if len(report.congresses_written) > 0 or repaired_changed:
+            self._write_manifest(self.store_dir, manifest)
+            self.manifest = manifest
+            for congress, versions in versions_kept.items():
+                self._prune_versions(self.store_dir, congress, keep=versions)
+        logger.debug(f"Appended to vote store {self.store_dir}: {len(report.rolls_added)} rollcalls added, {len(report.rolls_changed)} changed, {report.no_rolls_unchanged} unchanged")
+        return report
+
+
+    def append_voteview_csv(self, loader: LoadVoteViewCsv, min_congress: Optional[int] = None) -> VoteStoreAppendReport:
+        """Append a newer voteview votes CSV, or a delta CSV with only some congresses. 
+        New and changed rollcalls are detected first, and only those are checked for consistency against the rollcalls and members CSVs and written to the store.
+
+        Args:
+            loader (LoadVoteViewCsv): Loader with the votes, rollcalls and members CSVs
+            min_congress (Optional[int], optional): If given, skip votes of earlier congresses in the votes CSV. Use the last congress in the store to refresh from a full voteview file. Defaults to None.
+
+        Raises:
+            RuntimeError: If the new or changed rollcalls are not consistent with the rollcalls CSV
+
+        Returns:
+            VoteStoreAppendReport: Report of the rollcalls added and changed
+        """
+        votes_all = loader.load_votes_columnar(min_congress=min_congress)
+        votes = self.changed_votes(votes_all)
+        no_rolls_unchanged = len(np.unique(votes_all.roll_keys())) - len(np.unique(votes.roll_keys()))
+        if len(votes) == 0:
+            logger.debug(f"No new or changed rollcalls for vote store {self.store_dir}")
+            return VoteStoreAppendReport(no_rolls_unchanged=no_rolls_unchanged)
+
+        # Check only the delta
+        votes_source = votes.sort_by_roll()
+        starts, _ = votes_source.roll_bounds()
+        rolls = zip(votes_source.congress[starts].tolist(), votes_source.rollnumber[starts].tolist())
+        rollcalls = loader.load_rollcalls()
+        members = loader.load_member_table()
+        votes, report = check_consistency(votes_source, rollcalls.select(rolls), members)
+        if not report.is_consistent:
+            raise RuntimeError(report.summary())
+        repaired = source_digests(votes_source, [ (roll.congress, roll.rollnumber) for roll in report.repaired ])
+
+        # Repairs can make changed source votes identical to the store again - append skips those, and only records their new digests
+        report = self.append(votes, rollcalls=rollcalls, members=members, repaired=repaired)
+        report.no_rolls_unchanged += no_rolls_unchanged
+        return report
+
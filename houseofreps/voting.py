@@ -1,14 +1,26 @@
 from .state import St, Year
 from .house import HouseOfReps, PopType
+from .methods import ApportionmentMethod
 from .residents_per_rep import ResidentsPerRep, calculate_residents_per_rep_for_year
+from .cache import FileFingerprint, fingerprint_file, fingerprint_matches, write_table, read_table
+from .instrument import instrumented, increment_counter
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from mashumaro import DataClassDictMixin
 from typing import Dict
 from enum import Enum
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Iterator, Iterable, Union, TYPE_CHECKING
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from loguru import logger
+import hashlib
+import json
+import operator
+import os
+
+if TYPE_CHECKING:
+    from .vote_store import VoteStore
 
 
 # Map from census year to congress
@@ -52,6 +64,23 @@ class CastCode(Enum):
         return [ cls.NAY, cls.PAIRED_NAY, cls.ANNOUNCED_NAY ]
 
 
+# Map from integer cast code (as stored in the voteview csv) to CastCode
+CASTCODE_FROM_INT: Dict[int, CastCode] = { castcode.value: castcode for castcode in CastCode }
+
+# Fast conversions between CastCode and integer cast codes for many votes at once. Enum.value is a descriptor, _value_ is a plain attribute
+_castcode_value = operator.attrgetter("_value_")
+_CASTCODE_BY_VALUE = np.array([ CASTCODE_FROM_INT[value] for value in range(len(CastCode)) ], dtype=object)
+
+# Columns of the voteview votes csv that are used, and the compact dtypes they are read with
+VOTES_CSV_USECOLS = ["congress", "rollnumber", "icpsr", "cast_code"]
+VOTES_CSV_DTYPES = {
+    "congress": np.int16,
+    "rollnumber": np.int32,
+    "icpsr": np.int32,
+    "cast_code": np.int8
+    }
+
+
 @dataclass
 class Votes(DataClassDictMixin):
     """Votes for a rollcall
@@ -88,424 +117,1443 @@ class VotesAll(DataClassDictMixin):
         return sum([ len(rollnumber_to_rollvotes) for rollnumber_to_rollvotes in self.congress_to_rollnumber_to_votes.values() ])
 
 
-@dataclass
-class Members(DataClassDictMixin):
-    """Members of the House of Representatives
-    """    
-
-    icpsr_to_state: Dict[int, St]
-    "ICPSR to state"
+def roll_key(congress: np.ndarray, rollnumber: np.ndarray) -> np.ndarray:
+    """Combine congress and roll number into one integer key that sorts by (congress, rollnumber)
 
+    Args:
+        congress (np.ndarray): Congresses
+        rollnumber (np.ndarray): Roll numbers
 
-@dataclass
-class RollCall(DataClassDictMixin):
-    """Rollcall
+    Returns:
+        np.ndarray: Keys (int64)
     """    
+    return (np.asarray(congress, dtype=np.int64) << 24) | np.asarray(rollnumber, dtype=np.int64)
 
-    congress: int
-    "Congress"
-
-    rollnumber: int
-    "Roll number"
-    
-    date: str
-    "Date"
 
-    yea_count: int
-    "Yea count"
+def member_key(congress: np.ndarray, icpsr: np.ndarray) -> np.ndarray:
+    """Combine congress and ICPSR into one integer key that sorts by (congress, icpsr)
 
-    nay_count: int
-    "Nay count"
+    Args:
+        congress (np.ndarray): Congresses
+        icpsr (np.ndarray): ICPSRs
 
-    bill_number: str
-    "Bill number"
+    Returns:
+        np.ndarray: Keys (int64)
+    """    
+    return (np.asarray(congress, dtype=np.int64) << 32) | np.asarray(icpsr, dtype=np.int64)
 
-    vote_result: str
-    "Vote result"
 
-    vote_desc: str
-    "Vote description"
+@dataclass
+class VotesColumnar:
+    """Votes for all rollcalls stored column-wise, one entry per (congress, rollnumber, icpsr) vote
+    """
 
-    vote_question: str
-    "Vote question"
+    congress: np.ndarray
+    "Congress of each vote (int16)"
 
+    rollnumber: np.ndarray
+    "Roll number of each vote (int32)"
 
-@dataclass
-class RollCallsAll(DataClassDictMixin):
-    """All rollcalls for all congresses, indexed by congress and rollnumber
-    """    
+    icpsr: np.ndarray
+    "ICPSR of the member casting each vote (int32)"
 
-    congress_to_rollnumber_to_rollcall: Dict[int, Dict[int, RollCall]] = field(default_factory=dict)
-    "Congress to roll number to rollcall"
+    cast_code: np.ndarray
+    "Cast code of each vote as an integer (int8)"
 
-    @property
-    def no_congresses(self):
-        """Number of congresses
-        """        
-        return len(self.congress_to_rollnumber_to_rollcall)
 
-    @property
-    def no_rollcalls(self):
-        """Number of rollcalls
+    @classmethod
+    def empty(cls) -> "VotesColumnar":
+        """Empty votes
         """        
-        return sum([ len(rollnumber_to_rollcall) for rollnumber_to_rollcall in self.congress_to_rollnumber_to_rollcall.values() ])
-
+        return cls(
+            congress=np.zeros(0, dtype=VOTES_CSV_DTYPES["congress"]),
+            rollnumber=np.zeros(0, dtype=VOTES_CSV_DTYPES["rollnumber"]),
+            icpsr=np.zeros(0, dtype=VOTES_CSV_DTYPES["icpsr"]),
+            cast_code=np.zeros(0, dtype=VOTES_CSV_DTYPES["cast_code"])
+            )
 
-class LoadVoteViewCsv:
-    """Helper class to load voteview csv files
-    """    
 
-    
-    def __init__(self, votes_csv: Optional[str] = None, rollcalls_csv: Optional[str] = None, members_csv: Optional[str] = None):
-        """Constructor
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "VotesColumnar":
+        """Construct from a dataframe with the voteview votes columns
 
         Args:
-            votes_csv (Optional[str], optional): Votes CSV. Defaults to None.
-            rollcalls_csv (Optional[str], optional): Rollcalls CSV. Defaults to None.
-            members_csv (Optional[str], optional): Members CSV. Defaults to None.
-        """        
-        self.votes_csv = votes_csv
-        self.rollcalls_csv = rollcalls_csv
-        self.members_csv = members_csv
-
-    
-    def load_consistency(self) -> Tuple[VotesAll, RollCallsAll, Members]:
-        """Load all three and ensure they are consistent. Remove votes that are inconsistent with the rollcall votes.
+            df (pd.DataFrame): Dataframe with columns congress, rollnumber, icpsr, cast_code
 
         Returns:
-            Tuple[VotesAll, RollCallsAll, Members]: Votes, rollcalls, members
+            VotesColumnar: Votes
         """        
-        votes = self.load_votes()
-        rollcalls = self.load_rollcalls()
-        members = self.load_members()
+        return cls(**{
+            col: df[col].to_numpy(dtype=dtype) 
+            for col, dtype in VOTES_CSV_DTYPES.items()
+            })
 
-        # Check no congresses
-        congresses_votes = set(votes.congress_to_rollnumber_to_votes.keys())
-        congresses_rollcalls = set(rollcalls.congress_to_rollnumber_to_rollcall.keys())
-        assert congresses_votes == congresses_rollcalls, f"congresses_votes != congresses_rollcalls: {congresses_votes} != {congresses_rollcalls}"
 
-        for congress in congresses_votes:
+    @classmethod
+    def concatenate(cls, votes_list: List["VotesColumnar"]) -> "VotesColumnar":
+        """Concatenate several columnar votes
 
-            # Check rollnumbers
-            rollnumbers_votes = set(votes.congress_to_rollnumber_to_votes[congress].keys())
-            rollnumbers_rollcalls = set(rollcalls.congress_to_rollnumber_to_rollcall[congress].keys())
-            assert rollnumbers_votes == rollnumbers_rollcalls, f"rollnumbers_votes != rollnumbers_rollcalls: {rollnumbers_votes} != {rollnumbers_rollcalls}"
+        Args:
+            votes_list (List[VotesColumnar]): Votes to concatenate, in order
 
-            for rollnumber in rollnumbers_votes:
-                rv = votes.congress_to_rollnumber_to_votes[congress][rollnumber]
-                rc = rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber]
+        Returns:
+            VotesColumnar: Concatenated votes
+        """        
+        if len(votes_list) == 0:
+            return cls.empty()
+        return cls(**{
+            col: np.concatenate([ getattr(votes, col) for votes in votes_list ])
+            for col in VOTES_CSV_DTYPES.keys()
+            })
 
-                # Measure castcode to votes
-                castcode_to_votes = {}
-                for icpsr, castcode in rv.icpsr_to_castcode.items():
-                    assert isinstance(castcode, CastCode), f"castcode is not a CastCode: {castcode}"
-                    assert isinstance(icpsr, int), f"icpsr is not an int: {icpsr}"
-                    castcode_to_votes[castcode] = castcode_to_votes.get(castcode, 0) + 1
-            
-                # Check yays and nays consistent
-                consistent_yea = rc.yea_count == castcode_to_votes.get(CastCode.YEA,0)
-                consistent_nay = rc.nay_count == castcode_to_votes.get(CastCode.NAY,0)
-
-                # Only if inconsistent, then exclude members who are not in the members csv
-                if not consistent_nay or not consistent_yea:
-
-                    # Remove rollvotes for members not in members csv
-                    rv.icpsr_to_castcode = { icpsr: castcode for icpsr, castcode in rv.icpsr_to_castcode.items() if icpsr in members.icpsr_to_state }
-
-                    # Measure castcode to votes
-                    castcode_to_votes = {}
-                    for icpsr, castcode in rv.icpsr_to_castcode.items():
-                        assert isinstance(castcode, CastCode), f"castcode is not a CastCode: {castcode}"
-                        assert isinstance(icpsr, int), f"icpsr is not an int: {icpsr}"
-                        castcode_to_votes[castcode] = castcode_to_votes.get(castcode, 0) + 1
-                
-                    # Check yays and nays consistent
-                    consistent_yea = rc.yea_count == castcode_to_votes.get(CastCode.YEA,0)
-                    consistent_nay = rc.nay_count == castcode_to_votes.get(CastCode.NAY,0)
-                    if not consistent_nay or not consistent_yea:
-                        raise RuntimeError(f"Rollcall (congress={congress}, rollnumber={rollnumber}) is not consistent with votes. yea_consistent: {consistent_yea}, nay_consistent: {consistent_nay}. Yea rollcalls: {rc.yea_count} vs votes: {castcode_to_votes.get(CastCode.YEA,0)}. Nay rollcalls: {rc.nay_count} vs votes: {castcode_to_votes.get(CastCode.NAY,0)}")
-        
-        return votes, rollcalls, members
 
+    @classmethod
+    def from_votes_all(cls, votes: VotesAll) -> "VotesColumnar":
+        """Construct from votes for all rollcalls
 
-    def load_members(self) -> Members:
-        """Load members
+        Args:
+            votes (VotesAll): Votes
 
         Returns:
-            Members: Members
+            VotesColumnar: Votes
         """        
+        congress, rollnumber, icpsr, cast_code = [], [], [], []
+        for c, rollnumber_to_votes in votes.congress_to_rollnumber_to_votes.items():
+            for r, rv in rollnumber_to_votes.items():
+                n = len(rv.icpsr_to_castcode)
+                congress.append(np.full(n, c, dtype=VOTES_CSV_DTYPES["congress"]))
+                rollnumber.append(np.full(n, r, dtype=VOTES_CSV_DTYPES["rollnumber"]))
+                icpsr.append(np.fromiter(rv.icpsr_to_castcode.keys(), dtype=VOTES_CSV_DTYPES["icpsr"], count=n))
+                cast_code.append(np.fromiter(map(_castcode_value, rv.icpsr_to_castcode.values()), dtype=VOTES_CSV_DTYPES["cast_code"], count=n))
+        if len(congress) == 0:
+            return cls.empty()
+        return cls(
+            congress=np.concatenate(congress),
+            rollnumber=np.concatenate(rollnumber),
+            icpsr=np.concatenate(icpsr),
+            cast_code=np.concatenate(cast_code)
+            )
 
-        # Load csv
-        assert self.members_csv is not None, "self.members_csv is None"
-        df = pd.read_csv(self.members_csv)
 
-        # Column icpsr to state_abbrev
-        icpsr_to_state_str = dict(zip(df.icpsr, df.state_abbrev))
+    def __len__(self) -> int:
+        return len(self.congress)
 
-        # Convert to icpsr to St
-        st_values = set([ s.value for s in St ])
-        icpsr_to_state = {
-            int(icpsr): St(state_abbrev) 
-            for icpsr, state_abbrev in icpsr_to_state_str.items()
-            if state_abbrev in st_values
-            }
 
-        return Members(icpsr_to_state=icpsr_to_state)
- 
+    @property
+    def no_votes(self) -> int:
+        """Number of votes
+        """        
+        return len(self.congress)
 
-    def load_votes(self) -> VotesAll:
-        """Load votes
 
-        Returns:
-            VotesAll: Votes
+    @property
+    def nbytes(self) -> int:
+        """Memory used by the columns in bytes
         """        
+        return sum(getattr(self, col).nbytes for col in VOTES_CSV_DTYPES.keys())
 
-        # Load csv
-        assert self.votes_csv is not None, "self.votes_csv is None"
-        df = pd.read_csv(self.votes_csv)
-
-        # Get all congresses
-        congresses = df.congress.unique()
 
-        # Construct
-        rva = VotesAll()
-        for congress in congresses:
-            rva.congress_to_rollnumber_to_votes[congress] = {}
+    def take(self, idxs: np.ndarray) -> "VotesColumnar":
+        """Select votes by index or boolean mask
 
-            # Get all rollnumbers
-            df_congress = df[df.congress == congress]
-            rollnumbers = df_congress.rollnumber.unique()
+        Args:
+            idxs (np.ndarray): Indexes or boolean mask
 
-            for rollnumber in rollnumbers:
-                rva.congress_to_rollnumber_to_votes[congress][rollnumber] = self._votes_from_dataframe(df_congress, congress, rollnumber)
-        return rva
+        Returns:
+            VotesColumnar: Selected votes
+        """        
+        return VotesColumnar(**{
+            col: getattr(self, col)[idxs]
+            for col in VOTES_CSV_DTYPES.keys()
+            })
 
 
-    def load_rollcalls(self) -> RollCallsAll:
-        """Load rollcalls
+    def roll_keys(self) -> np.ndarray:
+        """Key of the rollcall of each vote, combining congress and roll number into one integer that sorts by (congress, rollnumber)
 
         Returns:
-            RollCallsAll: Rollcalls
+            np.ndarray: Keys (int64)
         """        
+        return roll_key(self.congress, self.rollnumber)
 
-        # Load csv
-        assert self.rollcalls_csv is not None, "self.rollcalls_csv is None"
-        df = pd.read_csv(self.rollcalls_csv)
 
-        # Get all congresses
-        congresses = df.congress.unique()
+    def drop_duplicate_votes(self) -> "VotesColumnar":
+        """Drop all but the last vote of each member in each rollcall, matching the behavior of VotesAll. The order of the remaining votes is preserved.
 
-        # Construct
-        rca = RollCallsAll()
-        for congress in congresses:
-            rca.congress_to_rollnumber_to_rollcall[congress] = {}
+        Returns:
+            VotesColumnar: Votes without duplicates (self if there are none)
+        """        
+        keys = self.roll_keys()
+        order = np.lexsort((self.icpsr, keys))
+        keys_sorted, icpsrs_sorted = keys[order], self.icpsr[order]
+        is_last = np.ones(len(keys), dtype=bool)
+        is_last[:-1] = (keys_sorted[1:] != keys_sorted[:-1]) | (icpsrs_sorted[1:] != icpsrs_sorted[:-1])
+        if is_last.all():
+            return self
+        return self.take(np.sort(order[is_last]))
+
+
+    def is_sorted_by_roll(self) -> bool:
+        """Whether the votes are sorted by (congress, rollnumber)
+        """        
+        if len(self) < 2:
+            return True
+        dc = np.diff(self.congress.astype(np.int64))
+        dr = np.diff(self.rollnumber.astype(np.int64))
+        return bool(np.all((dc > 0) | ((dc == 0) & (dr >= 0))))
 
-            # Get all rollnumbers
-            df_congress = df[df.congress == congress]
-            rollnumbers = df_congress.rollnumber.unique()
 
-            for rollnumber in rollnumbers:
-                rca.congress_to_rollnumber_to_rollcall[congress][rollnumber] = self._rollcall_from_dataframe(df_congress, congress, rollnumber)
+    def sort_by_roll(self) -> "VotesColumnar":
+        """Sort by (congress, rollnumber). The sort is stable, so the order of votes within a rollcall is preserved.
 
-        return rca
-    
+        Returns:
+            VotesColumnar: Sorted votes (self if already sorted)
+        """        
+        if self.is_sorted_by_roll():
+            return self
+        return self.take(np.lexsort((self.rollnumber, self.congress)))
 
-    def _rollcall_from_dataframe(self, df: pd.DataFrame, congress: int, rollnumber: int) -> RollCall:
-        # Filter by congress and rollnumber
-        df = df[(df.congress == congress) & (df.rollnumber == rollnumber)]
 
-        # Check that there is only one row
-        assert len(df) == 1, f"Found {len(df)} rows for congress {congress} rollnumber {rollnumber}"
+    def roll_bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Start index of each rollcall, for votes sorted by (congress, rollnumber)
 
-        # Get date
-        date = df.date.iloc[0]
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (Start index of each rollcall, end index of each rollcall)
+        """        
+        if len(self) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        change = (self.congress[1:] != self.congress[:-1]) | (self.rollnumber[1:] != self.rollnumber[:-1])
+        starts = np.concatenate([ [0], np.flatnonzero(change) + 1 ])
+        ends = np.concatenate([ starts[1:], [len(self)] ])
+        return starts, ends
 
-        # Get yea count
-        yea_count = df.yea_count.iloc[0]
 
-        # Get nay count
-        nay_count = df.nay_count.iloc[0]
+    def iter_rolls(self) -> Iterator[Tuple[int, int, np.ndarray, np.ndarray]]:
+        """Iterate over rollcalls
 
-        # Get bill number
-        bill_number = df.bill_number.iloc[0]
+        Returns:
+            Iterator[Tuple[int, int, np.ndarray, np.ndarray]]: (congress, rollnumber, icpsrs, cast codes) for each rollcall
+        """        
+        votes = self.sort_by_roll()
+        starts, ends = votes.roll_bounds()
+        for start, end in zip(starts, ends):
+            yield int(votes.congress[start]), int(votes.rollnumber[start]), votes.icpsr[start:end], votes.cast_code[start:end]
 
-        # Get vote result
-        vote_result = df.vote_result.iloc[0]
 
-        # Get vote desc
-        vote_desc = df.vote_desc.iloc[0]
+    def add_to_votes_all(self, votes: VotesAll):
+        """Add these votes into votes for all rollcalls. Later votes by the same member in the same rollcall overwrite earlier ones.
 
-        # Get vote question
-        vote_question = df.vote_question.iloc[0]
+        Args:
+            votes (VotesAll): Votes to add to
+        """        
+        for congress, rollnumber, icpsrs, cast_codes in self.iter_rolls():
+            rollnumber_to_votes = votes.congress_to_rollnumber_to_votes.setdefault(congress, {})
+            rv = rollnumber_to_votes.get(rollnumber)
+            if rv is None:
+                rv = Votes(congress=congress, rollnumber=rollnumber, icpsr_to_castcode={})
+                rollnumber_to_votes[rollnumber] = rv
+            rv.icpsr_to_castcode.update(zip(icpsrs.tolist(), _CASTCODE_BY_VALUE[cast_codes].tolist()))
 
-        return RollCall(
-            congress=congress,
-            rollnumber=rollnumber,
-            date=date,
-            yea_count=yea_count,
-            nay_count=nay_count,
-            bill_number=bill_number,
-            vote_result=vote_result,
-            vote_desc=vote_desc,
-            vote_question=vote_question
-            )
-    
 
-    def _votes_from_dataframe(self, df: pd.DataFrame, congress: int, rollnumber: int) -> Votes:
-        # Filter by congress and rollnumber
-        df = df[(df.congress == congress) & (df.rollnumber == rollnumber)]
+    def to_votes_all(self) -> VotesAll:
+        """Convert to votes for all rollcalls
 
-        # Convert to icpsr to castcode
-        # Note: castcode is an int
-        icpsr_to_castcode_int = dict(zip(df.icpsr, df.cast_code))    
+        Returns:
+            VotesAll: Votes
+        """        
+        votes = VotesAll()
+        self.add_to_votes_all(votes)
+        return votes
 
-        # Convert to icpsr to castcode
-        icpsr_to_castcode = {
-            int(icpsr): CastCode(castcode_int) 
-            for icpsr, castcode_int in icpsr_to_castcode_int.items()
-            }
-        
-        return Votes(
-            congress=congress, 
-            rollnumber=rollnumber, 
-            icpsr_to_castcode=icpsr_to_castcode
-            )
 
+# Cast code in a VoteMatrix for members who have no vote recorded in a rollcall
+CASTCODE_ABSENT = -1
 
-class Decision(Enum):
-    """Decision enum
-    """    
-    PASS = "pass"
-    "Pass"
+# Index of each state in arrays indexed by state, in the order of St
+ST_TO_IDX: Dict[St, int] = { st: idx for idx, st in enumerate(St) }
 
-    FAIL = "fail"
-    "Fail"
+# State index for members who are not in the members csv
+STATE_IDX_MISSING = -1
 
 
 @dataclass
-class VoteResults(DataClassDictMixin):
-    """Vote results
+class VoteMatrix:
+    """Votes for all rollcalls of one congress as a dense (rollcall x member) matrix of cast codes
     """
 
     congress: int
     "Congress"
 
-    rollnumber: int
-    "Roll number"
+    rollnumbers: np.ndarray
+    "Sorted roll numbers, one per row (int32)"
 
-    castcode_to_count: Dict[CastCode, float]
-    "Castcode to count"
+    icpsrs: np.ndarray
+    "Sorted ICPSRs, one per column (int32)"
 
+    cast_codes: np.ndarray
+    "Cast codes as integers (int8), shape (no. rollcalls, no. members). CASTCODE_ABSENT where the member has no vote in the rollcall."
 
-    @property
-    def yea_count(self):
-        """Count of yea votes
-        """        
-        return self.castcode_to_count.get(CastCode.YEA,0)
 
+    @classmethod
+    def from_votes_columnar(cls, votes: VotesColumnar, congress: int) -> "VoteMatrix":
+        """Construct from columnar votes
 
-    @property
-    def nay_count(self):
-        """Count of nay votes
+        Args:
+            votes (VotesColumnar): Votes, possibly for several congresses
+            congress (int): Congress to construct the matrix for
+
+        Returns:
+            VoteMatrix: Vote matrix
         """        
-        return self.castcode_to_count.get(CastCode.NAY,0)
+        votes = votes.take(votes.congress == congress)
+        rollnumbers = np.unique(votes.rollnumber)
+        icpsrs = np.unique(votes.icpsr)
+        cast_codes = np.full((len(rollnumbers), len(icpsrs)), CASTCODE_ABSENT, dtype=VOTES_CSV_DTYPES["cast_code"])
+        cast_codes[np.searchsorted(rollnumbers, votes.rollnumber), np.searchsorted(icpsrs, votes.icpsr)] = votes.cast_code
+        return cls(congress=congress, rollnumbers=rollnumbers, icpsrs=icpsrs, cast_codes=cast_codes)
 
 
-    @property
-    def yea_count_all(self):
-        """Count of all yea votes
-        """        
-        return sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.yea_list() ])
+    @classmethod
+    def from_votes_all(cls, votes: VotesAll, congress: int) -> "VoteMatrix":
+        """Construct from votes for all rollcalls
 
-    
-    @property
-    def nay_count_all(self):
-        """Count of all nay votes
+        Args:
+            votes (VotesAll): Votes
+            congress (int): Congress to construct the matrix for
+
+        Returns:
+            VoteMatrix: Vote matrix
         """        
-        return sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.nay_list() ])
+        rollnumber_to_votes = { congress: votes.congress_to_rollnumber_to_votes.get(congress, {}) }
+        return cls.from_votes_columnar(VotesColumnar.from_votes_all(VotesAll(rollnumber_to_votes)), congress)
 
 
     @property
-    def majority_decision(self) -> Decision:
-        """Majority decision
+    def no_rollcalls(self) -> int:
+        """Number of rollcalls
         """        
-        if self.castcode_to_count.get(CastCode.YEA,0) > self.castcode_to_count.get(CastCode.NAY,0):
-            return Decision.PASS
-        else:
-            return Decision.FAIL
+        return len(self.rollnumbers)
 
 
     @property
-    def majority_decision_all_yea_nay(self) -> Decision:
-        """Majority decision
+    def no_members(self) -> int:
+        """Number of members
         """        
-        yea = sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.yea_list() ])
-        nay = sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.nay_list() ])
-        if yea > nay:
-            return Decision.PASS
-        else:
-            return Decision.FAIL
-
+        return len(self.icpsrs)
 
-@dataclass
-class VoteResultsFractional(DataClassDictMixin):
-    """Fractional vote results
-    """    
 
-    vote_results: VoteResults
-    "Vote results"
+    def roll_idx(self, rollnumber: int) -> int:
+        """Row of a rollcall
 
-    st_to_reps_fair: Dict[St, float]
-    "Fair number of representatives for each state"
+        Args:
+            rollnumber (int): Roll number
 
-    st_to_reps_actual: Dict[St, float]
-    "Actual number of representatives for each state"
+        Returns:
+            int: Row index
+        """        
+        idx = int(np.searchsorted(self.rollnumbers, rollnumber))
+        assert idx < len(self.rollnumbers) and self.rollnumbers[idx] == rollnumber, f"rollnumber {rollnumber} not found in congress {self.congress}"
+        return idx
 
 
-class CalculateVotes:
-    """Helper class to calculate votes
-    """    
+    def take_rolls(self, rolls: slice) -> "VoteMatrix":
+        """Select a contiguous range of rollcalls. No data is copied.
 
+        Args:
+            rolls (slice): Rows to select
 
-    @dataclass
-    class Options(DataClassDictMixin):
-        """Options for CalculateVotes
+        Returns:
+            VoteMatrix: Vote matrix for the selected rollcalls
         """        
-
-        use_num_votes_as_num_seats: bool = False
-        "Use the number of votes as the number of seats in the House of Representatives. Otherwise uses 435."
-
-        skip_castcodes: List[CastCode] = field(default_factory=lambda: [CastCode.NOT_MEMBER, CastCode.NOT_VOTING])
-        "Skip these castcodes"
+        return VoteMatrix(
+            congress=self.congress, 
+            rollnumbers=self.rollnumbers[rolls], 
+            icpsrs=self.icpsrs, 
+            cast_codes=self.cast_codes[rolls]
+            )
 
 
-    def __init__(self,
-        votes: Votes, 
-        members: Members,
-        rollcall: RollCall,
-        options: Options = Options()
-        ):
-        """Constructor
+    def to_votes_columnar(self) -> VotesColumnar:
+        """Convert to columnar votes, dropping absent votes
 
-        Args:
-            votes (Votes): Votes
-            members (Members): Members
-            rollcall (RollCall): Rollcall
-            options (Options, optional): Options. Defaults to Options().
+        Returns:
+            VotesColumnar: Votes
         """        
-        self.votes = votes
-        self.members = members
-        self.rollcall = rollcall
-        self.options = options
-    
+        rows, cols = np.nonzero(self.cast_codes != CASTCODE_ABSENT)
+        return VotesColumnar(
+            congress=np.full(len(rows), self.congress, dtype=VOTES_CSV_DTYPES["congress"]),
+            rollnumber=self.rollnumbers[rows].astype(VOTES_CSV_DTYPES["rollnumber"]),
+            icpsr=self.icpsrs[cols].astype(VOTES_CSV_DTYPES["icpsr"]),
+            cast_code=self.cast_codes[rows, cols].astype(VOTES_CSV_DTYPES["cast_code"])
+            )
 
-    def calculate_votes(self) -> VoteResults:
-        """Vote results
+
+    def to_votes_all(self) -> VotesAll:
+        """Convert to votes for all rollcalls
 
         Returns:
-            VoteResults: Vote results
+            VotesAll: Votes
         """        
-        castcode_to_count = {}
+        return self.to_votes_columnar().to_votes_all()
+
+
+@dataclass
+class Members(DataClassDictMixin):
+    """Members of the House of Representatives
+    """    
+
+    icpsr_to_state: Dict[int, St]
+    "ICPSR to state"
+
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "Members":
+        """Construct from a dataframe with the voteview members columns icpsr and state_abbrev. Members not in a state (e.g. the President) are dropped.
+
+        Args:
+            df (pd.DataFrame): Dataframe
+
+        Returns:
+            Members: Members
+        """        
+
+        # Column icpsr to state_abbrev
+        icpsr_to_state_str = dict(zip(df.icpsr, df.state_abbrev))
+
+        # Convert to icpsr to St
+        st_values = set([ s.value for s in St ])
+        icpsr_to_state = {
+            int(icpsr): St(state_abbrev) 
+            for icpsr, state_abbrev in icpsr_to_state_str.items()
+            if state_abbrev in st_values
+            }
+
+        return cls(icpsr_to_state=icpsr_to_state)
+
+
+    @property
+    def icpsrs_sorted(self) -> np.ndarray:
+        """Sorted ICPSRs of all members (int64). Built on first use together with state_idxs_sorted - icpsr_to_state must not be modified afterwards.
+        """        
+        return self._lookup_arrays()[0]
+
+
+    @property
+    def state_idxs_sorted(self) -> np.ndarray:
+        """State index (see ST_TO_IDX) of each member in icpsrs_sorted (int8)
+        """        
+        return self._lookup_arrays()[1]
+
+
+    def _lookup_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        lookup = self.__dict__.get("_lookup")
+        if lookup is None:
+            icpsrs = np.fromiter(self.icpsr_to_state.keys(), dtype=np.int64, count=len(self.icpsr_to_state))
+            state_idxs = np.fromiter((ST_TO_IDX[st] for st in self.icpsr_to_state.values()), dtype=np.int8, count=len(self.icpsr_to_state))
+            order = np.argsort(icpsrs)
+            lookup = (icpsrs[order], state_idxs[order])
+            self.__dict__["_lookup"] = lookup
+        return lookup
+
+
+    def state_idxs(self, icpsrs: np.ndarray) -> np.ndarray:
+        """State index (see ST_TO_IDX) of each member, looked up with one binary search over the sorted ICPSRs
+
+        Args:
+            icpsrs (np.ndarray): ICPSRs of the members
+
+        Returns:
+            np.ndarray: State indexes (int8), STATE_IDX_MISSING for members not in the members csv
+        """        
+        icpsrs = np.asarray(icpsrs, dtype=np.int64)
+        icpsrs_sorted, state_idxs_sorted = self._lookup_arrays()
+        if len(icpsrs_sorted) == 0:
+            return np.full(len(icpsrs), STATE_IDX_MISSING, dtype=np.int8)
+        idxs = np.minimum(np.searchsorted(icpsrs_sorted, icpsrs), len(icpsrs_sorted) - 1)
+        return np.where(icpsrs_sorted[idxs] == icpsrs, state_idxs_sorted[idxs], STATE_IDX_MISSING).astype(np.int8)
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a dataframe with columns icpsr and state_abbrev
+
+        Returns:
+            pd.DataFrame: Dataframe
+        """        
+        return pd.DataFrame({
+            "icpsr": np.fromiter(self.icpsr_to_state.keys(), dtype=np.int32, count=len(self.icpsr_to_state)),
+            "state_abbrev": [ st.value for st in self.icpsr_to_state.values() ]
+            })
+
+
+@dataclass
+class MemberTable:
+    """Attributes of members (state, party, ...) stored column-wise, one row per (congress, member) sorted by (congress, icpsr). 
+    Keyed by congress because the same member can change state or party between congresses, and all-congress voteview files have one row per congress for each member.
+    """    
+
+    congress: np.ndarray
+    "Congress of each row (int16)"
+
+    icpsr: np.ndarray
+    "ICPSR of each row (int32)"
+
+    columns: Dict[str, np.ndarray]
+    "Attribute name to the value for each row"
+
+
+    # Columns of the voteview members csv kept by default
+    DEFAULT_COLUMNS = [ "state_abbrev", "party_code", "district_code", "bioname" ]
+
+
+    def __post_init__(self):
+        self._keys = member_key(self.congress, self.icpsr)
+        assert (np.diff(self._keys) > 0).all(), "Rows must be sorted by (congress, icpsr) without duplicates"
+
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, columns: Optional[List[str]] = None) -> "MemberTable":
+        """Construct from a dataframe with the voteview members columns. If a member has several rows in a congress (e.g. in both chambers), the last one is kept.
+
+        Args:
+            df (pd.DataFrame): Dataframe with columns congress, icpsr and the attribute columns
+            columns (Optional[List[str]], optional): Attribute columns to keep. Defaults to None, which keeps the columns in DEFAULT_COLUMNS that are in the dataframe.
+
+        Returns:
+            MemberTable: Member table
+        """        
+        if columns is None:
+            columns = [ col for col in cls.DEFAULT_COLUMNS if col in df.columns ]
+        df = df.drop_duplicates(subset=["congress", "icpsr"], keep="last").sort_values(["congress", "icpsr"])
+        return cls(
+            congress=df["congress"].to_numpy(dtype=VOTES_CSV_DTYPES["congress"]),
+            icpsr=df["icpsr"].to_numpy(dtype=VOTES_CSV_DTYPES["icpsr"]),
+            columns={ col: df[col].to_numpy() for col in columns }
+            )
+
+
+    def __len__(self) -> int:
+        return len(self.icpsr)
+
+
+    @property
+    def congresses(self) -> List[int]:
+        """Congresses in the table, sorted
+        """        
+        return np.unique(self.congress).tolist()
+
+
+    def rows(self, icpsrs: np.ndarray, congress: Union[int, np.ndarray]) -> np.ndarray:
+        """Row of each member, looked up with one binary search over the sorted (congress, icpsr) keys
+
+        Args:
+            icpsrs (np.ndarray): ICPSRs of the members
+            congress (Union[int, np.ndarray]): Congress, or the congress of each member
+
+        Returns:
+            np.ndarray: Rows (int64), -1 for members not in the table in that congress
+        """        
+        keys = member_key(np.broadcast_to(congress, np.shape(icpsrs)), icpsrs)
+        if len(self._keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        idxs = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        return np.where(self._keys[idxs] == keys, idxs, -1)
+
+
+    def take(self, column: str, icpsrs: np.ndarray, congress: Union[int, np.ndarray]) -> np.ndarray:
+        """Attribute value of each member
+
+        Args:
+            column (str): Attribute
+            icpsrs (np.ndarray): ICPSRs of the members
+            congress (Union[int, np.ndarray]): Congress, or the congress of each member
+
+        Returns:
+            np.ndarray: Values, NaN (as float or object) for members not in the table in that congress
+        """        
+        assert column in self.columns, f"Column {column} not in member table, only {list(self.columns.keys())}"
+        rows = self.rows(icpsrs, congress)
+        values = self.columns[column]
+        missing = rows < 0
+        if not missing.any():
+            return values[rows]
+        dtype = values.dtype if values.dtype.kind in "fO" else float if values.dtype.kind in "biu" else object
+        taken = values[np.maximum(rows, 0)].astype(dtype)
+        taken[missing] = np.nan
+        return taken
+
+
+    def state_idxs(self, icpsrs: np.ndarray, congress: Union[int, np.ndarray]) -> np.ndarray:
+        """State index (see ST_TO_IDX) of each member from the state_abbrev column
+
+        Args:
+            icpsrs (np.ndarray): ICPSRs of the members
+            congress (Union[int, np.ndarray]): Congress, or the congress of each member
+
+        Returns:
+            np.ndarray: State indexes (int8), STATE_IDX_MISSING for members not in the table in that congress or not in a state
+        """        
+        # Categories in the order of ST_TO_IDX, so the codes are state indexes, and -1 = STATE_IDX_MISSING for anything else
+        codes = pd.Categorical(self.take("state_abbrev", icpsrs, congress), categories=[ st.value for st in St ]).codes
+        return codes.astype(np.int8)
+
+
+    def group_idxs(self, icpsrs: np.ndarray, congress: Union[int, np.ndarray], by: List[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+        """Group members by the values of one or more attributes. Members not in the table form a group with missing values.
+
+        Args:
+            icpsrs (np.ndarray): ICPSRs of the members
+            congress (Union[int, np.ndarray]): Congress, or the congress of each member
+            by (List[str]): Attributes to group by
+
+        Returns:
+            Tuple[np.ndarray, pd.DataFrame]: Group index of each member (int64), and the attribute values of each group, one row per group index
+        """        
+        df = pd.DataFrame({ col: self.take(col, icpsrs, congress) for col in by })
+        gb = df.groupby(by, dropna=False, sort=True)
+        group_idxs = gb.ngroup().to_numpy(dtype=np.int64)
+        groups = gb.size().reset_index()[by]
+        return group_idxs, groups
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a dataframe with columns congress, icpsr and the attribute columns
+
+        Returns:
+            pd.DataFrame: Dataframe
+        """        
+        return pd.DataFrame({ "congress": self.congress, "icpsr": self.icpsr, **self.columns })
+
+
+    def to_members(self, congress: Optional[int] = None) -> Members:
+        """Members of a state, as used by CalculateVotes
+
+        Args:
+            congress (Optional[int], optional): Congress. Defaults to None, which uses the last row of each member over all congresses like LoadVoteViewCsv.load_members.
+
+        Returns:
+            Members: Members
+        """        
+        keep = np.ones(len(self), dtype=bool) if congress is None else self.congress == congress
+        return Members.from_dataframe(pd.DataFrame({ "icpsr": self.icpsr[keep], "state_abbrev": self.columns["state_abbrev"][keep] }))
+
+
+def member_state_idxs(members: Union[Members, MemberTable], matrix: VoteMatrix) -> np.ndarray:
+    """State index of each member (column) of a vote matrix. With a MemberTable, members are looked up in the congress of the matrix.
+
+    Args:
+        members (Union[Members, MemberTable]): Members
+        matrix (VoteMatrix): Vote matrix
+
+    Returns:
+        np.ndarray: State indexes (int8), STATE_IDX_MISSING for missing members
+    """    
+    if isinstance(members, MemberTable):
+        return members.state_idxs(matrix.icpsrs, matrix.congress)
+    return members.state_idxs(matrix.icpsrs)
+
+
+@dataclass
+class RollCall(DataClassDictMixin):
+    """Rollcall
+    """    
+
+    congress: int
+    "Congress"
+
+    rollnumber: int
+    "Roll number"
+    
+    date: str
+    "Date"
+
+    yea_count: int
+    "Yea count"
+
+    nay_count: int
+    "Nay count"
+
+    bill_number: str
+    "Bill number"
+
+    vote_result: str
+    "Vote result"
+
+    vote_desc: str
+    "Vote description"
+
+    vote_question: str
+    "Vote question"
+
+
+@dataclass
+class RollCallsAll(DataClassDictMixin):
+    """All rollcalls for all congresses, indexed by congress and rollnumber
+    """    
+
+    congress_to_rollnumber_to_rollcall: Dict[int, Dict[int, RollCall]] = field(default_factory=dict)
+    "Congress to roll number to rollcall"
+
+    @property
+    def no_congresses(self):
+        """Number of congresses
+        """        
+        return len(self.congress_to_rollnumber_to_rollcall)
+
+    @property
+    def no_rollcalls(self):
+        """Number of rollcalls
+        """        
+        return sum([ len(rollnumber_to_rollcall) for rollnumber_to_rollcall in self.congress_to_rollnumber_to_rollcall.values() ])
+
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame) -> "RollCallsAll":
+        """Construct from a dataframe with (at least) the columns of RollCall
+
+        Args:
+            df (pd.DataFrame): Dataframe, one row per rollcall
+
+        Returns:
+            RollCallsAll: Rollcalls
+        """        
+        duplicated = df.duplicated(subset=["congress", "rollnumber"])
+        assert not duplicated.any(), f"Found {duplicated.sum()} duplicate rows for (congress, rollnumber), e.g. {df[duplicated][['congress','rollnumber']].iloc[0].tolist()}"
+
+        names = [ f.name for f in fields(RollCall) ]
+        rca = cls()
+        for row in zip(*[ df[name].tolist() for name in names ]):
+            rc = RollCall(**dict(zip(names, row)))
+            rca.congress_to_rollnumber_to_rollcall.setdefault(rc.congress, {})[rc.rollnumber] = rc
+        return rca
+
+
+    def select(self, rolls: Iterable[Tuple[int,int]]) -> "RollCallsAll":
+        """Select rollcalls. Rollcalls that do not exist are skipped.
+
+        Args:
+            rolls (Iterable[Tuple[int,int]]): (congress, rollnumber) of the rollcalls to select
+
+        Returns:
+            RollCallsAll: Selected rollcalls
+        """        
+        rca = RollCallsAll()
+        for congress, rollnumber in rolls:
+            rc = self.congress_to_rollnumber_to_rollcall.get(congress, {}).get(rollnumber)
+            if rc is not None:
+                rca.congress_to_rollnumber_to_rollcall.setdefault(congress, {})[rollnumber] = rc
+        return rca
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a dataframe with the columns of RollCall, one row per rollcall
+
+        Returns:
+            pd.DataFrame: Dataframe
+        """        
+        names = [ f.name for f in fields(RollCall) ]
+        rows = [ 
+            [ getattr(rc, name) for name in names ]
+            for rollnumber_to_rollcall in self.congress_to_rollnumber_to_rollcall.values()
+            for rc in rollnumber_to_rollcall.values()
+            ]
+        return pd.DataFrame(rows, columns=names)
+
+
+@dataclass
+class InconsistentRoll(DataClassDictMixin):
+    """Rollcall whose yea/nay counts do not match the votes
+    """    
+
+    congress: int
+    "Congress"
+
+    rollnumber: int
+    "Roll number"
+
+    yea_count_rollcall: int
+    "Yea count in the rollcall"
+
+    nay_count_rollcall: int
+    "Nay count in the rollcall"
+
+    yea_count_votes: int
+    "Yea count from the votes"
+
+    nay_count_votes: int
+    "Nay count from the votes"
+
+
+@dataclass
+class ConsistencyReport(DataClassDictMixin):
+    """Report from checking votes against rollcalls
+    """    
+
+    no_rollcalls: int
+    "Number of rollcalls checked"
+
+    repaired: List[InconsistentRoll] = field(default_factory=list)
+    "Rollcalls that were inconsistent, but became consistent after removing votes of members not in the members csv. Counts are before the repair."
+
+    inconsistent: List[InconsistentRoll] = field(default_factory=list)
+    "Rollcalls that are inconsistent even after removing votes of members not in the members csv. Counts are after the repair."
+
+    rolls_missing_rollcall: List[Tuple[int,int]] = field(default_factory=list)
+    "(congress, rollnumber) of rollcalls that have votes but no rollcall"
+
+    rolls_missing_votes: List[Tuple[int,int]] = field(default_factory=list)
+    "(congress, rollnumber) of rollcalls that have a rollcall but no votes"
+
+
+    @property
+    def is_consistent(self) -> bool:
+        """True if votes and rollcalls are consistent (after repairs)
+        """        
+        return len(self.inconsistent) == 0 and len(self.rolls_missing_rollcall) == 0 and len(self.rolls_missing_votes) == 0
+
+
+    def summary(self, max_rolls: int = 10) -> str:
+        """Human readable summary
+
+        Args:
+            max_rolls (int, optional): Max number of rollcalls to list for each problem. Defaults to 10.
+
+        Returns:
+            str: Summary
+        """        
+        lines = [ f"Checked {self.no_rollcalls} rollcalls: {len(self.repaired)} repaired, {len(self.inconsistent)} inconsistent, {len(self.rolls_missing_rollcall)} missing rollcall, {len(self.rolls_missing_votes)} missing votes." ]
+        for ir in self.inconsistent[:max_rolls]:
+            lines.append(f"Rollcall (congress={ir.congress}, rollnumber={ir.rollnumber}) is not consistent with votes. Yea rollcalls: {ir.yea_count_rollcall} vs votes: {ir.yea_count_votes}. Nay rollcalls: {ir.nay_count_rollcall} vs votes: {ir.nay_count_votes}")
+        for congress, rollnumber in self.rolls_missing_rollcall[:max_rolls]:
+            lines.append(f"Rollcall (congress={congress}, rollnumber={rollnumber}) has votes but no rollcall")
+        for congress, rollnumber in self.rolls_missing_votes[:max_rolls]:
+            lines.append(f"Rollcall (congress={congress}, rollnumber={rollnumber}) has a rollcall but no votes")
+        return "\n".join(lines)
+
+
+def check_consistency(votes: VotesColumnar, rollcalls: RollCallsAll, members: Union[Members, MemberTable]) -> Tuple[VotesColumnar, ConsistencyReport]:
+    """Check that the yea and nay counts of the votes match the rollcalls. For inconsistent rollcalls, votes of members not in the members csv are removed and the rollcall is checked again.
+    All rollcalls are checked, and every problem is reported.
+
+    Args:
+        votes (VotesColumnar): Votes
+        rollcalls (RollCallsAll): Rollcalls
+        members (Union[Members, MemberTable]): Members. With a MemberTable, a member must be in the table in the congress of the vote.
+
+    Returns:
+        Tuple[VotesColumnar, ConsistencyReport]: Repaired votes, sorted by (congress, rollnumber), and the report
+    """    
+    votes = votes.drop_duplicate_votes().sort_by_roll()
+
+    # Rollcall of each vote
+    starts, ends = votes.roll_bounds()
+    keys_votes = roll_key(votes.congress[starts], votes.rollnumber[starts])
+    roll_idxs = np.repeat(np.arange(len(starts)), ends - starts)
+
+    # Rollcall counts, sorted by key
+    rcs = [ rc for rollnumber_to_rollcall in rollcalls.congress_to_rollnumber_to_rollcall.values() for rc in rollnumber_to_rollcall.values() ]
+    keys_rollcalls = roll_key(
+        np.array([ rc.congress for rc in rcs ], dtype=np.int64), 
+        np.array([ rc.rollnumber for rc in rcs ], dtype=np.int64)
+        )
+    order = np.argsort(keys_rollcalls)
+    keys_rollcalls = keys_rollcalls[order]
+    yea_rollcalls = np.array([ rc.yea_count for rc in rcs ], dtype=np.int64)[order]
+    nay_rollcalls = np.array([ rc.nay_count for rc in rcs ], dtype=np.int64)[order]
+
+    report = ConsistencyReport(no_rollcalls=len(keys_votes))
+    def _key_to_tuple(key: int) -> Tuple[int,int]:
+        return (int(key >> 24), int(key & 0xFFFFFF))
+    report.rolls_missing_votes = [ _key_to_tuple(key) for key in np.setdiff1d(keys_rollcalls, keys_votes) ]
+    report.rolls_missing_rollcall = [ _key_to_tuple(key) for key in np.setdiff1d(keys_votes, keys_rollcalls) ]
+
+    # Rollcall counts for each rollcall in the votes. Rolls without a rollcall are reported above and never counted as consistent
+    if len(keys_rollcalls) > 0:
+        idxs = np.minimum(np.searchsorted(keys_rollcalls, keys_votes), len(keys_rollcalls)-1)
+        has_rollcall = keys_rollcalls[idxs] == keys_votes
+        yea_expected = np.where(has_rollcall, yea_rollcalls[idxs], -1)
+        nay_expected = np.where(has_rollcall, nay_rollcalls[idxs], -1)
+    else:
+        has_rollcall = np.zeros(len(keys_votes), dtype=bool)
+        yea_expected = nay_expected = np.full(len(keys_votes), -1, dtype=np.int64)
+
+    def _count(keep: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        yea = np.bincount(roll_idxs, weights=keep & (votes.cast_code == CastCode.YEA.value), minlength=len(starts)).astype(np.int64)
+        nay = np.bincount(roll_idxs, weights=keep & (votes.cast_code == CastCode.NAY.value), minlength=len(starts)).astype(np.int64)
+        return yea, nay
+
+    keep = np.ones(len(votes), dtype=bool)
+    yea, nay = _count(keep)
+    inconsistent = has_rollcall & ((yea != yea_expected) | (nay != nay_expected))
+
+    # Only for inconsistent rollcalls, remove votes of members who are not in the members csv
+    if inconsistent.any():
+        state_idxs = members.state_idxs(votes.icpsr, votes.congress) if isinstance(members, MemberTable) else members.state_idxs(votes.icpsr)
+        keep = ~inconsistent[roll_idxs] | (state_idxs != STATE_IDX_MISSING)
+        yea_repaired, nay_repaired = _count(keep)
+        still_inconsistent = inconsistent & ((yea_repaired != yea_expected) | (nay_repaired != nay_expected))
+
+        for idx in np.flatnonzero(inconsistent).tolist():
+            congress, rollnumber = _key_to_tuple(keys_votes[idx])
+            if still_inconsistent[idx]:
+                yea_votes, nay_votes, dest = yea_repaired[idx], nay_repaired[idx], report.inconsistent
+            else:
+                yea_votes, nay_votes, dest = yea[idx], nay[idx], report.repaired
+            dest.append(InconsistentRoll(
+                congress=congress, 
+                rollnumber=rollnumber, 
+                yea_count_rollcall=int(yea_expected[idx]), 
+                nay_count_rollcall=int(nay_expected[idx]), 
+                yea_count_votes=int(yea_votes), 
+                nay_count_votes=int(nay_votes)
+                ))
+        votes = votes.take(keep)
+
+    return votes, report
+
+
+class LoadVoteViewCsv:
+    """Helper class to load voteview csv files
+    """    
+
+    
+    def __init__(self, 
+        votes_csv: Optional[str] = None, 
+        rollcalls_csv: Optional[str] = None, 
+        members_csv: Optional[str] = None,
+        chunksize: int = 1_000_000,
+        cache_dir: Optional[str] = None
+        ):
+        """Constructor
+
+        Args:
+            votes_csv (Optional[str], optional): Votes CSV. Defaults to None.
+            rollcalls_csv (Optional[str], optional): Rollcalls CSV. Defaults to None.
+            members_csv (Optional[str], optional): Members CSV. Defaults to None.
+            chunksize (int, optional): Number of rows of the votes CSV to read at a time. Peak memory while parsing is bounded by the size of one chunk plus the parsed votes. Defaults to 1,000,000.
+            cache_dir (Optional[str], optional): Directory to cache the result of load_consistency in. The cache is reused while the size, modification time and hash of all three CSVs match. Defaults to None (no caching).
+        """        
+        self.votes_csv = votes_csv
+        self.rollcalls_csv = rollcalls_csv
+        self.members_csv = members_csv
+        self.chunksize = chunksize
+        self.cache_dir = cache_dir
+
+    
+    # Version of the cache layout - bump to invalidate existing caches
+    CACHE_VERSION = 1
+
+    
+    @instrumented("LoadVoteViewCsv.load_consistency")
+    def load_consistency(self) -> Tuple[VotesAll, RollCallsAll, Members]:
+        """Load all three and ensure they are consistent. Remove votes that are inconsistent with the rollcall votes.
+        If a cache directory is set, the result is read from the cache when it is valid, and written to it otherwise.
+
+        Returns:
+            Tuple[VotesAll, RollCallsAll, Members]: Votes, rollcalls, members
+        """        
+        if self.cache_dir is not None:
+            cached = self.read_cache()
+            increment_counter("LoadVoteViewCsv.cache_hits" if cached is not None else "LoadVoteViewCsv.cache_misses")
+            if cached is not None:
+                return cached
+
+        votes, rollcalls, members = self._load_consistency_from_csv()
+
+        if self.cache_dir is not None:
+            self.write_cache(votes, rollcalls, members)
+        return votes, rollcalls, members
+
+
+    @property
+    def cache_entry_dir(self) -> str:
+        """Directory of the cache entry for these CSVs
+        """        
+        assert self.cache_dir is not None, "self.cache_dir is None"
+        assert self.votes_csv is not None and self.rollcalls_csv is not None and self.members_csv is not None, "All three CSVs are required for caching"
+        key = "\n".join([ os.path.abspath(path) for path in [self.votes_csv, self.rollcalls_csv, self.members_csv] ])
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest()[:16])
+
+
+    def _source_csvs(self) -> Dict[str, str]:
+        assert self.votes_csv is not None and self.rollcalls_csv is not None and self.members_csv is not None, "All three CSVs are required for caching"
+        return { "votes": self.votes_csv, "rollcalls": self.rollcalls_csv, "members": self.members_csv }
+
+
+    def read_cache(self) -> Optional[Tuple[VotesAll, RollCallsAll, Members]]:
+        """Read the result of load_consistency from the cache
+
+        Returns:
+            Optional[Tuple[VotesAll, RollCallsAll, Members]]: Votes, rollcalls, members, or None if there is no valid cache entry
+        """        
+        dir_entry = self.cache_entry_dir
+        fname_manifest = os.path.join(dir_entry, "manifest.json")
+        if not os.path.exists(fname_manifest):
+            return None
+        with open(fname_manifest, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != self.CACHE_VERSION:
+            logger.debug(f"Cache {dir_entry} has a different version - ignoring")
+            return None
+        for name, path in self._source_csvs().items():
+            fingerprint = FileFingerprint.from_dict(manifest["sources"][name])
+            if not fingerprint_matches(path, fingerprint):
+                logger.debug(f"Cache {dir_entry} is stale: {path} has changed")
+                return None
+
+        df_votes = read_table(os.path.join(dir_entry, "votes"))
+        df_rollcalls = read_table(os.path.join(dir_entry, "rollcalls"))
+        df_members = read_table(os.path.join(dir_entry, "members"))
+        if df_votes is None or df_rollcalls is None or df_members is None:
+            return None
+        logger.debug(f"Loaded votes, rollcalls and members from cache {dir_entry}")
+        return (
+            VotesColumnar.from_dataframe(df_votes).to_votes_all(), 
+            RollCallsAll.from_dataframe(df_rollcalls), 
+            Members.from_dataframe(df_members)
+            )
+
+
+    def write_cache(self, votes: VotesAll, rollcalls: RollCallsAll, members: Members):
+        """Write the result of load_consistency to the cache
+
+        Args:
+            votes (VotesAll): Votes
+            rollcalls (RollCallsAll): Rollcalls
+            members (Members): Members
+        """        
+        dir_entry = self.cache_entry_dir
+        os.makedirs(dir_entry, exist_ok=True)
+
+        # Fingerprint before writing, so that CSVs changed while writing invalidate the cache
+        sources = { name: fingerprint_file(path).to_dict() for name, path in self._source_csvs().items() }
+
+        votes_columnar = VotesColumnar.from_votes_all(votes)
+        write_table(pd.DataFrame({ col: getattr(votes_columnar, col) for col in VOTES_CSV_DTYPES.keys() }), os.path.join(dir_entry, "votes"))
+        write_table(rollcalls.to_dataframe(), os.path.join(dir_entry, "rollcalls"))
+        write_table(members.to_dataframe(), os.path.join(dir_entry, "members"))
+
+        # Write the manifest last - it marks the entry as complete
+        with open(os.path.join(dir_entry, "manifest.json"), "w") as f:
+            json.dump({ "version": self.CACHE_VERSION, "sources": sources }, f, indent=2)
+        logger.debug(f"Wrote votes, rollcalls and members to cache {dir_entry}")
+
+
+    @instrumented("LoadVoteViewCsv.load_consistency_with_report")
+    def load_consistency_with_report(self) -> Tuple[VotesAll, RollCallsAll, Members, ConsistencyReport]:
+        """Load all three and check they are consistent. Remove votes that are inconsistent with the rollcall votes. Unlike load_consistency, inconsistencies are reported rather than raised, and the cache is not used.
+
+        Returns:
+            Tuple[VotesAll, RollCallsAll, Members, ConsistencyReport]: Votes, rollcalls, members, report of all inconsistencies
+        """        
+        votes = self.load_votes_columnar()
+        rollcalls = self.load_rollcalls()
+        members = self.load_members()
+        votes, report = check_consistency(votes, rollcalls, members)
+        return votes.to_votes_all(), rollcalls, members, report
+
+
+    def _load_consistency_from_csv(self) -> Tuple[VotesAll, RollCallsAll, Members]:
+        votes, rollcalls, members, report = self.load_consistency_with_report()
+        if len(report.repaired) > 0:
+            logger.debug(f"Removed votes of members not in the members csv to repair {len(report.repaired)} rollcalls")
+        if not report.is_consistent:
+            raise RuntimeError(report.summary())
+        return votes, rollcalls, members
+
+
+    @instrumented("LoadVoteViewCsv.load_member_table")
+    def load_member_table(self, columns: Optional[List[str]] = None) -> MemberTable:
+        """Load members with all their attributes column-wise
+
+        Args:
+            columns (Optional[List[str]], optional): Attribute columns to keep. Defaults to None (see MemberTable.from_dataframe).
+
+        Returns:
+            MemberTable: Member table
+        """        
+        assert self.members_csv is not None, "self.members_csv is None"
+        df = pd.read_csv(self.members_csv)
+        return MemberTable.from_dataframe(df, columns=columns)
+
+
+    @instrumented("LoadVoteViewCsv.load_members")
+    def load_members(self) -> Members:
+        """Load members
+
+        Returns:
+            Members: Members
+        """        
+
+        # Load csv
+        assert self.members_csv is not None, "self.members_csv is None"
+        df = pd.read_csv(self.members_csv)
+        return Members.from_dataframe(df)
+ 
+
+    def iter_votes_chunks(self, min_congress: Optional[int] = None) -> Iterator[VotesColumnar]:
+        """Stream the votes CSV in chunks of at most `chunksize` rows. Only the columns in VOTES_CSV_USECOLS are read, with the compact dtypes in VOTES_CSV_DTYPES.
+
+        Args:
+            min_congress (Optional[int], optional): If given, drop votes of earlier congresses from each chunk. Defaults to None.
+
+        Returns:
+            Iterator[VotesColumnar]: Votes in each chunk
+        """        
+        assert self.votes_csv is not None, "self.votes_csv is None"
+        with pd.read_csv(
+            self.votes_csv, 
+            usecols=VOTES_CSV_USECOLS, 
+            dtype=VOTES_CSV_DTYPES, 
+            chunksize=self.chunksize
+            ) as reader:
+            for df in reader:
+                increment_counter("LoadVoteViewCsv.votes_rows_parsed", len(df))
+                votes_chunk = VotesColumnar.from_dataframe(df)
+                if min_congress is not None:
+                    votes_chunk = votes_chunk.take(votes_chunk.congress >= min_congress)
+                yield votes_chunk
+
+
+    @instrumented("LoadVoteViewCsv.load_votes_columnar")
+    def load_votes_columnar(self, min_congress: Optional[int] = None) -> VotesColumnar:
+        """Load votes column-wise
+
+        Args:
+            min_congress (Optional[int], optional): If given, only load votes of this and later congresses. Defaults to None.
+
+        Returns:
+            VotesColumnar: Votes
+        """        
+        return VotesColumnar.concatenate(list(self.iter_votes_chunks(min_congress=min_congress)))
+
+
+    @instrumented("LoadVoteViewCsv.load_votes")
+    def load_votes(self) -> VotesAll:
+        """Load votes. The CSV is streamed in chunks and aggregated incrementally.
+
+        Returns:
+            VotesAll: Votes
+        """        
+        rva = VotesAll()
+        for votes_chunk in self.iter_votes_chunks():
+            votes_chunk.add_to_votes_all(rva)
+        return rva
+
+
+    @instrumented("LoadVoteViewCsv.load_rollcalls")
+    def load_rollcalls(self) -> RollCallsAll:
+        """Load rollcalls
+
+        Returns:
+            RollCallsAll: Rollcalls
+        """        
+
+        # Load csv
+        assert self.rollcalls_csv is not None, "self.rollcalls_csv is None"
+        df = pd.read_csv(self.rollcalls_csv)
+        return RollCallsAll.from_dataframe(df)
+
+
+class Decision(Enum):
+    """Decision enum
+    """    
+    PASS = "pass"
+    "Pass"
+
+    FAIL = "fail"
+    "Fail"
+
+
+@dataclass
+class VoteResults(DataClassDictMixin):
+    """Vote results
+    """
+
+    congress: int
+    "Congress"
+
+    rollnumber: int
+    "Roll number"
+
+    castcode_to_count: Dict[CastCode, float]
+    "Castcode to count"
+
+
+    @property
+    def yea_count(self):
+        """Count of yea votes
+        """        
+        return self.castcode_to_count.get(CastCode.YEA,0)
+
+
+    @property
+    def nay_count(self):
+        """Count of nay votes
+        """        
+        return self.castcode_to_count.get(CastCode.NAY,0)
+
+
+    @property
+    def yea_count_all(self):
+        """Count of all yea votes
+        """        
+        return sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.yea_list() ])
+
+    
+    @property
+    def nay_count_all(self):
+        """Count of all nay votes
+        """        
+        return sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.nay_list() ])
+
+
+    @property
+    def majority_decision(self) -> Decision:
+        """Majority decision
+        """        
+        if self.castcode_to_count.get(CastCode.YEA,0) > self.castcode_to_count.get(CastCode.NAY,0):
+            return Decision.PASS
+        else:
+            return Decision.FAIL
+
+
+    @property
+    def majority_decision_all_yea_nay(self) -> Decision:
+        """Majority decision
+        """        
+        yea = sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.yea_list() ])
+        nay = sum([ self.castcode_to_count.get(castcode,0) for castcode in CastCode.nay_list() ])
+        if yea > nay:
+            return Decision.PASS
+        else:
+            return Decision.FAIL
+
+
+@dataclass
+class VoteResultsFractional(DataClassDictMixin):
+    """Fractional vote results
+    """    
+
+    vote_results: VoteResults
+    "Vote results"
+
+    st_to_reps_fair: Dict[St, float]
+    "Fair number of representatives for each state"
+
+    st_to_reps_actual: Dict[St, float]
+    "Actual number of representatives for each state"
+
+
+@dataclass
+class RescaleFactors(DataClassDictMixin):
+    """Factors to rescale each member's vote by to get fractional votes, for a census year and number of seats
+    """    
+
+    st_to_reps_fair: Dict[St, float]
+    "Fair number of representatives for each state (excluding DC)"
+
+    st_to_reps_actual: Dict[St, float]
+    "Actual number of representatives for each state"
+
+    st_to_rescale_factor: Dict[St, float]
+    "Rescale factor = fair / actual number of representatives for each state (excluding DC)"
+
+
+    def rescale_vector(self) -> np.ndarray:
+        """Rescale factors as an array indexed by state index (see ST_TO_IDX), with one extra trailing entry so that STATE_IDX_MISSING can be used as an index. DC and missing members have factor 1.
+
+        Returns:
+            np.ndarray: Rescale factors, length len(St) + 1
+        """        
+        vec = np.ones(len(ST_TO_IDX) + 1, dtype=float)
+        for st, factor in self.st_to_rescale_factor.items():
+            vec[ST_TO_IDX[st]] = factor
+        return vec
+
+
+def calculate_rescale_factors(census_year: Year, num_seats: int) -> RescaleFactors:
+    """Calculate the factors to rescale each member's vote by to get fractional votes. The rescale factor of a state is the fair (population proportional) number of representatives divided by the actual number assigned by the priority method.
+
+    Args:
+        census_year (Year): Census year
+        num_seats (int): Number of seats in the House of Representatives
+
+    Returns:
+        RescaleFactors: Rescale factors
+    """    
+    house = HouseOfReps(
+        year=census_year, 
+        pop_type=PopType.APPORTIONMENT,
+        no_voting_house_seats=num_seats
+        )
+
+    # Calculate population percentage of each state
+    total_pop = house.get_total_us_pop(sts_exclude=[St.DISTRICT_OF_COLUMBIA])
+    st_to_pop_perc: Dict[St, float] = {}
+    for st, state in house.states.items():
+        if st != St.DISTRICT_OF_COLUMBIA:
+            st_to_pop_perc[st] = state.pop / total_pop
+
+    # Check sum to 1
+    assert abs(sum(st_to_pop_perc.values()) - 1) < 1e-6, "Sum of state population percentages is not 1."
+
+    # Calculate the fair number of representatives for each state
+    st_to_reps_fair: Dict[St, float] = { st: pop_perc * num_seats for st, pop_perc in st_to_pop_perc.items() }
+
+    # Calculate the actual number of representatives for each state
+    house.assign_house_seats_priority()
+    st_to_reps_actual: Dict[St, float] = { st: state.no_reps.voting for st, state in house.states.items() }
+
+    # Calculate the rescaling factor for each state
+    # Each vote should be rescaled by this factor
+    st_to_rescale_factor: Dict[St, float] = { st: st_to_reps_fair[st] / st_to_reps_actual[st] for st in st_to_reps_fair.keys() }
+
+    return RescaleFactors(
+        st_to_reps_fair=st_to_reps_fair,
+        st_to_reps_actual=st_to_reps_actual,
+        st_to_rescale_factor=st_to_rescale_factor
+        )
+
+
+class RescaleFactorsProvider:
+    """Memoizes calculate_rescale_factors by (census year, number of seats). The rescale factors depend only on these, so all rollcalls of a congress share one apportionment.
+    """    
+
+
+    def __init__(self):
+        """Constructor
+        """        
+        self._cache: Dict[Tuple[Year, int], RescaleFactors] = {}
+        self._cache_vector: Dict[Tuple[Year, int], np.ndarray] = {}
+        self._cache_method: Dict[Tuple[Year, ApportionmentMethod, int], np.ndarray] = {}
+        self.no_calculations = 0
+
+
+    def get(self, census_year: Year, num_seats: int) -> RescaleFactors:
+        """Get the rescale factors, calculating them on first use
+
+        Args:
+            census_year (Year): Census year
+            num_seats (int): Number of seats in the House of Representatives
+
+        Returns:
+            RescaleFactors: Rescale factors. Shared between callers - do not modify.
+        """        
+        key = (census_year, int(num_seats))
+        rescale_factors = self._cache.get(key)
+        if rescale_factors is None:
+            rescale_factors = calculate_rescale_factors(census_year, int(num_seats))
+            self._cache[key] = rescale_factors
+            self.no_calculations += 1
+            increment_counter("RescaleFactorsProvider.calculations")
+        return rescale_factors
+
+
+    def get_rescale_vector(self, census_year: Year, num_seats: int) -> np.ndarray:
+        """Rescale factors as an array indexed by state index, see RescaleFactors.rescale_vector. Memoized like get.
+
+        Args:
+            census_year (Year): Census year
+            num_seats (int): Number of seats in the House of Representatives
+
+        Returns:
+            np.ndarray: Rescale factors, length len(St) + 1. Shared between callers - do not modify.
+        """        
+        key = (census_year, int(num_seats))
+        vec = self._cache_vector.get(key)
+        if vec is None:
+            vec = self.get(census_year, num_seats).rescale_vector()
+            vec.flags.writeable = False
+            self._cache_vector[key] = vec
+        return vec
+
+
+    def get_method_rescale_vector(self, census_year: Year, method: ApportionmentMethod, num_seats: int) -> np.ndarray:
+        """Rescale vector for a counterfactual apportionment: the number of seats each state would have under the method and house size, divided by the actual number of seats (Huntington-Hill, 435 seats).
+
+        Args:
+            census_year (Year): Census year
+            method (ApportionmentMethod): Apportionment method
+            num_seats (int): Number of seats in the House of Representatives
+
+        Returns:
+            np.ndarray: Rescale factors indexed by state index, as in RescaleFactors.rescale_vector. Shared between callers - do not modify.
+        """        
+        key = (census_year, method, int(num_seats))
+        vec = self._cache_method.get(key)
+        if vec is None:
+            house = HouseOfReps(year=census_year, pop_type=PopType.APPORTIONMENT, no_voting_house_seats=int(num_seats))
+            house.assign_house_seats_method(method)
+            st_to_reps_actual = self.get(census_year, 435).st_to_reps_actual
+            vec = np.ones(len(ST_TO_IDX) + 1, dtype=float)
+            for st in St.all_except_dc():
+                vec[ST_TO_IDX[st]] = house.states[st].no_reps.voting / st_to_reps_actual[st]
+            vec.flags.writeable = False
+            self._cache_method[key] = vec
+            self.no_calculations += 1
+        return vec
+
+
+    def clear(self):
+        """Clear the cache
+        """        
+        self._cache.clear()
+        self._cache_vector.clear()
+        self._cache_method.clear()
+
+
+# Rescale factors provider shared by all CalculateVotes and CalculateVotesBatch instances by default
+RESCALE_FACTORS_PROVIDER = RescaleFactorsProvider()
+
+
+class CalculateVotes:
+    """Helper class to calculate votes
+    """    
+
+
+    @dataclass
+    class Options(DataClassDictMixin):
+        """Options for CalculateVotes
+        """        
+
+        use_num_votes_as_num_seats: bool = False
+        "Use the number of votes as the number of seats in the House of Representatives. Otherwise uses 435."
+
+        skip_castcodes: List[CastCode] = field(default_factory=lambda: [CastCode.NOT_MEMBER, CastCode.NOT_VOTING])
+        "Skip these castcodes"
+
+
+    def __init__(self,
+        votes: Votes, 
+        members: Members,
+        rollcall: RollCall,
+        options: Options = Options(),
+        rescale_factors_provider: Optional[RescaleFactorsProvider] = None
+        ):
+        """Constructor
+
+        Args:
+            votes (Votes): Votes
+            members (Members): Members
+            rollcall (RollCall): Rollcall
+            options (Options, optional): Options. Defaults to Options().
+            rescale_factors_provider (Optional[RescaleFactorsProvider], optional): Provider of rescale factors for fractional votes. Defaults to None, which uses the shared RESCALE_FACTORS_PROVIDER.
+        """        
+        self.votes = votes
+        self.members = members
+        self.rollcall = rollcall
+        self.options = options
+        self.rescale_factors_provider = rescale_factors_provider or RESCALE_FACTORS_PROVIDER
+    
+
+    @instrumented("CalculateVotes.calculate_votes")
+    def calculate_votes(self) -> VoteResults:
+        """Vote results
+
+        Returns:
+            VoteResults: Vote results
+        """        
+        castcode_to_count = {}
         for icpsr, castcode in self.votes.icpsr_to_castcode.items():
             assert isinstance(castcode, CastCode), f"castcode is not a CastCode: {castcode}"
             assert isinstance(icpsr, int), f"icpsr is not an int: {icpsr}"
@@ -529,6 +1577,7 @@ class CalculateVotes:
             )
         
 
+    @instrumented("CalculateVotes.calculate_votes_fractional")
     def calculate_votes_fractional(self) -> VoteResultsFractional:
         """Fractional vote results
 
@@ -542,67 +1591,628 @@ class CalculateVotes:
         else:
             num_seats = 435
         
-        # Calculate population percentage of each state
         assert self.votes.congress in CONGRESS_TO_CENSUS_YEAR, f"congress {self.votes.congress} not found in CONGRESS_TO_CENSUS_YEAR"
         census_year = CONGRESS_TO_CENSUS_YEAR[self.votes.congress]
-        house = HouseOfReps(
-            year=census_year, 
-            pop_type=PopType.APPORTIONMENT,
-            no_voting_house_seats=num_seats
+        rescale_factors = self.rescale_factors_provider.get(census_year, num_seats)
+
+        # Castcode and state index of each vote
+        n = len(self.votes.icpsr_to_castcode)
+        icpsrs = np.fromiter(self.votes.icpsr_to_castcode.keys(), dtype=np.int64, count=n)
+        castcodes = np.fromiter(map(_castcode_value, self.votes.icpsr_to_castcode.values()), dtype=np.int64, count=n)
+        state_idxs = self.members.state_idxs(icpsrs)
+
+        # Rescale factor of each vote. Missing members (STATE_IDX_MISSING indexes the trailing entry) and District of Columbia count 1
+        vote_values = self.rescale_factors_provider.get_rescale_vector(census_year, num_seats)[state_idxs]
+
+        # Add to count = rescale_factor (not 1), keeping castcodes in the order they first appear
+        counted = ~np.isin(castcodes, [ castcode.value for castcode in self.options.skip_castcodes ])
+        castcodes, vote_values = castcodes[counted], vote_values[counted]
+        counts = np.bincount(castcodes, weights=vote_values, minlength=len(CastCode))
+        castcodes_unique, first = np.unique(castcodes, return_index=True)
+        castcode_to_count: Dict[CastCode, float] = {
+            CASTCODE_FROM_INT[castcode]: counts[castcode].item()
+            for castcode in castcodes_unique[np.argsort(first)].tolist()
+            }
+
+        vr = VoteResults(
+            congress=self.votes.congress,
+            rollnumber=self.votes.rollnumber,
+            castcode_to_count=castcode_to_count
+            )
+        return VoteResultsFractional(
+            vote_results=vr,
+            st_to_reps_fair=dict(rescale_factors.st_to_reps_fair),
+            st_to_reps_actual=dict(rescale_factors.st_to_reps_actual)
             )
-        st_to_pop_perc: Dict[St, float] = {}
-        for st, state in house.states.items():
-            if st != St.DISTRICT_OF_COLUMBIA:
-                st_to_pop_perc[st] = state.pop / house.get_total_us_pop(sts_exclude=[St.DISTRICT_OF_COLUMBIA])
 
-        # Check sum to 1
-        assert abs(sum(st_to_pop_perc.values()) - 1) < 1e-6, "Sum of state population percentages is not 1."
 
-        # Calculate the fair number of representatives for each state
-        st_to_reps_fair: Dict[St, float] = { st: pop_perc * num_seats for st, pop_perc in st_to_pop_perc.items() }
+@dataclass
+class VoteResultsBatch:
+    """Vote results for all rollcalls of a congress
+    """    
 
-        # Calculate the actual number of representatives for each state
-        house.assign_house_seats_priority()
-        st_to_reps_actual: Dict[St, float] = { st: state.no_reps.voting for st, state in house.states.items() }
+    congress: int
+    "Congress"
 
-        # Calculate the rescaling factor for each state
-        # Each vote should be rescaled by this factor
-        st_to_rescale_factor: Dict[St, float] = { st: st_to_reps_fair[st] / st_to_reps_actual[st] for st in st_to_reps_fair.keys() }
+    rollnumbers: np.ndarray
+    "Roll numbers, one per row of counts"
 
-        # Calculate the rescaled vote results
-        castcode_to_count: Dict[CastCode, float] = {}
-        for icpsr, castcode in self.votes.icpsr_to_castcode.items():
-            assert isinstance(castcode, CastCode), f"castcode is not a CastCode: {castcode}"
-            assert isinstance(icpsr, int), f"icpsr is not an int: {icpsr}"
+    counts: np.ndarray
+    "Count of each castcode, shape (no. rollcalls, no. castcodes). Columns are indexed by castcode value."
 
-            # Check castcode
-            if castcode in self.options.skip_castcodes:
-                continue
+    present: np.ndarray
+    "Whether each castcode was cast at least once in each rollcall (after skipping castcodes), shape (no. rollcalls, no. castcodes)"
 
-            # Get state of this member's vote
-            if not icpsr in self.members.icpsr_to_state:
-                # Missing member - use 1 for their rescale factor
-                vote_value = 1.0
-            else:
-                st = self.members.icpsr_to_state[icpsr]
 
-                # Get rescale factor for this state
-                if st == St.DISTRICT_OF_COLUMBIA:
-                    # Use 1 for District of Columbia
-                    vote_value = 1.0
-                else:
-                    vote_value = st_to_rescale_factor[st]
+    @property
+    def yea_count(self) -> np.ndarray:
+        """Count of yea votes for each rollcall
+        """        
+        return self.counts[:, CastCode.YEA.value]
 
-            # Add to count = rescale_factor (not 1)
-            castcode_to_count[castcode] = castcode_to_count.get(castcode, 0.0) + vote_value
 
-        vr = VoteResults(
-            congress=self.votes.congress,
-            rollnumber=self.votes.rollnumber,
-            castcode_to_count=castcode_to_count
+    @property
+    def nay_count(self) -> np.ndarray:
+        """Count of nay votes for each rollcall
+        """        
+        return self.counts[:, CastCode.NAY.value]
+
+
+    @property
+    def majority_pass(self) -> np.ndarray:
+        """Whether the majority decision of each rollcall is Decision.PASS
+        """        
+        return self.yea_count > self.nay_count
+
+
+    def vote_results(self, idx: int) -> VoteResults:
+        """Vote results for one rollcall
+
+        Args:
+            idx (int): Row of the rollcall
+
+        Returns:
+            VoteResults: Vote results
+        """        
+        counts = self.counts[idx]
+        return VoteResults(
+            congress=self.congress,
+            rollnumber=int(self.rollnumbers[idx]),
+            castcode_to_count={ 
+                CASTCODE_FROM_INT[castcode]: counts[castcode].item() 
+                for castcode in np.flatnonzero(self.present[idx]).tolist() 
+                }
             )
-        return VoteResultsFractional(
-            vote_results=vr,
-            st_to_reps_fair=st_to_reps_fair,
-            st_to_reps_actual=st_to_reps_actual
-            )
\ No newline at end of file
+
+
+@dataclass
+class CounterfactualDecisions:
+    """Majority decisions of rollcalls under counterfactual apportionments
+    """    
+
+    congress: int
+    "Congress"
+
+    rollnumbers: np.ndarray
+    "Roll numbers"
+
+    methods: List[ApportionmentMethod]
+    "Apportionment methods"
+
+    house_sizes: List[int]
+    "House sizes"
+
+    passed: np.ndarray
+    "Whether each rollcall passes, shape (no. methods, no. house sizes, no. rollcalls)"
+
+    passed_actual: np.ndarray
+    "Whether each rollcall passes with the actual votes, shape (no. rollcalls,)"
+
+
+    @property
+    def flipped(self) -> np.ndarray:
+        """Whether the decision is different from the actual decision, shape (no. methods, no. house sizes, no. rollcalls)
+        """        
+        return self.passed != self.passed_actual
+
+
+@dataclass
+class VoteTotalsGrouped:
+    """Yea and nay totals of every rollcall of a congress for groups of members
+    """    
+
+    congress: int
+    "Congress"
+
+    rollnumbers: np.ndarray
+    "Roll numbers"
+
+    groups: pd.DataFrame
+    "Attribute values of each group, one row per group"
+
+    yea: np.ndarray
+    "Yea count, shape (no. rollcalls, no. groups)"
+
+    nay: np.ndarray
+    "Nay count, shape (no. rollcalls, no. groups)"
+
+    yea_fractional: np.ndarray
+    "Fractional yea count, shape (no. rollcalls, no. groups)"
+
+    nay_fractional: np.ndarray
+    "Fractional nay count, shape (no. rollcalls, no. groups)"
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a long dataframe with one row per rollcall and group
+
+        Returns:
+            pd.DataFrame: Dataframe with columns congress, rollnumber, the group attributes, yea, nay, yea_fractional, nay_fractional
+        """        
+        no_rolls, no_groups = self.yea.shape
+        df = pd.DataFrame({
+            "congress": np.full(no_rolls * no_groups, self.congress),
+            "rollnumber": np.repeat(np.asarray(self.rollnumbers), no_groups)
+            })
+        for col in self.groups.columns:
+            df[col] = np.tile(self.groups[col].to_numpy(), no_rolls)
+        for name in [ "yea", "nay", "yea_fractional", "nay_fractional" ]:
+            df[name] = getattr(self, name).reshape(-1)
+        return df
+
+
+class CalculateVotesBatch:
+    """Helper class to calculate votes for all rollcalls of a congress at once. Gives the same results as CalculateVotes applied to each rollcall.
+    """    
+
+
+    def __init__(self,
+        matrix: VoteMatrix,
+        state_idxs: np.ndarray,
+        options: CalculateVotes.Options = CalculateVotes.Options(),
+        rescale_factors_provider: Optional[RescaleFactorsProvider] = None
+        ):
+        """Constructor
+
+        Args:
+            matrix (VoteMatrix): Votes of the congress
+            state_idxs (np.ndarray): State index (see ST_TO_IDX) of each member (column) of the matrix, STATE_IDX_MISSING for members not in the members csv. See Members.state_idxs.
+            options (CalculateVotes.Options, optional): Options. Defaults to CalculateVotes.Options().
+            rescale_factors_provider (Optional[RescaleFactorsProvider], optional): Provider of rescale factors for fractional votes. Defaults to None, which uses the shared RESCALE_FACTORS_PROVIDER.
+        """        
+        assert len(state_idxs) == matrix.no_members, f"len(state_idxs) = {len(state_idxs)} != no. members = {matrix.no_members}"
+        self.matrix = matrix
+        self.state_idxs = np.asarray(state_idxs)
+        self.options = options
+        self.rescale_factors_provider = rescale_factors_provider or RESCALE_FACTORS_PROVIDER
+
+        # One-hot cast codes of counted votes for each castcode value: shape (no. castcodes, no. rollcalls, no. members)
+        skip = [ castcode.value for castcode in options.skip_castcodes ]
+        self._one_hot = np.stack([
+            (matrix.cast_codes == castcode.value) if castcode.value not in skip else np.zeros(matrix.cast_codes.shape, dtype=bool)
+            for castcode in CastCode
+            ])
+
+
+    def _results(self, counts: np.ndarray) -> VoteResultsBatch:
+        return VoteResultsBatch(
+            congress=self.matrix.congress,
+            rollnumbers=np.asarray(self.matrix.rollnumbers),
+            counts=counts,
+            present=self._one_hot.any(axis=2).T
+            )
+
+
+    @instrumented("CalculateVotesBatch.calculate_votes")
+    def calculate_votes(self, rollcalls: Optional[RollCallsAll] = None) -> VoteResultsBatch:
+        """Vote results
+
+        Args:
+            rollcalls (Optional[RollCallsAll], optional): If given, check the yea and nay counts are consistent with the rollcalls. Defaults to None.
+
+        Raises:
+            RuntimeError: If the yea or nay counts are not consistent with the rollcalls
+
+        Returns:
+            VoteResultsBatch: Vote results
+        """        
+        results = self._results(self._one_hot.sum(axis=2).T.astype(np.int64))
+
+        if rollcalls is not None:
+            rollnumber_to_rollcall = rollcalls.congress_to_rollnumber_to_rollcall[self.matrix.congress]
+            for idx, rollnumber in enumerate(results.rollnumbers.tolist()):
+                rc = rollnumber_to_rollcall[rollnumber]
+                if rc.yea_count != results.yea_count[idx]:
+                    raise RuntimeError(f"Rollcall (congress={self.matrix.congress}, rollnumber={rollnumber}) yea count {rc.yea_count} is not consistent with votes {results.yea_count[idx]}")
+                if rc.nay_count != results.nay_count[idx]:
+                    raise RuntimeError(f"Rollcall (congress={self.matrix.congress}, rollnumber={rollnumber}) nay count {rc.nay_count} is not consistent with votes {results.nay_count[idx]}")
+        return results
+
+
+    def num_seats(self) -> np.ndarray:
+        """Number of seats in the House of Representatives used for each rollcall - either 435 or the number of votes
+
+        Returns:
+            np.ndarray: Number of seats for each rollcall
+        """        
+        if self.options.use_num_votes_as_num_seats:
+            return (self.matrix.cast_codes != CASTCODE_ABSENT).sum(axis=1)
+        else:
+            return np.full(self.matrix.no_rollcalls, 435)
+
+
+    def member_weights(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Weight of each member's vote in fractional voting. Rollcalls with the same number of seats share the same weights.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (Weights, shape (no. distinct numbers of seats, no. members), index into the weights for each rollcall)
+        """        
+        assert self.matrix.congress in CONGRESS_TO_CENSUS_YEAR, f"congress {self.matrix.congress} not found in CONGRESS_TO_CENSUS_YEAR"
+        census_year = CONGRESS_TO_CENSUS_YEAR[self.matrix.congress]
+        num_seats_unique, roll_to_weights = np.unique(self.num_seats(), return_inverse=True)
+        weights = np.stack([ 
+            self.rescale_factors_provider.get_rescale_vector(census_year, int(num_seats))[self.state_idxs]
+            for num_seats in num_seats_unique 
+            ]) if len(num_seats_unique) > 0 else np.zeros((0, self.matrix.no_members))
+        return weights, roll_to_weights
+
+
+    @instrumented("CalculateVotesBatch.calculate_votes_fractional")
+    def calculate_votes_fractional(self, rolls: Optional[np.ndarray] = None) -> VoteResultsBatch:
+        """Fractional vote results, where each member's vote is rescaled by the rescale factor of their state
+
+        Args:
+            rolls (Optional[np.ndarray], optional): Indexes or boolean mask of the rollcalls (rows) to calculate. Defaults to None (all rollcalls).
+
+        Returns:
+            VoteResultsBatch: Fractional vote results for the selected rollcalls
+        """        
+        weights, roll_to_weights = self.member_weights()
+        one_hot = self._one_hot
+        rollnumbers = np.asarray(self.matrix.rollnumbers)
+        if rolls is not None:
+            one_hot, roll_to_weights, rollnumbers = one_hot[:, rolls], roll_to_weights[rolls], rollnumbers[rolls]
+
+        # Counts for each castcode = one-hot cast codes @ member weights
+        counts = np.einsum("crm,rm->rc", one_hot, weights[roll_to_weights], optimize=True)
+        return VoteResultsBatch(
+            congress=self.matrix.congress,
+            rollnumbers=rollnumbers,
+            counts=counts,
+            present=one_hot.any(axis=2).T
+            )
+
+
+    # Relative tolerance on the flip bounds, so that rounding in the fractional sums can never exclude a rollcall that flips
+    FLIP_BOUND_RTOL = 1e-9
+
+
+    def flip_candidates(self, vrb_actual: Optional[VoteResultsBatch] = None) -> np.ndarray:
+        """Rollcalls whose majority decision could possibly flip under fractional voting.
+
+        Every counted vote is rescaled by a weight between the smallest and largest member weight, so the fractional yea count lies in [yea * w_min, yea * w_max], and likewise for nay.
+        A passing rollcall can only fail if yea * w_min <= nay * w_max, and a failing rollcall can only pass if yea * w_max > nay * w_min. All other rollcalls cannot flip.
+
+        Args:
+            vrb_actual (Optional[VoteResultsBatch], optional): Actual vote results, if already calculated. Defaults to None.
+
+        Returns:
+            np.ndarray: Boolean mask of the rollcalls that could flip
+        """        
+        if vrb_actual is None:
+            vrb_actual = self.calculate_votes()
+        weights, roll_to_weights = self.member_weights()
+        if weights.shape[1] == 0:
+            return np.zeros(self.matrix.no_rollcalls, dtype=bool)
+        w_min = weights.min(axis=1)[roll_to_weights] * (1 - self.FLIP_BOUND_RTOL)
+        w_max = weights.max(axis=1)[roll_to_weights] * (1 + self.FLIP_BOUND_RTOL)
+
+        yea, nay = vrb_actual.yea_count, vrb_actual.nay_count
+        passed = yea > nay
+        return np.where(passed, yea * w_min <= nay * w_max, yea * w_max > nay * w_min)
+
+
+    @instrumented("CalculateVotesBatch.calculate_decisions_counterfactual")
+    def calculate_decisions_counterfactual(self, methods: List[ApportionmentMethod], house_sizes: List[int]) -> "CounterfactualDecisions":
+        """Majority decision of every rollcall if the House had been apportioned by other methods and house sizes. 
+        Each member's vote is rescaled by (seats of their state under the method and house size) / (actual seats of their state), i.e. each delegation is assumed to vote in the same proportions with more or fewer members.
+
+        Args:
+            methods (List[ApportionmentMethod]): Apportionment methods
+            house_sizes (List[int]): House sizes (number of voting seats)
+
+        Returns:
+            CounterfactualDecisions: Decisions for each method x house size x rollcall
+        """        
+        assert self.matrix.congress in CONGRESS_TO_CENSUS_YEAR, f"congress {self.matrix.congress} not found in CONGRESS_TO_CENSUS_YEAR"
+        census_year = CONGRESS_TO_CENSUS_YEAR[self.matrix.congress]
+
+        # Rescale vectors, shape (no. methods x no. house sizes, no. states + 1)
+        vecs = np.stack([ 
+            self.rescale_factors_provider.get_method_rescale_vector(census_year, method, num_seats) 
+            for method in methods for num_seats in house_sizes 
+            ])
+
+        # Yea and nay votes by state for each rollcall, shape (no. rollcalls, no. states + 1)
+        no_states = vecs.shape[1]
+        cols_state = np.asarray(self.state_idxs, dtype=np.int64) % no_states
+        def _by_state(castcode: CastCode) -> np.ndarray:
+            rows, cols = np.nonzero(self._one_hot[castcode.value])
+            return np.bincount(rows * no_states + cols_state[cols], minlength=self.matrix.no_rollcalls * no_states).reshape(self.matrix.no_rollcalls, no_states)
+        yea, nay = _by_state(CastCode.YEA), _by_state(CastCode.NAY)
+
+        passed = (yea @ vecs.T) > (nay @ vecs.T)
+        return CounterfactualDecisions(
+            congress=self.matrix.congress,
+            rollnumbers=np.asarray(self.matrix.rollnumbers),
+            methods=list(methods),
+            house_sizes=list(house_sizes),
+            passed=passed.T.reshape(len(methods), len(house_sizes), self.matrix.no_rollcalls),
+            passed_actual=yea.sum(axis=1) > nay.sum(axis=1)
+            )
+
+
+    @instrumented("CalculateVotesBatch.calculate_votes_grouped")
+    def calculate_votes_grouped(self, group_idxs: np.ndarray, groups: pd.DataFrame) -> VoteTotalsGrouped:
+        """Actual and fractional yea and nay totals for groups of members, with one bincount over the votes for each total
+
+        Args:
+            group_idxs (np.ndarray): Group index of each member (column) of the matrix, in [0, len(groups))
+            groups (pd.DataFrame): Attribute values of each group. See MemberTable.group_idxs.
+
+        Returns:
+            VoteTotalsGrouped: Totals for each rollcall and group
+        """        
+        group_idxs = np.asarray(group_idxs, dtype=np.int64)
+        assert len(group_idxs) == self.matrix.no_members, f"len(group_idxs) = {len(group_idxs)} != no. members = {self.matrix.no_members}"
+        no_rolls, no_groups = self.matrix.no_rollcalls, len(groups)
+        weights, roll_to_weights = self.member_weights()
+
+        def _totals(castcode: CastCode) -> Tuple[np.ndarray, np.ndarray]:
+            rows, cols = np.nonzero(self._one_hot[castcode.value])
+            idxs = rows * no_groups + group_idxs[cols]
+            count = np.bincount(idxs, minlength=no_rolls * no_groups).reshape(no_rolls, no_groups)
+            count_fractional = np.bincount(idxs, weights=weights[roll_to_weights[rows], cols], minlength=no_rolls * no_groups).reshape(no_rolls, no_groups)
+            return count, count_fractional
+
+        yea, yea_fractional = _totals(CastCode.YEA)
+        nay, nay_fractional = _totals(CastCode.NAY)
+        return VoteTotalsGrouped(
+            congress=self.matrix.congress,
+            rollnumbers=np.asarray(self.matrix.rollnumbers),
+            groups=groups,
+            yea=yea,
+            nay=nay,
+            yea_fractional=yea_fractional,
+            nay_fractional=nay_fractional
+            )
+
+
+    def find_flipped_rolls(self) -> np.ndarray:
+        """Roll numbers of the rollcalls whose majority decision flips under fractional voting. Only the rollcalls that could flip (see flip_candidates) are calculated.
+
+        Returns:
+            np.ndarray: Roll numbers
+        """        
+        vrb_actual = self.calculate_votes()
+        candidates = np.flatnonzero(self.flip_candidates(vrb_actual))
+        vrb_frac = self.calculate_votes_fractional(candidates)
+        flipped = vrb_actual.majority_pass[candidates] != vrb_frac.majority_pass
+        return vrb_frac.rollnumbers[flipped]
+
+
+@dataclass
+class CongressVotingAnalysis:
+    """Actual vs fractional vote results for all rollcalls of a congress
+    """    
+
+    congress: int
+    "Congress"
+
+    rollnumbers: np.ndarray
+    "Roll numbers"
+
+    counts_actual: np.ndarray
+    "Actual count of each castcode, shape (no. rollcalls, no. castcodes)"
+
+    counts_fractional: np.ndarray
+    "Fractional count of each castcode, shape (no. rollcalls, no. castcodes)"
+
+    flipped: np.ndarray
+    "Whether the majority decision is different for fractional voting"
+
+    max_diff: np.ndarray
+    "Max difference between actual and fractional counts over the castcodes cast in each rollcall"
+
+
+    @classmethod
+    def from_results(cls, vrb_actual: VoteResultsBatch, vrb_frac: VoteResultsBatch) -> "CongressVotingAnalysis":
+        """Construct from actual and fractional vote results
+
+        Args:
+            vrb_actual (VoteResultsBatch): Actual vote results
+            vrb_frac (VoteResultsBatch): Fractional vote results
+
+        Returns:
+            CongressVotingAnalysis: Analysis
+        """        
+        diffs = np.where(vrb_actual.present, np.abs(vrb_actual.counts - vrb_frac.counts), 0.0)
+        return cls(
+            congress=vrb_actual.congress,
+            rollnumbers=vrb_actual.rollnumbers,
+            counts_actual=vrb_actual.counts,
+            counts_fractional=vrb_frac.counts,
+            flipped=vrb_actual.majority_pass != vrb_frac.majority_pass,
+            max_diff=diffs.max(axis=1) if diffs.shape[1] > 0 else np.zeros(len(diffs))
+            )
+
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert to a dataframe, one row per rollcall
+
+        Returns:
+            pd.DataFrame: Dataframe with columns congress, rollnumber, actual_<castcode>, fractional_<castcode>, flipped, max_diff
+        """        
+        data = {
+            "congress": np.full(len(self.rollnumbers), self.congress, dtype=VOTES_CSV_DTYPES["congress"]),
+            "rollnumber": self.rollnumbers
+            }
+        for castcode in CastCode:
+            data["actual_" + castcode.name.lower()] = self.counts_actual[:, castcode.value]
+        for castcode in CastCode:
+            data["fractional_" + castcode.name.lower()] = self.counts_fractional[:, castcode.value]
+        data["flipped"] = self.flipped
+        data["max_diff"] = self.max_diff
+        return pd.DataFrame(data)
+
+
+@dataclass
+class VotingAnalysisSummary(DataClassDictMixin):
+    """Summary of actual vs fractional vote results across congresses
+    """    
+
+    no_rollcalls: int = 0
+    "Number of rollcalls analyzed"
+
+    rolls_flipped: List[Tuple[int,int]] = field(default_factory=list)
+    "(congress, rollnumber) of rollcalls where the majority decision is flipped by fractional voting, sorted"
+
+    max_diff: float = 0.0
+    "Max difference between actual and fractional counts"
+
+    roll_max_diff: Optional[Tuple[int,int]] = None
+    "(congress, rollnumber) of the rollcall with the max difference. Ties go to the earliest rollcall."
+
+
+    def update(self, analysis: CongressVotingAnalysis):
+        """Merge in the analysis of a congress. Congresses can be merged in any order.
+
+        Args:
+            analysis (CongressVotingAnalysis): Analysis of a congress
+        """        
+        self.no_rollcalls += len(analysis.rollnumbers)
+        self.rolls_flipped = sorted(self.rolls_flipped + [ 
+            (analysis.congress, rollnumber) for rollnumber in analysis.rollnumbers[analysis.flipped].tolist() 
+            ])
+        if len(analysis.max_diff) > 0:
+            idx = int(np.argmax(analysis.max_diff))
+            max_diff = float(analysis.max_diff[idx])
+            roll = (analysis.congress, int(analysis.rollnumbers[idx]))
+            if self.roll_max_diff is None or max_diff > self.max_diff or (max_diff == self.max_diff and roll < self.roll_max_diff):
+                self.max_diff = max_diff
+                self.roll_max_diff = roll
+
+
+def analyze_congress_voting(matrix: VoteMatrix, state_idxs: np.ndarray, options: CalculateVotes.Options = CalculateVotes.Options()) -> CongressVotingAnalysis:
+    """Compare actual and fractional vote results for all rollcalls of a congress
+
+    Args:
+        matrix (VoteMatrix): Votes of the congress
+        state_idxs (np.ndarray): State index of each member (column) of the matrix
+        options (CalculateVotes.Options, optional): Options. Defaults to CalculateVotes.Options().
+
+    Returns:
+        CongressVotingAnalysis: Analysis
+    """    
+    cvb = CalculateVotesBatch(matrix, state_idxs, options=options)
+    return CongressVotingAnalysis.from_results(cvb.calculate_votes(), cvb.calculate_votes_fractional())
+
+
+def calculate_votes_grouped(matrix: VoteMatrix, member_table: MemberTable, by: List[str], options: CalculateVotes.Options = CalculateVotes.Options()) -> VoteTotalsGrouped:
+    """Actual and fractional yea and nay totals of every rollcall of a congress by state, party or any combination of member attributes
+
+    Args:
+        matrix (VoteMatrix): Votes of the congress
+        member_table (MemberTable): Member attributes. The state_abbrev column gives the rescale factors of fractional votes.
+        by (List[str]): Attributes to group by, e.g. ["party_code"] or ["state_abbrev", "party_code"]
+        options (CalculateVotes.Options, optional): Options. Defaults to CalculateVotes.Options().
+
+    Returns:
+        VoteTotalsGrouped: Totals for each rollcall and group
+    """    
+    group_idxs, groups = member_table.group_idxs(matrix.icpsrs, matrix.congress, by)
+    cvb = CalculateVotesBatch(matrix, member_table.state_idxs(matrix.icpsrs, matrix.congress), options=options)
+    return cvb.calculate_votes_grouped(group_idxs, groups)
+
+
+# State of each worker process of iter_analyze_voting_parallel, set once by the pool initializer
+_WORKER_STATE = {}
+
+
+def _init_analyze_voting_worker(store: "VoteStore", members: Union[Members, MemberTable], options: CalculateVotes.Options):
+    _WORKER_STATE["store"] = store
+    _WORKER_STATE["members"] = members
+    _WORKER_STATE["options"] = options
+
+
+def _analyze_voting_worker(congress: int) -> CongressVotingAnalysis:
+    matrix = _WORKER_STATE["store"].open_congress(congress)
+    return analyze_congress_voting(matrix, member_state_idxs(_WORKER_STATE["members"], matrix), _WORKER_STATE["options"])
+
+
+def iter_analyze_voting_parallel(
+    store: "VoteStore",
+    members: Union[Members, MemberTable],
+    options: CalculateVotes.Options = CalculateVotes.Options(),
+    congresses: Optional[List[int]] = None,
+    no_workers: Optional[int] = None
+    ) -> Iterator[CongressVotingAnalysis]:
+    """Compare actual and fractional vote results for all rollcalls, sharded by congress over a process pool. Workers open the vote matrices memory-mapped from the store, so the votes are never pickled.
+
+    Args:
+        store (VoteStore): Vote store
+        members (Union[Members, MemberTable]): Members. A MemberTable looks members up in the congress of each rollcall, which is needed when members change state between congresses.
+        options (CalculateVotes.Options, optional): Options. Defaults to CalculateVotes.Options().
+        congresses (Optional[List[int]], optional): Congresses to analyze. Defaults to None (all congresses in the store).
+        no_workers (Optional[int], optional): Number of worker processes. 1 runs in this process. Defaults to None (number of CPUs).
+
+    Returns:
+        Iterator[CongressVotingAnalysis]: Analysis of each congress, in order of completion
+    """    
+    if congresses is None:
+        congresses = store.congresses
+
+    if no_workers == 1:
+        _init_analyze_voting_worker(store, members, options)
+        for congress in congresses:
+            yield _analyze_voting_worker(congress)
+        return
+
+    with ProcessPoolExecutor(max_workers=no_workers, initializer=_init_analyze_voting_worker, initargs=(store, members, options)) as executor:
+        futures = [ executor.submit(_analyze_voting_worker, congress) for congress in congresses ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def analyze_voting_parallel(
+    store: "VoteStore",
+    members: Union[Members, MemberTable],
+    options: CalculateVotes.Options = CalculateVotes.Options(),
+    congresses: Optional[List[int]] = None,
+    no_workers: Optional[int] = None,
+    out_dir: Optional[str] = None
+    ) -> VotingAnalysisSummary:
+    """Compare actual and fractional vote results for all rollcalls in parallel, see iter_analyze_voting_parallel. Per-rollcall results are optionally streamed to disk as one table per congress, so they are never all held in memory.
+
+    Args:
+        store (VoteStore): Vote store
+        members (Union[Members, MemberTable]): Members. A MemberTable looks members up in the congress of each rollcall, which is needed when members change state between congresses.
+        options (CalculateVotes.Options, optional): Options. Defaults to CalculateVotes.Options().
+        congresses (Optional[List[int]], optional): Congresses to analyze. Defaults to None (all congresses in the store).
+        no_workers (Optional[int], optional): Number of worker processes. Defaults to None (number of CPUs).
+        out_dir (Optional[str], optional): Directory to write the per-rollcall results to (Parquet if pyarrow is installed, else .npz). Defaults to None (not written).
+
+    Returns:
+        VotingAnalysisSummary: Summary of flipped rollcalls and the max difference
+    """    
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    summary = VotingAnalysisSummary()
+    for analysis in iter_analyze_voting_parallel(store, members, options, congresses, no_workers):
+        summary.update(analysis)
+        if out_dir is not None:
+            write_table(analysis.to_dataframe(), os.path.join(out_dir, "congress_%03d" % analysis.congress))
+        logger.debug(f"Analyzed congress {analysis.congress}: {len(analysis.rollnumbers)} rollcalls, {int(analysis.flipped.sum())} flipped")
+    return summary
+
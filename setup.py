@@ -15,6 +15,9 @@ setuptools.setup(
     url="https://github.com/smrfeld/house-of-reps/",
     packages=setuptools.find_packages(),
     package_data={'houseofreps': ['apportionment.csv']},
+    entry_points={
+        'console_scripts': ['houseofreps=houseofreps.cli:main']
+    },
     license='MIT',
     classifiers=[
         "Programming Language :: Python :: 3",
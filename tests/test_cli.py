@@ -0,0 +1,111 @@
+import houseofreps as hr
+from houseofreps.cli import apportion_stream, main
+
+import io
+import json
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def pops() -> np.ndarray:
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    pops_2020 = np.array([ house.states[st].pop for st in hr.SCENARIO_STATES ])
+    return pops_2020 * np.random.default_rng(0).uniform(0.8, 1.2, size=(25, len(pops_2020)))
+
+
+def read_seats(fname: str) -> np.ndarray:
+    with open(fname) as f:
+        rows = [ json.loads(line) for line in f ]
+    return np.array([ [ row["seats"][st.value] for st in hr.SCENARIO_STATES ] for row in rows ])
+
+
+@pytest.mark.parametrize("no_workers", [ 1, 2 ])
+def test_apportion_jsonl(tmp_path, pops: np.ndarray, no_workers: int):
+    fname = str(tmp_path / "pops.jsonl")
+    with open(fname, "w") as f:
+        for i, row in enumerate(pops.tolist()):
+            # Keyed by abbreviation with an ID, by name, or as a list
+            if i % 3 == 0:
+                obj = { "id": f"s{i}", **{ st.value: pop for st, pop in zip(hr.SCENARIO_STATES, row) }, "DC": 0.7 }
+            elif i % 3 == 1:
+                obj = { "pops": { st.name: pop for st, pop in zip(hr.SCENARIO_STATES, row) } }
+            else:
+                obj = { "pops": row }
+            f.write(json.dumps(obj) + "\n")
+
+    f_out = io.StringIO()
+    assert apportion_stream([fname], f_out, no_workers=no_workers, batch_size=4) == 25
+    rows = [ json.loads(line) for line in f_out.getvalue().splitlines() ]
+    assert [ row["id"] for row in rows[:3] ] == [ "s0", 1, 2 ]
+    seats = np.array([ [ row["seats"][st.value] for st in hr.SCENARIO_STATES ] for row in rows ])
+    assert np.array_equal(seats, hr.apportion(pops))
+
+
+def test_apportion_csv(tmp_path, pops: np.ndarray):
+    fname_in, fname_out = str(tmp_path / "pops.csv"), str(tmp_path / "seats.jsonl")
+    with open(fname_in, "w") as f:
+        f.write(",".join([ st.value for st in hr.SCENARIO_STATES ]) + "\n")
+        for row in pops.tolist():
+            f.write(",".join([ repr(pop) for pop in row ]) + "\n")
+
+    main(["apportion", fname_in, "-o", fname_out, "--method", "jefferson", "--seats", "600"])
+    assert np.array_equal(read_seats(fname_out), hr.apportion(pops, 600, hr.ApportionmentMethod.JEFFERSON))
+
+
+def test_apportion_invalid(tmp_path, pops: np.ndarray):
+    fname = str(tmp_path / "pops.jsonl")
+    with open(fname, "w") as f:
+        f.write(json.dumps({ "pops": pops[0].tolist() }) + "\n")
+        f.write(json.dumps({ "CA": 39.5 }) + "\n")
+    with pytest.raises(ValueError, match="Row 1"):
+        apportion_stream([fname], io.StringIO())
+
+
+@pytest.mark.parametrize("line,match", [
+    ('{"CA": 1.0},{"CA": 2.0}', "Row 1: invalid JSON"),
+    ('[1, 2]', "Row 1: expected a JSON object"),
+    ('3', "Row 1: expected a JSON object"),
+    ('{"pops": 3}', "Row 1: pops must be"),
+    ('{"pops": [%s]}', "Row 1: populations must be positive and finite"),
+    ])
+def test_apportion_invalid_rows(tmp_path, pops: np.ndarray, line: str, match: str):
+    if "%s" in line:
+        line = line % ", ".join([ "1e400" ] + [ "1.0" ] * (len(hr.SCENARIO_STATES) - 1))
+    fname = str(tmp_path / "pops.jsonl")
+    with open(fname, "w") as f:
+        f.write(json.dumps({ "pops": pops[0].tolist() }) + "\n")
+        f.write(line + "\n")
+        f.write(json.dumps({ "pops": pops[1].tolist() }) + "\n")
+    with pytest.raises(ValueError, match=match):
+        apportion_stream([fname], io.StringIO())
+
+
+@pytest.mark.parametrize("cells,match", [
+    (lambda row: row[:-1], "Row 1: expected 50 cells as in the header, got 49"),
+    (lambda row: [ "" ] + row[1:], "Row 1: population of CA is not a number: ''"),
+    (lambda row: row[:4] + [ "many" ] + row[5:], "Row 1: population of PA is not a number: 'many'"),
+    ])
+def test_apportion_csv_invalid_rows(tmp_path, capsys, pops: np.ndarray, cells, match: str):
+    fname = str(tmp_path / "pops.csv")
+    with open(fname, "w") as f:
+        f.write(",".join([ st.value for st in hr.SCENARIO_STATES ]) + "\n")
+        for row in [ pops[0], cells([ repr(pop) for pop in pops[1].tolist() ]), pops[2] ]:
+            f.write(",".join([ str(pop) for pop in row ]) + "\n")
+    with pytest.raises(ValueError, match=match):
+        apportion_stream([fname], io.StringIO())
+
+    with pytest.raises(SystemExit) as e:
+        main(["apportion", fname])
+    assert e.value.code == 1
+    assert "Row 1" in capsys.readouterr().err
+
+
+def test_main_error(tmp_path, capsys):
+    fname = str(tmp_path / "pops.jsonl")
+    with open(fname, "w") as f:
+        f.write('{"CA": 39.5}\n')
+    with pytest.raises(SystemExit) as e:
+        main(["apportion", fname])
+    assert e.value.code == 1
+    assert "Row 0: missing populations" in capsys.readouterr().err
@@ -0,0 +1,103 @@
+import houseofreps as hr
+from test_voting import write_small_voteview_csvs
+
+import io
+import json
+import math
+import pytest
+
+
+def test_votes_round_trip(tmp_path):
+    paths = write_small_voteview_csvs(str(tmp_path))
+    loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], chunksize=3)
+    votes = loader.load_votes()
+
+    f = io.BytesIO()
+    hr.write_votes_binary(votes, f)
+    f.seek(0)
+    votes_read = hr.read_votes_binary(f)
+    assert votes_read == votes
+    assert list(votes_read.congress_to_rollnumber_to_votes.keys()) == list(votes.congress_to_rollnumber_to_votes.keys())
+
+    # Smaller than json, even with the column headers of such a small file
+    assert len(f.getvalue()) < len(json.dumps(votes.to_dict()))
+
+    # Streamed from CSV chunks, read back one block per chunk
+    f = io.BytesIO()
+    hr.write_votes_binary(loader.iter_votes_chunks(), f)
+    f.seek(0)
+    chunks = list(hr.iter_votes_binary(f))
+    assert [ len(chunk) for chunk in chunks ] == [ 3, 3, 3, 3, 3, 3, 2 ]
+    assert hr.VotesColumnar.concatenate(chunks).to_votes_all() == votes
+
+
+def test_rollcalls_round_trip(tmp_path):
+    paths = write_small_voteview_csvs(str(tmp_path))
+    rollcalls = hr.LoadVoteViewCsv(rollcalls_csv=paths['rollcalls']).load_rollcalls()
+
+    # Missing values as read by pandas, and non-ASCII strings
+    rollcalls.congress_to_rollnumber_to_rollcall[116][1].bill_number = float("nan")
+    rollcalls.congress_to_rollnumber_to_rollcall[116][2].vote_desc = None
+    rollcalls.congress_to_rollnumber_to_rollcall[117][1].vote_desc = "Résolution – 🇺🇸"
+
+    f = io.BytesIO()
+    hr.write_rollcalls_binary(rollcalls, f)
+    f.seek(0)
+    rollcalls_read = hr.read_rollcalls_binary(f)
+
+    assert math.isnan(rollcalls_read.congress_to_rollnumber_to_rollcall[116][1].bill_number)
+    rollcalls_read.congress_to_rollnumber_to_rollcall[116][1].bill_number = rollcalls.congress_to_rollnumber_to_rollcall[116][1].bill_number = "HR1"
+    assert rollcalls_read == rollcalls
+
+
+def test_vote_results_round_trip():
+    vote_results = [
+        hr.VoteResults(congress=117, rollnumber=1, castcode_to_count={ hr.CastCode.YEA: 200, hr.CastCode.NAY: 201, hr.CastCode.NOT_VOTING: 3 }),
+        hr.VoteResults(congress=117, rollnumber=2, castcode_to_count={ hr.CastCode.NAY: 210.25, hr.CastCode.YEA: 199.5 }),
+        hr.VoteResults(congress=117, rollnumber=3, castcode_to_count={}),
+        ]
+
+    f = io.BytesIO()
+    hr.write_vote_results_binary(vote_results, f, block_size=2)
+    f.seek(0)
+    vote_results_read = hr.read_vote_results_binary(f)
+    assert vote_results_read == vote_results
+    assert [ type(count) for count in vote_results_read[0].castcode_to_count.values() ] == [ int, int, int ]
+    assert list(vote_results_read[1].castcode_to_count.keys()) == [ hr.CastCode.NAY, hr.CastCode.YEA ]
+
+
+def test_wrong_kind():
+    f = io.BytesIO()
+    hr.write_vote_results_binary([], f)
+    f.seek(0)
+    with pytest.raises(ValueError):
+        hr.read_votes_binary(f)
+    with pytest.raises(ValueError):
+        hr.read_votes_binary(io.BytesIO(b"not binary"))
+
+
+def test_str_column_mixed_values():
+    values = [ "a", None, float("nan"), "", "é" ]
+    f = io.BytesIO()
+    writer = hr.BinaryWriter(f, hr.KIND_ROLLCALLS)
+    writer.write_block({ "col": values })
+    f.seek(0)
+    (columns,) = list(hr.BinaryReader(f, hr.KIND_ROLLCALLS))
+    read = columns["col"]
+    assert read[:2] == [ "a", None ] and math.isnan(read[2]) and read[3:] == [ "", "é" ]
+
+    # Other values are not silently dropped
+    for bad in [ 1.5, 3 ]:
+        with pytest.raises(TypeError):
+            writer.write_block({ "col": [ "a", bad ] })
+
+
+def test_votes_columnar_round_trip(tmp_path):
+    paths = write_small_voteview_csvs(str(tmp_path))
+    votes = hr.LoadVoteViewCsv(votes_csv=paths['votes'], chunksize=3).load_votes_columnar()
+
+    f = io.BytesIO()
+    hr.write_votes_binary(votes, f)
+    f.seek(0)
+    votes_read = hr.read_votes_columnar_binary(f)
+    assert votes_read.to_votes_all() == votes.to_votes_all()
@@ -74,4 +74,22 @@ class TestHouseOfReps:
             # Assign house seats
             house.assign_house_seats_priority()
             
-            hr.validate_no_reps_matches_true(house)
\ No newline at end of file
+            hr.validate_no_reps_matches_true(house)
+
+
+    def test_assign_house_seats_priority_exact(self):
+
+        for year in hr.Year:
+            house = hr.HouseOfReps(
+                year=year,
+                pop_type=hr.PopType.APPORTIONMENT
+                )
+
+            # Exact priorities give the true apportionment
+            pri = house.assign_house_seats_priority(return_priorities_top=True, exact=True)
+            hr.validate_no_reps_matches_true(house)
+            assert isinstance(pri.priorities_top[435].priority, float)
+
+            # Vectorized exact path
+            house.assign_house_seats_method(hr.ApportionmentMethod.HUNTINGTON_HILL, exact=True)
+            hr.validate_no_reps_matches_true(house)
@@ -0,0 +1,82 @@
+import houseofreps as hr
+from test_voting import write_small_voteview_csvs
+
+import io
+import json
+import pytest
+
+
+@pytest.fixture
+def instrumentation():
+    hr.reset_stats()
+    hr.enable_instrumentation()
+    yield
+    hr.enable_instrumentation(False)
+    hr.reset_stats()
+
+
+def test_disabled():
+    hr.reset_stats()
+    hr.enable_instrumentation(False)
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    house.assign_house_seats_priority()
+    with hr.span("block"):
+        hr.increment_counter("counter")
+    assert hr.get_stats() == { "spans": {}, "counters": {} }
+
+
+def test_house(instrumentation):
+    for _ in range(2):
+        house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+        house.assign_house_seats_priority()
+    hr.validate_total_us_pop_assigned_correct(house, hr.PopType.APPORTIONMENT)
+
+    stats = hr.get_stats()
+    # Validation constructs another house
+    assert stats["spans"]["HouseOfReps.__init__"]["count"] == 3
+    assert stats["spans"]["HouseOfReps.assign_house_seats_priority"]["count"] == 2
+    assert stats["spans"]["validate_total_us_pop_assigned_correct"]["count"] == 1
+    assert stats["counters"]["HouseOfReps.seats_assigned"] == 2 * 435
+
+    span = stats["spans"]["HouseOfReps.assign_house_seats_priority"]
+    assert 0 < span["min_s"] <= span["mean_s"] <= span["max_s"]
+    assert span["total_s"] == pytest.approx(2 * span["mean_s"])
+
+
+def test_voting(instrumentation, tmp_path):
+    paths = write_small_voteview_csvs(str(tmp_path))
+    loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'], cache_dir=str(tmp_path / "cache"))
+    votes, rollcalls, members = loader.load_consistency()
+    loader.load_consistency()
+    for congress, rollnumber_to_votes in votes.congress_to_rollnumber_to_votes.items():
+        for rollnumber, rv in rollnumber_to_votes.items():
+            hr.CalculateVotes(rv, members, rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber]).calculate_votes_fractional()
+
+    stats = hr.get_stats()
+    assert stats["spans"]["LoadVoteViewCsv.load_consistency"]["count"] == 2
+    assert stats["spans"]["LoadVoteViewCsv.load_votes_columnar"]["count"] == 1
+    assert stats["spans"]["CalculateVotes.calculate_votes_fractional"]["count"] == 5
+    assert stats["counters"]["LoadVoteViewCsv.cache_misses"] == 1
+    assert stats["counters"]["LoadVoteViewCsv.cache_hits"] == 1
+    assert stats["counters"]["LoadVoteViewCsv.votes_rows_parsed"] == 20
+
+
+def test_export_stats_jsonl(instrumentation, tmp_path):
+    with hr.span("block"):
+        hr.increment_counter("counter", 3)
+    with hr.span("block"):
+        pass
+
+    f = io.StringIO()
+    hr.export_stats_jsonl(f)
+    lines = [ json.loads(line) for line in f.getvalue().splitlines() ]
+    assert [ (line["type"], line["name"]) for line in lines ] == [ ("span", "block"), ("counter", "counter") ]
+    assert lines[0]["count"] == 2
+    assert lines[1]["value"] == 3
+
+    # Paths are appended to
+    fname = str(tmp_path / "stats.jsonl")
+    hr.export_stats_jsonl(fname)
+    hr.export_stats_jsonl(fname)
+    with open(fname) as f_in:
+        assert len(f_in.readlines()) == 4
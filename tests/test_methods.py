@@ -0,0 +1,121 @@
+import houseofreps as hr
+import numpy as np
+import pytest
+
+
+def state_pops(year: hr.Year) -> np.ndarray:
+    house = hr.HouseOfReps(year=year, pop_type=hr.PopType.APPORTIONMENT)
+    return np.array([ house.states[st].pop for st in hr.St.all_except_dc() ])
+
+
+@pytest.mark.parametrize("year", [ hr.Year.YR2000, hr.Year.YR2010, hr.Year.YR2020 ])
+def test_huntington_hill_matches_priority(year: hr.Year):
+    house = hr.HouseOfReps(year=year, pop_type=hr.PopType.APPORTIONMENT)
+    house.assign_house_seats_priority()
+    no_reps = hr.apportion(state_pops(year), 435, hr.ApportionmentMethod.HUNTINGTON_HILL)
+    assert no_reps.tolist() == [ house.states[st].no_reps.voting for st in hr.St.all_except_dc() ]
+
+
+def test_apportion_methods():
+    pops = state_pops(hr.Year.YR2020)
+    for method in hr.ApportionmentMethod:
+        for no_seats in [ 50, 100, 435, 600 ]:
+            no_reps = hr.apportion(pops, no_seats, method)
+            assert no_reps.sum() == no_seats
+            assert no_reps.min() >= 1
+
+    # Jefferson favors large states, Adams favors small states
+    no_reps_jefferson = hr.apportion(pops, 435, hr.ApportionmentMethod.JEFFERSON)
+    no_reps_adams = hr.apportion(pops, 435, hr.ApportionmentMethod.ADAMS)
+    assert no_reps_jefferson[np.argmax(pops)] > no_reps_adams[np.argmax(pops)]
+
+
+def test_apportion_batch():
+    rng = np.random.default_rng(0)
+    pops = state_pops(hr.Year.YR2020) * rng.uniform(0.9, 1.1, size=(20, 50))
+    for method in hr.ApportionmentMethod:
+        no_reps = hr.apportion(pops, 435, method)
+        assert no_reps.shape == pops.shape
+        for pops_scenario, no_reps_scenario in zip(pops, no_reps):
+            assert no_reps_scenario.tolist() == hr.apportion(pops_scenario, 435, method).tolist()
+
+
+def test_assign_house_seats_method():
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    house.assign_house_seats_method(hr.ApportionmentMethod.WEBSTER)
+    assert sum(house.states[st].no_reps.voting for st in hr.St) == 435
+    assert house.states[hr.St.DISTRICT_OF_COLUMBIA].no_reps.nonvoting == 1
+
+
+@pytest.mark.parametrize("method", [ hr.ApportionmentMethod.HUNTINGTON_HILL, hr.ApportionmentMethod.WEBSTER, hr.ApportionmentMethod.JEFFERSON, hr.ApportionmentMethod.ADAMS ])
+def test_seat_margins(method: hr.ApportionmentMethod):
+    pops = state_pops(hr.Year.YR2020)
+    no_reps, gain, lose = hr.seat_margins(pops, 435, method)
+    assert no_reps.tolist() == hr.apportion(pops, 435, method).tolist()
+    assert (gain > 0).all()
+    assert np.array_equal(np.isnan(lose), no_reps == 1)
+
+    # Just below the margin the seats are unchanged, just above the state gains or loses a seat
+    for idx in range(0, len(pops), 7):
+        for delta, change in [ (gain[idx], 1), (-lose[idx], -1) ]:
+            if np.isnan(delta):
+                continue
+            for frac, expected in [ (0.999, 0), (1.001, change) ]:
+                pops_changed = pops.copy()
+                pops_changed[idx] += frac * delta
+                assert hr.apportion(pops_changed, 435, method)[idx] == no_reps[idx] + expected
+
+    # Vectorized over scenarios
+    pops_2d = pops * np.random.default_rng(0).uniform(0.9, 1.1, size=(5, len(pops)))
+    _, gain_2d, _ = hr.seat_margins(pops_2d, 435, method)
+    assert np.allclose(gain_2d[3], hr.seat_margins(pops_2d[3], 435, method)[1])
+
+
+def apportion_priority_exact(pops: np.ndarray, no_seats: int) -> list:
+    # Reference: assign seats one at a time to the exactly highest priority
+    no_reps = [ 1 ] * len(pops)
+    for _ in range(no_seats - len(pops)):
+        idx = max(range(len(pops)), key=lambda i: hr.ExactPriority(int(pops[i]), no_reps[i]))
+        no_reps[idx] += 1
+    return no_reps
+
+
+def test_exact_priority():
+    assert hr.ExactPriority(20, 3) < hr.ExactPriority(10, 1)
+    assert hr.ExactPriority(35, 49) == hr.ExactPriority(1, 1)
+    assert float(hr.ExactPriority(35, 49)) == pytest.approx(1.0 / np.sqrt(2))
+
+
+@pytest.mark.parametrize("pops,no_seats", [
+    # Near ties that floating point priorities decide wrongly or call equal
+    ([ 22712253, 37881275 ], 28),
+    ([ 34795876, 26351517 ], 29),
+    ([ 18674305, 38498066 ], 26),
+    ])
+def test_apportion_exact_near_ties(pops: list, no_seats: int):
+    pops = np.array(pops, dtype=np.int64)
+    expected = apportion_priority_exact(pops, no_seats)
+    assert hr.apportion(pops.astype(float), no_seats).tolist() != expected
+    assert hr.apportion_exact(pops, no_seats).tolist() == expected
+    assert hr.apportion_exact(np.stack([ pops, pops[::-1] ]), no_seats).tolist() == [ expected, expected[::-1] ]
+
+
+def test_apportion_exact():
+    pops = hr.to_persons(state_pops(hr.Year.YR2020))
+    assert pops.dtype == np.int64
+    assert hr.apportion_exact(pops).tolist() == hr.apportion(pops.astype(float)).tolist()
+
+    pops_2d = (pops * np.random.default_rng(0).uniform(0.8, 1.2, size=(20, len(pops)))).astype(np.int64)
+    no_reps = hr.apportion_exact(pops_2d, 500)
+    for row in [ 0, 7, 19 ]:
+        assert no_reps[row].tolist() == apportion_priority_exact(pops_2d[row], 500)
+
+
+@pytest.mark.parametrize("method", list(hr.ApportionmentMethod))
+@pytest.mark.parametrize("bad", [ [ np.inf ], [ np.nan ], [ 0.0 ], [ -1.0 ], [ 1e308, 1e308 ] ])
+def test_apportion_invalid(method: hr.ApportionmentMethod, bad: list):
+    # Two populations of 1e308 are finite, but the total overflows
+    pops = state_pops(hr.Year.YR2020)
+    pops[3:3 + len(bad)] = bad
+    with pytest.raises(ValueError):
+        hr.apportion(np.stack([ state_pops(hr.Year.YR2020), pops ]), 435, method)
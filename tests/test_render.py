@@ -0,0 +1,54 @@
+import pytest
+pytest.importorskip("plotly")
+
+import os
+import sys
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analysis.utils import RenderQueue
+import plotly.graph_objects as go
+import plotly.io as pio
+
+
+def _fig(y: int) -> go.Figure:
+    return go.Figure(go.Bar(x=["a", "b"], y=[1, y]))
+
+
+def test_data_only(tmp_path):
+    fname = str(tmp_path / "plots" / "bar.png")
+    RenderQueue(max_workers=None, data_only=True).submit(_fig(2), fname)
+
+    # Only the figure data is saved, next to the image path
+    assert not os.path.exists(fname)
+    assert pio.read_json(str(tmp_path / "plots" / "bar.json")).data[0].y == (1, 2)
+
+
+def test_immediate(tmp_path):
+    pytest.importorskip("kaleido")
+    render_queue = RenderQueue()
+    render_queue.submit(_fig(2), str(tmp_path / "bar.png"))
+    assert (tmp_path / "bar.png").stat().st_size > 0
+    assert render_queue.flush() == []
+
+
+def test_pooled(tmp_path):
+    pytest.importorskip("kaleido")
+    fnames = [ str(tmp_path / f"bar_{y}.png") for y in range(3) ]
+    with RenderQueue(max_workers=2) as render_queue:
+        for y, fname in enumerate(fnames):
+            render_queue.submit(_fig(y), fname)
+        assert not any(os.path.exists(fname) for fname in fnames)
+
+    # Exported on exit
+    assert all(os.path.getsize(fname) > 0 for fname in fnames)
+    assert render_queue.flush() == []
+
+
+def test_pooled_exception(tmp_path):
+    # Queued figures are dropped, not exported, when leaving on an exception
+    with pytest.raises(RuntimeError):
+        with RenderQueue(max_workers=2) as render_queue:
+            render_queue.submit(_fig(2), str(tmp_path / "bar.png"))
+            raise RuntimeError("plot failed")
+    assert not (tmp_path / "bar.png").exists()
+    assert render_queue.flush() == []
@@ -0,0 +1,31 @@
+import houseofreps as hr
+import pytest
+
+
+def test_residents_per_rep_table():
+    df = hr.residents_per_rep_table()
+    rpr_2020 = hr.calculate_residents_per_rep_for_year(hr.Year.YR2020)
+    assert len(df) == len(list(hr.Year)) * len(hr.St.all_except_dc())
+    assert hr.St.DISTRICT_OF_COLUMBIA not in set(df["st"])
+
+    df_2020 = df[df["year"] == hr.Year.YR2020]
+    assert df_2020["seats"].sum() == 435
+    assert sorted(df_2020["rank"].tolist()) == list(range(1, 51))
+    assert df_2020.sort_values("rank")["st"].iloc[0] == hr.St.CALIFORNIA
+    assert (df_2020["frac"] == df_2020["residents_per_rep"] / df_2020["fair"]).all()
+
+    # Same as one house per year
+    for year in hr.Year:
+        house = hr.HouseOfReps(year=year, pop_type=hr.PopType.APPORTIONMENT)
+        rpr = hr.calculate_residents_per_rep_for_year(year)
+        assert rpr.fair == 1e6 * house.get_total_us_pop(sts_exclude=[hr.St.DISTRICT_OF_COLUMBIA]) / 435.0
+        for st in hr.St.all_except_dc():
+            assert rpr.residents_per_rep[st] == pytest.approx(1e6 * house.states[st].pop / house.states[st].no_reps.voting, rel=1e-12)
+
+    # Each caller gets its own copy of the cached table
+    df["frac"] *= 2.0
+    df.drop(columns="rank", inplace=True)
+    assert "rank" in hr.residents_per_rep_table()
+    assert hr.calculate_residents_per_rep_for_year(hr.Year.YR2020) == rpr_2020
+    df_new = hr.residents_per_rep_table()
+    assert (df_new["frac"] == df_new["residents_per_rep"] / df_new["fair"]).all()
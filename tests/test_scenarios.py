@@ -0,0 +1,109 @@
+import houseofreps as hr
+from houseofreps.cli import main
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def write_scenarios_csv(fname: str, no_scenarios: int, sts_as_names: bool = False) -> np.ndarray:
+    # Scenarios scale the 2020 populations. The first scenario is the 2020 census, including DC
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    sts = list(hr.St)
+    pops = 1e6 * np.array([ house.states[st].pop for st in sts ])
+    pops = pops * np.random.default_rng(0).uniform(0.8, 1.2, size=(no_scenarios, len(sts)))
+    pops[0] = 1e6 * np.array([ house.states[st].pop for st in sts ])
+    pd.DataFrame({
+        "scenario_id": np.repeat(np.arange(100, 100 + no_scenarios), len(sts)),
+        "state": np.tile([ st.name if sts_as_names else st.value for st in sts ], no_scenarios),
+        "population": pops.ravel().round()
+        }).to_csv(fname, index=False)
+    return pops.round()[:, [ sts.index(st) for st in hr.SCENARIO_STATES ]]
+
+
+@pytest.mark.parametrize("chunksize", [ 7, 51, 1000 ])
+def test_iter_scenario_pops(tmp_path, chunksize: int):
+    fname = str(tmp_path / "scenarios.csv")
+    pops = write_scenarios_csv(fname, 10, sts_as_names=chunksize == 7)
+
+    # Scenarios split between chunks are carried over
+    batches = list(hr.iter_scenario_pops(fname, chunksize=chunksize))
+    assert np.concatenate([ batch.scenario_ids for batch in batches ]).tolist() == list(range(100, 110))
+    assert np.array_equal(np.concatenate([ batch.pops for batch in batches ]), pops)
+
+
+def test_apportion_scenarios_file(tmp_path):
+    fname_in, fname_out = str(tmp_path / "scenarios.csv"), str(tmp_path / "seats.csv")
+    pops = write_scenarios_csv(fname_in, 20)
+    assert hr.apportion_scenarios_file(fname_in, fname_out, chunksize=120) == 20
+
+    df = pd.read_csv(fname_out)
+    assert len(df) == 20 * 50
+    assert (df.groupby("scenario_id")["seats"].sum() == 435).all()
+    assert np.array_equal(df["seats"].to_numpy().reshape(20, 50), hr.apportion(pops))
+
+    # Same as the 2020 apportionment
+    house = hr.HouseOfReps(year=hr.Year.YR2020, pop_type=hr.PopType.APPORTIONMENT)
+    house.assign_house_seats_priority()
+    df_2020 = df[df["scenario_id"] == 100]
+    assert dict(zip(df_2020["state"], df_2020["seats"])) == { st.value: house.states[st].no_reps.voting for st in hr.SCENARIO_STATES }
+
+    # Written through a dataframe for non-integer IDs
+    seats = hr.ScenarioSeats(scenario_ids=np.array(["a"]), seats=df_2020["seats"].to_numpy()[None, :])
+    assert seats.to_dataframe()["seats"].tolist() == df_2020["seats"].tolist()
+
+
+def test_apportion_scenarios_file_invalid(tmp_path):
+    fname = str(tmp_path / "scenarios.csv")
+    write_scenarios_csv(fname, 2)
+    df = pd.read_csv(fname)
+
+    df.drop(index=3).to_csv(fname, index=False)
+    with pytest.raises(ValueError):
+        list(hr.iter_scenario_pops(fname))
+
+    df.assign(state=df["state"].replace("CA", "XX")).to_csv(fname, index=False)
+    with pytest.raises(ValueError):
+        list(hr.iter_scenario_pops(fname))
+
+
+@pytest.mark.parametrize("population", [ np.inf, np.nan, 0.0, -5.0 ])
+def test_apportion_scenarios_file_invalid_population(tmp_path, population: float):
+    fname = str(tmp_path / "scenarios.csv")
+    write_scenarios_csv(fname, 3)
+    df = pd.read_csv(fname)
+    df.loc[(df["scenario_id"] == 101) & (df["state"] == "TX"), "population"] = population
+    df.to_csv(fname, index=False)
+    with pytest.raises(ValueError, match="Scenario 101 .* state TX"):
+        hr.apportion_scenarios_file(fname, str(tmp_path / "seats.csv"))
+
+
+def test_apportion_scenarios_file_empty(tmp_path):
+    fname_in, fname_out = str(tmp_path / "scenarios.csv"), str(tmp_path / "seats.csv")
+    with open(fname_in, "w") as f:
+        f.write("scenario_id,state,population\n")
+    assert hr.apportion_scenarios_file(fname_in, fname_out) == 0
+    df = pd.read_csv(fname_out)
+    assert list(df.columns) == [ "scenario_id", "state", "seats" ]
+    assert len(df) == 0
+
+
+def test_cli_scenarios(tmp_path):
+    fname_in, fname_out = str(tmp_path / "scenarios.csv"), str(tmp_path / "seats.csv")
+    pops = write_scenarios_csv(fname_in, 5)
+    main(["scenarios", fname_in, fname_out, "--method", "webster", "--seats", "500"])
+    df = pd.read_csv(fname_out)
+    assert np.array_equal(df["seats"].to_numpy().reshape(5, 50), hr.apportion(pops, 500, hr.ApportionmentMethod.WEBSTER))
+
+
+@pytest.mark.parametrize("col", [ "state", "scenario_id" ])
+def test_from_dataframe_missing(tmp_path, col: str):
+    fname = str(tmp_path / "scenarios.csv")
+    write_scenarios_csv(fname, 2)
+    df = pd.read_csv(fname)
+
+    # A missing value must not be counted as the last state or scenario
+    df[col] = df[col].astype(object)
+    df.loc[(df["scenario_id"] == 101) & (df["state"] == "WY"), col] = None
+    with pytest.raises(ValueError, match=f"missing {col}"):
+        hr.ScenarioPops.from_dataframe(df)
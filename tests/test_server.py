@@ -0,0 +1,131 @@
+import houseofreps as hr
+from houseofreps.server import ApportionmentServer
+
+import asyncio
+import json
+import numpy as np
+import pytest
+from typing import Any, Dict, Optional, Tuple
+
+
+def query(path: str, params: Dict[str, Any], server: Optional[ApportionmentServer] = None) -> Tuple[int, Dict[str, Any]]:
+    server = server or ApportionmentServer()
+    return asyncio.run(server.handle_query(path, params))
+
+
+def test_apportion_matches_house():
+    house = hr.HouseOfReps(year=hr.Year.YR2010, pop_type=hr.PopType.APPORTIONMENT)
+    house.assign_house_seats_priority()
+
+    status, response = query("/apportion", { "year": "2010" })
+    assert status == 200
+    assert response["seats"] == { st.value: house.states[st].no_reps.voting for st in hr.St.all_except_dc() }
+
+    status, response = query("/electoral", { "year": "2010" })
+    assert status == 200
+    assert house.electoral_fracs is not None
+    for st in hr.St:
+        assert response["electoral_frac"][st.value] == pytest.approx(house.electoral_fracs[st].electoral_frac)
+        assert response["electoral_frac_vote"][st.value] == pytest.approx(house.electoral_fracs[st].electoral_frac_vote)
+
+
+def test_overrides_and_cache():
+    server = ApportionmentServer(cache_size=2)
+    status, margins = query("/margins", {}, server)
+    assert status == 200
+    gain_ca = margins["gain"]["CA"]
+
+    # Just past the margin CA gains a seat
+    pop_ca = hr.ST_TRUE[hr.St.CALIFORNIA].year_to_pop[hr.Year.YR2020].apportionment
+    status, response = query("/apportion", { "pops": { "CA": pop_ca + 1.001 * gain_ca } }, server)
+    assert response["seats"]["CA"] == margins["seats"]["CA"] + 1
+    assert server.cache.stats() == { "size": 2, "maxsize": 2, "hits": 0, "misses": 2 }
+
+    # Endpoints share results, keyed on the overrides regardless of the state labels used
+    query("/electoral", { "pops": { "CALIFORNIA": pop_ca + 1.001 * gain_ca } }, server)
+    assert server.cache.hits == 1
+
+    # Least recently used results are evicted
+    query("/apportion", { "seats": 500 }, server)
+    query("/apportion", {}, server)
+    assert server.cache.misses == 4
+
+
+@pytest.mark.parametrize("params", [
+    { "year": "2021" }, { "method": "fptp" }, { "seats": 10 }, { "seats": 10**9 }, { "pops": { "XX": 1.0 } }, { "pops": { "CA": -1 } },
+    { "pops": { "CA": float("inf") } }, { "pops": { "CA": float("nan") } }, { "pops": { "CA": "Infinity" } },
+    { "seats": float("inf") }, { "seats": None }, { "pops": { "CA": 10**400 } }
+    ])
+def test_invalid(params: Dict[str, Any]):
+    status, response = query("/apportion", params)
+    assert status == 400
+    assert "error" in response
+    assert query("/unknown", {})[0] == 404
+
+    # Batch scenarios are validated the same way
+    pops = params.get("pops")
+    if pops is not None:
+        status, response = query("/batch", { "scenarios": [ {}, pops ] })
+        assert status == 400
+
+
+@pytest.mark.parametrize("batch_pool_min", [ 1, 1000 ])
+def test_batch(batch_pool_min: int):
+    rng = np.random.default_rng(0)
+    pops = np.array([ hr.ST_TRUE[st].year_to_pop[hr.Year.YR2020].apportionment for st in hr.St.all_except_dc() ])
+    pops = pops * rng.uniform(0.9, 1.1, size=(10, len(pops)))
+    scenarios = [ { st.value: pop for st, pop in zip(hr.St.all_except_dc(), row) } for row in pops.tolist() ]
+
+    async def run() -> Tuple[int, Dict[str, Any]]:
+        server = ApportionmentServer(batch_pool_min=batch_pool_min)
+        try:
+            return await server.handle_query("/batch", { "scenarios": scenarios, "method": "webster" })
+        finally:
+            await server.close()
+
+    status, response = asyncio.run(run())
+    assert status == 200
+    assert response["states"] == [ st.value for st in hr.St.all_except_dc() ]
+    assert response["seats"] == hr.apportion(pops, 435, hr.ApportionmentMethod.WEBSTER).tolist()
+
+
+def test_http():
+    async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: bytes) -> Tuple[int, Dict[str, Any]]:
+        writer.write(request)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        headers = {}
+        while (line := await reader.readline()) != b"\r\n":
+            name, _, value = line.decode().partition(":")
+            headers[name.lower()] = value.strip()
+        return status, json.loads(await reader.readexactly(int(headers["content-length"])))
+
+    async def run():
+        server = ApportionmentServer(port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+
+            # Several requests on one connection
+            status, response = await request(reader, writer, b"GET /apportion?year=2020&pops=%7B%22WY%22%3A%201.5%7D HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            assert status == 200
+            assert response["seats"]["WY"] == 2
+
+            body = json.dumps({ "method": "jefferson" }).encode()
+            status, response = await request(reader, writer, b"POST /margins HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+            assert status == 200
+            assert response["method"] == "jefferson"
+
+            # JSON numbers too large for a float parse to inf, or to integers that overflow a float, and are rejected without closing the connection
+            for body in [ b'{"pops": {"CA": 1e400}}', b'{"pops": {"CA": Infinity}}', b'{"seats": 1e400}', b'{"pops": {"CA": 1%s}}' % (b"0" * 400) ]:
+                status, response = await request(reader, writer, b"POST /apportion HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+                assert status == 400
+
+            status, response = await request(reader, writer, b"POST /apportion HTTP/1.1\r\nContent-Length: 3\r\nConnection: close\r\n\r\n[1]")
+            assert status == 400
+            assert await reader.read() == b""
+            writer.close()
+        finally:
+            await server.close()
+
+    asyncio.run(run())
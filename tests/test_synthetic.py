@@ -0,0 +1,38 @@
+import houseofreps as hr
+
+import filecmp
+
+
+def test_write_synthetic_voteview_csvs(tmp_path):
+    options = hr.SyntheticVoteViewOptions(no_congresses=3, last_congress=117, no_rolls=20, no_members=435)
+    loader = hr.write_synthetic_voteview_csvs(str(tmp_path), options)
+
+    # Counts of the rollcalls match the votes, so nothing is repaired or inconsistent
+    votes, rollcalls, members, report = loader.load_consistency_with_report()
+    assert report.no_rollcalls == 3 * 20
+    assert report.repaired == []
+    assert report.inconsistent == []
+    assert sorted(votes.congress_to_rollnumber_to_votes.keys()) == [ 115, 116, 117 ]
+    assert sorted(rollcalls.congress_to_rollnumber_to_rollcall[117].keys()) == list(range(1, 21))
+
+    # Seats are apportioned to states by the 2020 census, the President is dropped
+    member_table = loader.load_member_table()
+    assert len(member_table.to_members(117).icpsr_to_state) == 435
+    for st, no_reps in [ (hr.St.CALIFORNIA, 52), (hr.St.WYOMING, 1) ]:
+        assert sum(st == member_st for member_st in member_table.to_members(117).icpsr_to_state.values()) == no_reps
+
+    # Some members are replaced in every congress
+    icpsrs_115 = set(member_table.to_members(115).icpsr_to_state.keys())
+    icpsrs_117 = set(member_table.to_members(117).icpsr_to_state.keys())
+    assert 0 < len(icpsrs_117 - icpsrs_115) < 435
+
+
+def test_write_synthetic_voteview_csvs_deterministic(tmp_path):
+    options = hr.SyntheticVoteViewOptions(no_congresses=2, no_rolls=10)
+    loader_1 = hr.write_synthetic_voteview_csvs(str(tmp_path / "1"), options)
+    loader_2 = hr.write_synthetic_voteview_csvs(str(tmp_path / "2"), options)
+    loader_3 = hr.write_synthetic_voteview_csvs(str(tmp_path / "3"), hr.SyntheticVoteViewOptions(no_congresses=2, no_rolls=10, seed=1))
+    assert filecmp.cmp(loader_1.votes_csv, loader_2.votes_csv, shallow=False)
+    assert filecmp.cmp(loader_1.rollcalls_csv, loader_2.rollcalls_csv, shallow=False)
+    assert filecmp.cmp(loader_1.members_csv, loader_2.members_csv, shallow=False)
+    assert not filecmp.cmp(loader_1.votes_csv, loader_3.votes_csv, shallow=False)
@@ -0,0 +1,337 @@
+import houseofreps as hr
+from test_voting import write_small_voteview_csvs
+
+import numpy as np
+import pickle
+import shutil
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _count_yea(store: hr.VoteStore, congress: int) -> int:
+    matrix = store.open_congress(congress)
+    return int((matrix.cast_codes == hr.CastCode.YEA.value).sum())
+
+
+class TestVoteStore:
+
+
+    def test_vote_matrix(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes_columnar()
+
+        matrix = hr.VoteMatrix.from_votes_columnar(votes, 117)
+        assert matrix.no_rollcalls == 3
+        assert matrix.no_members == 4
+        assert matrix.cast_codes[matrix.roll_idx(2), np.searchsorted(matrix.icpsrs, 4)] == hr.CastCode.NOT_MEMBER.value
+
+        matrix = hr.VoteMatrix.from_votes_columnar(votes, 116)
+        assert matrix.no_members == 4
+        assert matrix.to_votes_all() == hr.VoteMatrix.from_votes_all(votes.to_votes_all(), 116).to_votes_all()
+
+
+    def test_write_open(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes()
+
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes)
+        assert store.congresses == [116, 117]
+        assert store.load_votes() == votes
+
+        # Memory-mapped read-only
+        matrix = store.open_congress(117)
+        assert isinstance(matrix.cast_codes, np.memmap)
+        assert not matrix.cast_codes.flags.writeable
+        assert np.shares_memory(matrix.take_rolls(slice(1, 3)).cast_codes, matrix.cast_codes)
+
+
+    def test_share_with_workers(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        store = hr.VoteStore.write(str(tmp_path / 'store'), hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes_columnar())
+
+        # Only the directory is pickled
+        assert len(pickle.dumps(store)) < 500
+
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            counts = list(executor.map(_count_yea, [store, store], store.congresses))
+        assert counts == [ _count_yea(store, congress) for congress in store.congresses ]
+        assert sum(counts) == 11
+
+
+    def test_write_over_existing(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes_columnar()
+        hr.VoteStore.write(str(tmp_path / 'store'), votes)
+        reader = hr.VoteStore(str(tmp_path / 'store'))
+
+        # A reader of the replaced manifest still sees all of its versions
+        votes_116 = votes.take(votes.congress == 116)
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes_116)
+        assert store.manifest["congresses"]["116"]["version"] == 2
+        assert reader.load_votes() == votes.to_votes_all()
+        assert store.load_votes() == votes_116.to_votes_all()
+
+        # The next write skips a version left by an interrupted write, and prunes it with the versions of congresses no longer in the store
+        (tmp_path / 'store' / 'congress_116' / 'v7').mkdir()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes_116)
+        assert store.manifest["congresses"]["116"]["version"] == 8
+        assert sorted(path.name for path in (tmp_path / 'store' / 'congress_116').iterdir()) == ['v2', 'v8']
+        assert not (tmp_path / 'store' / 'congress_117').exists()
+        assert store.load_votes() == votes_116.to_votes_all()
+
+
+class TestVoteStorePartitions:
+
+
+    def test_load_selected_congresses(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+        votes, rollcalls, _ = loader.load_consistency()
+
+        votes_all, rollcalls_all, members_all = store.load()
+        assert votes_all == votes
+        assert rollcalls_all == rollcalls
+        assert members_all.to_dataframe().equals(loader.load_member_table().to_dataframe())
+
+        # Only congress 117 is read
+        votes_117, rollcalls_117, members_117 = store.load(congresses=[117, 200])
+        assert list(votes_117.congress_to_rollnumber_to_votes.keys()) == [117]
+        assert list(rollcalls_117.congress_to_rollnumber_to_rollcall.keys()) == [117]
+        assert members_117.congresses == [117]
+        assert votes_117.congress_to_rollnumber_to_votes[117] == votes.congress_to_rollnumber_to_votes[117]
+
+        # By census decade
+        assert store.select_congresses(census_years=[hr.Year.YR2010]) == [116]
+        votes_2020, _, _ = store.load(census_years=[hr.Year.YR2020])
+        assert list(votes_2020.congress_to_rollnumber_to_votes.keys()) == [117]
+
+
+    def test_partitions_read(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+
+        # Other partitions are never opened
+        shutil.rmtree(tmp_path / 'store' / 'congress_116')
+        _, rollcalls, members = store.load(congresses=[117])
+        assert rollcalls.no_rollcalls == 3
+        assert len(members) == 4
+
+
+class TestVoteStoreAppend:
+
+
+    def test_append_voteview_csv(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        votes = loader.load_votes_columnar()
+
+        # Store without rollcall 3 of congress 117
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes.take(~((votes.congress == 117) & (votes.rollnumber == 3))))
+        mtime_116 = (tmp_path / 'store' / 'congress_116' / 'v1' / 'cast_codes.npy').stat().st_mtime_ns
+
+        report = store.append_voteview_csv(loader)
+        assert report.rolls_added == [(117, 3)]
+        assert report.rolls_changed == []
+        assert report.no_rolls_unchanged == 4
+        assert report.congresses_written == [117]
+        assert (tmp_path / 'store' / 'congress_116' / 'v1' / 'cast_codes.npy').stat().st_mtime_ns == mtime_116
+
+        # Reopened store has all votes
+        assert hr.VoteStore(str(tmp_path / 'store')).load_votes() == votes.to_votes_all()
+
+        # Nothing to do the second time
+        report = store.append_voteview_csv(loader, min_congress=117)
+        assert report.rolls_added == [] and report.congresses_written == []
+
+
+    def test_append_changed(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes_columnar()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes)
+
+        # Member 2 switches from nay to yea in rollcall 2 of congress 117
+        delta = votes.take(votes.congress == 117)
+        delta.cast_code[(delta.rollnumber == 2) & (delta.icpsr == 2)] = hr.CastCode.YEA.value
+        assert store.changed_votes(delta).no_votes == 4
+
+        report = store.append(delta)
+        assert report.rolls_changed == [(117, 2)]
+        assert report.no_rolls_unchanged == 2
+        matrix = store.open_congress(117)
+        assert matrix.cast_codes[matrix.roll_idx(2), np.searchsorted(matrix.icpsrs, 2)] == hr.CastCode.YEA.value
+
+
+    def test_append_votes_only(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+        votes = loader.load_votes_columnar()
+
+        # Appending changed votes without rollcalls or members keeps those already stored
+        delta = votes.take(votes.congress == 117)
+        delta.cast_code[(delta.rollnumber == 2) & (delta.icpsr == 2)] = hr.CastCode.YEA.value
+        assert store.append(delta).congresses_written == [117]
+
+        for store_reopened in [ store, hr.VoteStore(str(tmp_path / 'store')) ]:
+            _, rollcalls, members = store_reopened.load([117])
+            assert rollcalls.no_rollcalls == 3
+            assert members.congresses == [117]
+
+
+    def test_append_versions(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+        votes = loader.load_votes_columnar()
+        reader = hr.VoteStore(str(tmp_path / 'store'))
+
+        # Each append writes a new version. The manifest swap commits it, so a reader opened before sees all of the old version
+        delta = votes.take(votes.congress == 117)
+        for version, cast_code in [ (2, hr.CastCode.YEA.value), (3, hr.CastCode.NAY.value) ]:
+            delta.cast_code[(delta.rollnumber == 2) & (delta.icpsr == 2)] = cast_code
+            store.append(delta)
+            assert store.manifest["congresses"]["117"]["version"] == version
+            matrix = store.open_congress(117)
+            assert matrix.cast_codes[matrix.roll_idx(2), np.searchsorted(matrix.icpsrs, 2)] == cast_code
+            if version == 2:
+                matrix_old = reader.open_congress(117)
+                assert matrix_old.cast_codes.shape == (len(matrix_old.rollnumbers), len(matrix_old.icpsrs))
+                assert matrix_old.cast_codes[matrix_old.roll_idx(2), np.searchsorted(matrix_old.icpsrs, 2)] == hr.CastCode.NAY.value
+
+        # The current and previous versions are kept, with the rollcalls and members carried over
+        assert sorted(path.name for path in (tmp_path / 'store' / 'congress_117').iterdir()) == ['v2', 'v3']
+        _, rollcalls, members = hr.VoteStore(str(tmp_path / 'store')).load([117])
+        assert rollcalls.no_rollcalls == 3
+        assert len(members) == 4
+
+
+    def test_append_repair_by_congress(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        votes = loader.load_votes_columnar()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes.take(votes.congress == 116))
+
+        # Member 3 is only a member in congress 116, so the extra vote in congress 117 is removed by the repair
+        with open(paths['votes'], 'a') as f:
+            f.write('117,House,3,3,1,100.0\n')
+        report = store.append_voteview_csv(loader)
+        assert report.rolls_added == [(117, 1), (117, 2), (117, 3)]
+        matrix = store.open_congress(117)
+        assert 3 not in matrix.icpsrs.tolist()
+
+
+    def test_write_repair_by_congress(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        with open(paths['votes'], 'a') as f:
+            f.write('117,House,3,3,1,100.0\n')
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+
+        # Writing stores the same votes as appending the same CSVs
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+        store_appended = hr.VoteStore.write(str(tmp_path / 'store_appended'), hr.VotesColumnar.from_votes_all(hr.VotesAll()))
+        store_appended.append_voteview_csv(loader)
+        assert store.load_votes() == store_appended.load_votes()
+        assert 3 not in store.open_congress(117).icpsrs.tolist()
+
+
+    def test_refresh_repaired(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        with open(paths['votes'], 'a') as f:
+            f.write('117,House,3,3,1,100.0\n')
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        store = hr.VoteStore.write_voteview_csv(str(tmp_path / 'store'), loader)
+        assert list(store.manifest["congresses"]["117"]["repaired"].keys()) == ["3"]
+
+        # A repaired rollcall is unchanged while its source votes are
+        assert store.changed_votes(loader.load_votes_columnar()).no_votes == 0
+        report = store.append_voteview_csv(loader)
+        assert report.no_rolls_unchanged == 5 and report.congresses_written == []
+
+        # Source votes that change but repair to the same votes are checked once, and only their digest is stored
+        digest = store.manifest["congresses"]["117"]["repaired"]["3"]
+        with open(paths['votes'], 'r') as f:
+            lines = f.read().replace('117,House,3,3,1,100.0', '117,House,3,3,6,100.0')
+        with open(paths['votes'], 'w') as f:
+            f.write(lines)
+        assert store.changed_votes(loader.load_votes_columnar()).no_votes == 5
+        report = store.append_voteview_csv(loader)
+        assert report.rolls_changed == [] and report.congresses_written == []
+        assert hr.VoteStore(str(tmp_path / 'store')).manifest["congresses"]["117"]["repaired"]["3"] != digest
+        assert store.changed_votes(loader.load_votes_columnar()).no_votes == 0
+
+        # Appending votes that need no repair drops the digest
+        votes = store.load_votes([117])
+        store.append(hr.VotesColumnar.from_votes_all(votes))
+        assert "repaired" not in store.manifest["congresses"]["117"]
+
+
+    def test_append_inconsistent(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        votes = loader.load_votes_columnar()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes.take(votes.congress == 116))
+
+        # Yea count of a new rollcall no longer matches the votes
+        with open(paths['rollcalls'], 'r') as f:
+            lines = f.readlines()
+        lines = [ line.replace('117,House,3,2021-01-03,4,0', '117,House,3,2021-01-03,3,0') for line in lines ]
+        with open(paths['rollcalls'], 'w') as f:
+            f.writelines(lines)
+
+        with pytest.raises(RuntimeError):
+            store.append_voteview_csv(loader)
+        assert store.congresses == [116]
+
+
+class TestAnalyzeVotingParallel:
+
+
+    def test_matches_serial(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes, _, members = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members']).load_consistency()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes)
+
+        summary_serial = hr.analyze_voting_parallel(store, members, no_workers=1)
+        summary = hr.analyze_voting_parallel(store, members, no_workers=2, out_dir=str(tmp_path / 'out'))
+        assert summary == summary_serial
+        assert summary.no_rollcalls == 5
+
+        # Compare to the single rollcall calculations
+        expected = hr.VotingAnalysisSummary()
+        for congress in store.congresses:
+            matrix = store.open_congress(congress)
+            expected.update(hr.analyze_congress_voting(matrix, members.state_idxs(matrix.icpsrs)))
+        assert summary == expected
+
+        # Per-rollcall results on disk
+        df = hr.read_table(str(tmp_path / 'out' / 'congress_117'))
+        assert df is not None
+        assert df.rollnumber.tolist() == [1, 2, 3]
+        assert df.actual_yea.tolist() == [2, 1, 4]
+
+
+    def test_member_table(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        votes, _, _ = loader.load_consistency()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes)
+        table = loader.load_member_table()
+
+        summary = hr.analyze_voting_parallel(store, table, no_workers=2)
+        expected = hr.VotingAnalysisSummary()
+        for congress in store.congresses:
+            matrix = store.open_congress(congress)
+            expected.update(hr.analyze_congress_voting(matrix, table.to_members(congress).state_idxs(matrix.icpsrs)))
+        assert summary == expected
+
+
+    def test_stream(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes, _, members = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members']).load_consistency()
+        store = hr.VoteStore.write(str(tmp_path / 'store'), votes)
+
+        analyses = list(hr.iter_analyze_voting_parallel(store, members, congresses=[117], no_workers=1))
+        assert [ a.congress for a in analyses ] == [117]
+        assert analyses[0].counts_fractional.shape == (3, len(hr.CastCode))
@@ -1,6 +1,8 @@
 import houseofreps as hr
 
 import os
+import numpy as np
+import pandas as pd
 import pytest
 from loguru import logger
 
@@ -111,3 +113,359 @@ def test_calculate_vote_results_fractional():
         vr = hr.CalculateVotes(votes, members, rc, options=options).calculate_votes_fractional().vote_results
         assert vr.castcode_to_count[hr.CastCode.YEA] == pytest.approx(yea2)
         assert vr.castcode_to_count[hr.CastCode.NAY] == pytest.approx(nay2)
+
+
+def write_small_voteview_csvs(dir_out: str):
+    """Write a small, self-consistent set of voteview csvs (votes, rollcalls, members) for two congresses
+    """
+    members = [
+        (116, 'House', 1, 'CA', 100), (116, 'House', 2, 'WY', 200), (116, 'House', 3, 'DE', 100), (116, 'House', 4, 'DC', 100),
+        (117, 'House', 1, 'CA', 100), (117, 'House', 2, 'WY', 200), (117, 'House', 5, 'TX', 200), (117, 'House', 4, 'DC', 100),
+        ]
+    # congress, rollnumber, icpsr -> cast code
+    votes = [
+        (116, 1, 1, 1), (116, 1, 2, 6), (116, 1, 3, 1), (116, 1, 4, 9),
+        (116, 2, 1, 6), (116, 2, 2, 6), (116, 2, 3, 1), (116, 2, 4, 1),
+        (117, 1, 1, 1), (117, 1, 2, 1), (117, 1, 5, 6), (117, 1, 4, 6),
+        (117, 2, 1, 1), (117, 2, 2, 6), (117, 2, 5, 6), (117, 2, 4, 0),
+        (117, 3, 1, 1), (117, 3, 2, 1), (117, 3, 5, 1), (117, 3, 4, 1),
+        ]
+    rollcalls = {}
+    for congress, rollnumber, _, cast_code in votes:
+        yea, nay = rollcalls.get((congress, rollnumber), (0, 0))
+        rollcalls[(congress, rollnumber)] = (yea + (cast_code == 1), nay + (cast_code == 6))
+
+    paths = {
+        'votes': os.path.join(dir_out, 'votes.csv'),
+        'rollcalls': os.path.join(dir_out, 'rollcalls.csv'),
+        'members': os.path.join(dir_out, 'members.csv')
+        }
+    with open(paths['votes'], 'w') as f:
+        f.write('congress,chamber,rollnumber,icpsr,cast_code,prob\n')
+        for congress, rollnumber, icpsr, cast_code in votes:
+            f.write(f'{congress},House,{rollnumber},{icpsr},{cast_code},100.0\n')
+    with open(paths['rollcalls'], 'w') as f:
+        f.write('congress,chamber,rollnumber,date,yea_count,nay_count,bill_number,vote_result,vote_desc,vote_question\n')
+        for (congress, rollnumber), (yea, nay) in rollcalls.items():
+            f.write(f'{congress},House,{rollnumber},2021-01-0{rollnumber},{yea},{nay},HR{rollnumber},Passed,Desc {rollnumber},On Passage\n')
+    with open(paths['members'], 'w') as f:
+        f.write('congress,chamber,icpsr,state_abbrev,party_code\n')
+        for congress, chamber, icpsr, st, party_code in members:
+            f.write(f'{congress},{chamber},{icpsr},{st},{party_code}\n')
+    return paths
+
+
+class TestVotesColumnar:
+
+
+    def test_load_votes_chunked(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+
+        votes_whole = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes()
+        assert votes_whole.no_congresses == 2
+        assert votes_whole.no_rollcalls == 5
+        assert votes_whole.congress_to_rollnumber_to_votes[117][2].icpsr_to_castcode[4] == hr.CastCode.NOT_MEMBER
+
+        # Rollcalls split across chunks are aggregated
+        votes_chunked = hr.LoadVoteViewCsv(votes_csv=paths['votes'], chunksize=3).load_votes()
+        assert votes_chunked == votes_whole
+
+
+    def test_load_votes_columnar(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes'], chunksize=7).load_votes_columnar()
+        assert votes.no_votes == 20
+        assert votes.congress.dtype == np.int16
+        assert votes.icpsr.dtype == np.int32
+        assert votes.cast_code.dtype == np.int8
+        assert votes.to_votes_all() == hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes()
+        assert hr.VotesColumnar.from_votes_all(votes.to_votes_all()).to_votes_all() == votes.to_votes_all()
+
+
+class TestLoadVoteViewCsvCache:
+
+
+    def test_cache_roundtrip(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        cache_dir = str(tmp_path / 'cache')
+
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'], cache_dir=cache_dir)
+        assert loader.read_cache() is None
+        votes, rollcalls, members = loader.load_consistency()
+
+        # Warm start reads from the cache only
+        cached = loader.read_cache()
+        assert cached is not None
+        votes_cached, rollcalls_cached, members_cached = cached
+        assert votes_cached == votes
+        assert rollcalls_cached == rollcalls
+        assert members_cached == members
+
+
+    def test_cache_invalidated(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'], cache_dir=str(tmp_path / 'cache'))
+        loader.load_consistency()
+        assert loader.read_cache() is not None
+
+        # Changing a source CSV invalidates the cache
+        with open(paths['members'], 'a') as f:
+            f.write('117,House,6,NY,100\n')
+        assert loader.read_cache() is None
+        _, _, members = loader.load_consistency()
+        assert members.icpsr_to_state[6] == hr.St.NEW_YORK
+        assert loader.read_cache() is not None
+
+
+class TestConsistency:
+
+
+    def test_repair_and_report(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+
+        # Add a vote by a non-member to one rollcall (repairable), and break the counts of two others (not repairable)
+        with open(paths['votes'], 'a') as f:
+            f.write('116,House,1,99,1,100.0\n')
+        df = pd.read_csv(paths['rollcalls'])
+        df.loc[(df.congress == 117) & (df.rollnumber == 1), 'yea_count'] += 1
+        df.loc[(df.congress == 117) & (df.rollnumber == 3), 'nay_count'] += 2
+        df.to_csv(paths['rollcalls'], index=False)
+
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        votes, _, _, report = loader.load_consistency_with_report()
+        assert not report.is_consistent
+        assert [ (ir.congress, ir.rollnumber) for ir in report.repaired ] == [(116, 1)]
+        assert report.repaired[0].yea_count_votes == 3
+        assert [ (ir.congress, ir.rollnumber) for ir in report.inconsistent ] == [(117, 1), (117, 3)]
+        assert report.inconsistent[1].nay_count_rollcall == 2
+        assert report.inconsistent[1].nay_count_votes == 0
+        assert 99 not in votes.congress_to_rollnumber_to_votes[116][1].icpsr_to_castcode
+
+        # All inconsistencies are raised together
+        with pytest.raises(RuntimeError, match="2 inconsistent"):
+            loader.load_consistency()
+
+
+    def test_missing_rolls(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        with open(paths['rollcalls'], 'a') as f:
+            f.write('117,House,9,2021-01-09,0,0,HR9,Passed,Desc 9,On Passage\n')
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members'])
+        _, _, _, report = loader.load_consistency_with_report()
+        assert report.rolls_missing_votes == [(117, 9)]
+        assert report.rolls_missing_rollcall == []
+        assert len(report.inconsistent) == 0
+
+
+class TestCalculateVotesBatch:
+
+
+    def test_matches_calculate_votes(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+
+        # A vote by a member missing from the members csv, and a member absent from a rollcall
+        with open(paths['votes'], 'a') as f:
+            f.write('117,House,3,99,6,100.0\n')
+        df = pd.read_csv(paths['rollcalls'])
+        df.loc[(df.congress == 117) & (df.rollnumber == 3), 'nay_count'] += 1
+        df.to_csv(paths['rollcalls'], index=False)
+
+        votes_all, rollcalls, members = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members']).load_consistency()
+
+        for options in [ hr.CalculateVotes.Options(), hr.CalculateVotes.Options(use_num_votes_as_num_seats=True, skip_castcodes=[]) ]:
+            for congress in [116, 117]:
+                matrix = hr.VoteMatrix.from_votes_all(votes_all, congress)
+                batch = hr.CalculateVotesBatch(matrix, members.state_idxs(matrix.icpsrs), options=options)
+                vrb_actual = batch.calculate_votes(rollcalls)
+                vrb_frac = batch.calculate_votes_fractional()
+
+                for idx, rollnumber in enumerate(matrix.rollnumbers.tolist()):
+                    cv = hr.CalculateVotes(
+                        votes_all.congress_to_rollnumber_to_votes[congress][rollnumber], 
+                        members, 
+                        rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber], 
+                        options=options
+                        )
+                    assert vrb_actual.vote_results(idx) == cv.calculate_votes()
+
+                    vr_frac = cv.calculate_votes_fractional().vote_results
+                    vr_frac_batch = vrb_frac.vote_results(idx)
+                    assert vr_frac_batch.castcode_to_count.keys() == vr_frac.castcode_to_count.keys()
+                    for castcode, count in vr_frac.castcode_to_count.items():
+                        assert vr_frac_batch.castcode_to_count[castcode] == pytest.approx(count)
+                    assert vrb_frac.majority_pass[idx] == (vr_frac.majority_decision == hr.Decision.PASS)
+
+
+    def test_inconsistent_rollcall_raises(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        votes_all, rollcalls, members = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members']).load_consistency()
+        rollcalls.congress_to_rollnumber_to_rollcall[116][2].yea_count += 1
+
+        matrix = hr.VoteMatrix.from_votes_all(votes_all, 116)
+        with pytest.raises(RuntimeError):
+            hr.CalculateVotesBatch(matrix, members.state_idxs(matrix.icpsrs)).calculate_votes(rollcalls)
+
+
+def test_members_state_idxs():
+    members = hr.Members(icpsr_to_state={ 30: hr.St.TEXAS, 10: hr.St.CALIFORNIA, 20: hr.St.DISTRICT_OF_COLUMBIA })
+    assert members.icpsrs_sorted.tolist() == [10, 20, 30]
+    assert members.state_idxs_sorted.tolist() == [ hr.ST_TO_IDX[hr.St.CALIFORNIA], hr.ST_TO_IDX[hr.St.DISTRICT_OF_COLUMBIA], hr.ST_TO_IDX[hr.St.TEXAS] ]
+
+    state_idxs = members.state_idxs(np.array([30, 5, 10, 40, 20]))
+    assert state_idxs.dtype == np.int8
+    assert state_idxs.tolist() == [ hr.ST_TO_IDX[hr.St.TEXAS], hr.STATE_IDX_MISSING, hr.ST_TO_IDX[hr.St.CALIFORNIA], hr.STATE_IDX_MISSING, hr.ST_TO_IDX[hr.St.DISTRICT_OF_COLUMBIA] ]
+    assert hr.Members(icpsr_to_state={}).state_idxs(np.array([1, 2])).tolist() == [ hr.STATE_IDX_MISSING ] * 2
+
+
+def test_rescale_factors_provider(tmp_path):
+    paths = write_small_voteview_csvs(str(tmp_path))
+    votes_all, rollcalls, members = hr.LoadVoteViewCsv(votes_csv=paths['votes'], rollcalls_csv=paths['rollcalls'], members_csv=paths['members']).load_consistency()
+
+    # One apportionment per (census year, no. seats)
+    for options, no_calculations in [
+        (hr.CalculateVotes.Options(), 2), 
+        (hr.CalculateVotes.Options(use_num_votes_as_num_seats=True), 2)
+        ]:
+        provider = hr.RescaleFactorsProvider()
+        for congress, rollnumber_to_votes in votes_all.congress_to_rollnumber_to_votes.items():
+            for rollnumber, votes in rollnumber_to_votes.items():
+                rc = rollcalls.congress_to_rollnumber_to_rollcall[congress][rollnumber]
+                cv = hr.CalculateVotes(votes, members, rc, options=options, rescale_factors_provider=provider)
+                vrf = cv.calculate_votes_fractional()
+                vrf_uncached = hr.CalculateVotes(votes, members, rc, options=options, rescale_factors_provider=hr.RescaleFactorsProvider()).calculate_votes_fractional()
+                assert vrf == vrf_uncached
+        assert provider.no_calculations == no_calculations
+
+
+def test_find_flipped_rolls():
+    rng = np.random.default_rng(0)
+    no_rolls, no_members = 2000, 435
+
+    # Mostly lopsided rollcalls, with some close ones
+    yea_frac = np.where(rng.uniform(size=no_rolls) < 0.9, rng.choice([0.1, 0.9], size=no_rolls), rng.uniform(0.48, 0.52, size=no_rolls))
+    is_yea = rng.uniform(size=(no_rolls, no_members)) < yea_frac[:, None]
+    cast_codes = np.where(is_yea, hr.CastCode.YEA.value, hr.CastCode.NAY.value).astype(np.int8)
+    cast_codes[rng.uniform(size=cast_codes.shape) < 0.05] = hr.CastCode.NOT_VOTING.value
+    matrix = hr.VoteMatrix(congress=117, rollnumbers=np.arange(1, no_rolls+1, dtype=np.int32), icpsrs=np.arange(no_members, dtype=np.int32), cast_codes=cast_codes)
+    state_idxs = rng.integers(0, len(hr.St), size=no_members).astype(np.int8)
+    state_idxs[:3] = hr.STATE_IDX_MISSING
+
+    for options in [ hr.CalculateVotes.Options(), hr.CalculateVotes.Options(use_num_votes_as_num_seats=True) ]:
+        cvb = hr.CalculateVotesBatch(matrix, state_idxs, options=options)
+        candidates = cvb.flip_candidates()
+        assert candidates.sum() < 0.2 * no_rolls
+
+        # Same flips as calculating every rollcall
+        flipped_all = cvb.calculate_votes().majority_pass != cvb.calculate_votes_fractional().majority_pass
+        assert not (flipped_all & ~candidates).any()
+        assert cvb.find_flipped_rolls().tolist() == matrix.rollnumbers[flipped_all].tolist()
+
+
+def test_calculate_decisions_counterfactual():
+    rng = np.random.default_rng(1)
+    no_rolls, no_members = 200, 435
+    yea_frac = rng.uniform(0.45, 0.55, size=no_rolls)
+    cast_codes = np.where(rng.uniform(size=(no_rolls, no_members)) < yea_frac[:, None], hr.CastCode.YEA.value, hr.CastCode.NAY.value).astype(np.int8)
+    matrix = hr.VoteMatrix(congress=117, rollnumbers=np.arange(1, no_rolls+1, dtype=np.int32), icpsrs=np.arange(no_members, dtype=np.int32), cast_codes=cast_codes)
+    state_idxs = rng.integers(0, len(hr.St), size=no_members).astype(np.int8)
+    state_idxs[:3] = hr.STATE_IDX_MISSING
+
+    cvb = hr.CalculateVotesBatch(matrix, state_idxs)
+    methods = [ hr.ApportionmentMethod.HUNTINGTON_HILL, hr.ApportionmentMethod.WEBSTER, hr.ApportionmentMethod.ADAMS ]
+    decisions = cvb.calculate_decisions_counterfactual(methods, [ 435, 600 ])
+    assert decisions.passed.shape == (3, 2, no_rolls)
+    assert decisions.passed_actual.tolist() == cvb.calculate_votes().majority_pass.tolist()
+
+    # The actual apportionment reproduces the actual decisions
+    assert not decisions.flipped[0, 0].any()
+
+    # Same as summing the rescaled votes of each member
+    vec = hr.RESCALE_FACTORS_PROVIDER.get_method_rescale_vector(hr.Year.YR2020, hr.ApportionmentMethod.ADAMS, 600)
+    weights = vec[state_idxs]
+    yea = ((cast_codes == hr.CastCode.YEA.value) * weights).sum(axis=1)
+    nay = ((cast_codes == hr.CastCode.NAY.value) * weights).sum(axis=1)
+    assert decisions.passed[2, 1].tolist() == (yea > nay).tolist()
+
+    # The memoized vector is shared, so it is read-only
+    assert vec is hr.RESCALE_FACTORS_PROVIDER.get_method_rescale_vector(hr.Year.YR2020, hr.ApportionmentMethod.ADAMS, 600)
+    with pytest.raises(ValueError):
+        vec[0] = 2.0
+
+
+class TestMemberTable:
+
+
+    def test_load(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        loader = hr.LoadVoteViewCsv(members_csv=paths['members'])
+        table = loader.load_member_table()
+        assert table.congresses == [116, 117]
+        assert table.icpsr.tolist() == [1, 2, 3, 4, 1, 2, 4, 5]
+        assert list(table.columns.keys()) == ['state_abbrev', 'party_code']
+        assert table.to_members() == loader.load_members()
+
+        icpsrs = np.array([5, 99, 1])
+        assert table.take('party_code', icpsrs, 117)[[0, 2]].tolist() == [200, 100]
+        assert np.isnan(table.take('party_code', icpsrs, 117)[1])
+        assert table.state_idxs(icpsrs, 117).tolist() == loader.load_members().state_idxs(icpsrs).tolist()
+
+        # Member 5 is only in congress 117
+        assert table.rows(np.array([5, 5]), np.array([116, 117])).tolist() == [-1, 7]
+
+
+    def test_member_changes_state(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        df = pd.read_csv(paths['members'])
+        df.loc[(df.congress == 117) & (df.icpsr == 1), 'state_abbrev'] = 'TX'
+        df.to_csv(paths['members'], index=False)
+
+        loader = hr.LoadVoteViewCsv(members_csv=paths['members'])
+        table = loader.load_member_table()
+        assert table.state_idxs(np.array([1]), 116).tolist() == [ hr.ST_TO_IDX[hr.St.CALIFORNIA] ]
+        assert table.state_idxs(np.array([1]), 117).tolist() == [ hr.ST_TO_IDX[hr.St.TEXAS] ]
+        assert table.to_members(116).icpsr_to_state[1] == hr.St.CALIFORNIA
+
+        # The global mapping keeps only the last row
+        assert loader.load_members().icpsr_to_state[1] == hr.St.TEXAS
+
+        # Batched results with the member table match single rollcalls with the members of each congress
+        votes = hr.LoadVoteViewCsv(votes_csv=paths['votes']).load_votes_columnar()
+        for congress in table.congresses:
+            matrix = hr.VoteMatrix.from_votes_columnar(votes, congress)
+            vrb_frac = hr.CalculateVotesBatch(matrix, hr.member_state_idxs(table, matrix)).calculate_votes_fractional()
+            votes_all = votes.to_votes_all()
+            for idx, rollnumber in enumerate(matrix.rollnumbers.tolist()):
+                rc = hr.RollCall(congress, rollnumber, '', 0, 0, '', '', '', '')
+                cv = hr.CalculateVotes(votes_all.congress_to_rollnumber_to_votes[congress][rollnumber], table.to_members(congress), rc)
+                assert vrb_frac.vote_results(idx).castcode_to_count == pytest.approx(cv.calculate_votes_fractional().vote_results.castcode_to_count)
+
+
+    def test_calculate_votes_grouped(self, tmp_path):
+        paths = write_small_voteview_csvs(str(tmp_path))
+        with open(paths['votes'], 'a') as f:
+            f.write('117,House,3,99,6,100.0\n')
+        loader = hr.LoadVoteViewCsv(votes_csv=paths['votes'], members_csv=paths['members'])
+        table = loader.load_member_table()
+        matrix = hr.VoteMatrix.from_votes_columnar(loader.load_votes_columnar(), 117)
+
+        totals = hr.calculate_votes_grouped(matrix, table, ['party_code'])
+        assert totals.groups['party_code'].iloc[:2].tolist() == [100, 200]
+        assert np.isnan(totals.groups['party_code'].iloc[2])
+
+        # Rollcall 1: members 1 (CA, 100), 2 (WY, 200) yea; 4 (DC, 100), 5 (TX, 200) nay
+        assert totals.yea[0].tolist() == [1, 1, 0]
+        assert totals.nay[0].tolist() == [1, 1, 0]
+        assert totals.nay[2].tolist() == [0, 0, 1]
+
+        # Group totals add up to the fractional totals of the whole House
+        vrb_frac = hr.CalculateVotesBatch(matrix, hr.member_state_idxs(table, matrix)).calculate_votes_fractional()
+        assert totals.yea_fractional.sum(axis=1) == pytest.approx(vrb_frac.yea_count)
+        assert totals.nay_fractional.sum(axis=1) == pytest.approx(vrb_frac.nay_count)
+
+        # Grouped by several attributes
+        totals = hr.calculate_votes_grouped(matrix, table, ['state_abbrev', 'party_code'])
+        assert len(totals.groups) == 5
+        df = totals.to_dataframe()
+        assert len(df) == 3 * 5
+        assert df[(df.rollnumber == 1) & (df.state_abbrev == 'TX')].nay.tolist() == [1]